@@ -1,14 +1,34 @@
-from flask import Flask, request
-from flask_cors import CORS
+from __future__ import annotations
 
-from .config import Config
-from .db import init_db
-from .auth.routes import auth_bp
-from .api.routes import api_bp
-from .admin.routes import admin_bp
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from flask import Flask
 
 
 def create_app() -> Flask:
+    # Imports live here so `import app` (or app.ml.batch from a scoring worker) costs
+    # nothing: Flask, the blueprints and their clients load only when an app is built.
+    from flask import Flask, request
+    from flask_cors import CORS
+
+    from .config import Config
+    from .db import init_db
+    from .metrics import init_metrics
+    from .http_cache import init_http_cache
+    from .profiling import init_profiling
+    from .activity import init_activity
+    from .changes import init_changes
+    from .admission import init_admission
+    from .model_registry import init_model_registry
+    from .analyses import init_analyses
+    from .quota import init_quota
+    from .retention import init_retention
+    from .trending import init_trending
+    from .auth.routes import auth_bp
+    from .api.routes import api_bp
+    from .admin.routes import admin_bp
+
     app = Flask(__name__)
     app.config.from_object(Config())
 
@@ -26,6 +46,17 @@ def create_app() -> Flask:
     app.config["SESSION_COOKIE_PATH"] = "/"
 
     init_db(app)
+    init_metrics(app)
+    init_http_cache(app)
+    init_profiling(app)
+    init_activity(app)
+    init_changes(app)
+    init_admission(app)
+    init_model_registry(app)
+    init_analyses(app)
+    init_quota(app)
+    init_retention(app)
+    init_trending(app)
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(api_bp, url_prefix="/api")
@@ -49,6 +80,6 @@ def create_app() -> Flask:
     return app
 
 
-# For gunicorn: run from backend/ with: gunicorn -w 1 -b 0.0.0.0:$PORT app:app
-app = create_app()
+# No module-level app: importing the package must stay cheap and side-effect free.
+# For gunicorn, run from backend/ with: gunicorn -w 1 -b 0.0.0.0:$PORT "app:create_app()"
 
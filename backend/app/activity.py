@@ -1,14 +1,43 @@
-"""Log every action to activity_log for admin audit."""
+"""Log every action to activity_log (in the activity database) for admin audit."""
 import json
 import logging
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-from flask import request
+from flask import Flask, current_app, request
 
-from .db import execute
+from .batch import BatchWriter, register_shutdown
+from .changes import notify_change
+from .db import _connect, execute
+from .metrics import timed
 
 logger = logging.getLogger(__name__)
 
+INSERT_SQL = """INSERT INTO activity_log (action, actor_type, user_id, payload, ip_address, user_agent, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+
+def init_activity(app: Flask) -> None:
+    """Attach the background activity writer to the app (unless ACTIVITY_ASYNC is off)."""
+    if not app.config.get("ACTIVITY_ASYNC", True):
+        return
+    writer = BatchWriter(
+        app.config["ACTIVITY_DB_PATH"],
+        INSERT_SQL,
+        name="activity-writer",
+        batch_size=app.config["ACTIVITY_BATCH_SIZE"],
+        flush_ms=app.config["ACTIVITY_FLUSH_MS"],
+        max_queue=app.config["ACTIVITY_QUEUE_MAX"],
+        overflow=app.config["ACTIVITY_OVERFLOW"],
+        connect=_connect,
+    )
+    register_shutdown(writer)
+    app.extensions["activity_writer"] = writer
+
+
+def get_activity_writer() -> Optional[BatchWriter]:
+    return current_app.extensions.get("activity_writer")
+
 
 def log_activity(
     action: str,
@@ -18,14 +47,21 @@ def log_activity(
     payload: Optional[Dict[str, Any]] = None,
 ) -> None:
     """Record an action in activity_log. Call from request context."""
-    try:
-        ip_address = request.remote_addr if request else None
-        user_agent = (request.user_agent.string if request and request.user_agent else None) or ""
-        payload_str = json.dumps(payload, default=str) if payload else None
-        execute(
-            """INSERT INTO activity_log (action, actor_type, user_id, payload, ip_address, user_agent)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (action, actor_type, user_id, payload_str, ip_address or "", (user_agent or "")[:500]),
-        )
-    except Exception as e:
-        logger.warning("Activity log insert failed: %s", e, exc_info=True)
+    with timed("activity_log"):
+        try:
+            ip_address = request.remote_addr if request else None
+            user_agent = (request.user_agent.string if request and request.user_agent else None) or ""
+            payload_str = json.dumps(payload, default=str) if payload else None
+            # Stamp the time now (same format as SQLite's datetime('now')) so queued rows
+            # keep the time of the action rather than the time of the flush.
+            created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            row = (action, actor_type, user_id, payload_str, ip_address or "", (user_agent or "")[:500], created_at)
+            writer = get_activity_writer()
+            if writer is not None:
+                if not writer.submit(row):
+                    logger.debug("Activity log queue full, dropped %s", action)
+                return
+            execute(INSERT_SQL, row)
+            notify_change("activity_log")
+        except Exception as e:
+            logger.warning("Activity log insert failed: %s", e, exc_info=True)
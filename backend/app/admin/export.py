@@ -0,0 +1,122 @@
+"""Streaming export of users, searches and activity_log.
+
+Rows are read with ``fetchmany`` on a dedicated connection (with the activity
+database attached, for activity_log) and written out as they arrive, so memory
+stays flat no matter how large the tables are.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from ..db import _connect, attach_activity_db
+
+EXPORT_COLUMNS: Dict[str, List[str]] = {
+    "users": ["id", "username", "is_admin", "created_at"],
+    "searches": ["id", "user_id", "keyword", "tweet_count", "positive", "neutral", "negative", "created_at",
+                 "model_version"],
+    "activity_log": ["id", "action", "actor_type", "user_id", "payload", "ip_address", "user_agent", "created_at"],
+}
+FORMATS = ("json", "ndjson", "csv")
+FETCH_SIZE = 500
+
+
+def _iter_rows(conn, table: str, since: Optional[str], until: Optional[str], since_id: Optional[int]) -> Iterator[List[tuple]]:
+    """Yield lists of rows (one per fetchmany call) in id order."""
+    where: List[str] = []
+    params: list = []
+    if since:
+        where.append("created_at >= ?")
+        params.append(since)
+    if until:
+        where.append("created_at < ?")
+        params.append(until)
+    if since_id is not None:
+        where.append("id > ?")
+        params.append(since_id)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    cur = conn.execute(f"SELECT {', '.join(EXPORT_COLUMNS[table])} FROM {table} {where_sql} ORDER BY id", params)
+    try:
+        while True:
+            rows = cur.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield [tuple(r) for r in rows]
+    finally:
+        cur.close()
+
+
+def _json_chunks(conn, tables, **filters) -> Iterator[str]:
+    yield "{"
+    for t_index, table in enumerate(tables):
+        columns = EXPORT_COLUMNS[table]
+        yield f'{", " if t_index else ""}{json.dumps(table)}: ['
+        first = True
+        for rows in _iter_rows(conn, table, **filters):
+            parts = [json.dumps(dict(zip(columns, row)), default=str) for row in rows]
+            yield ("" if first else ", ") + ", ".join(parts)
+            first = False
+        yield "]"
+    yield "}"
+
+
+def _ndjson_chunks(conn, tables, **filters) -> Iterator[str]:
+    for table in tables:
+        columns = EXPORT_COLUMNS[table]
+        for rows in _iter_rows(conn, table, **filters):
+            yield "".join(
+                json.dumps({"table": table, **dict(zip(columns, row))}, default=str) + "\n" for row in rows
+            )
+
+
+def _csv_chunks(conn, tables, **filters) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for table in tables:
+        writer.writerow(["table", *EXPORT_COLUMNS[table]])
+        for rows in _iter_rows(conn, table, **filters):
+            writer.writerows((table, *row) for row in rows)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+def stream_export(
+    db_path: str,
+    tables: List[str],
+    fmt: str = "json",
+    *,
+    gzip: bool = False,
+    activity_db_path: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    since_id: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Generate the export body as encoded (optionally gzipped) chunks."""
+    producer = {"json": _json_chunks, "ndjson": _ndjson_chunks, "csv": _csv_chunks}[fmt]
+
+    def encoded() -> Iterator[bytes]:
+        conn = _connect(db_path)
+        if activity_db_path and "activity_log" in tables:
+            attach_activity_db(conn, activity_db_path)
+        try:
+            for chunk in producer(conn, tables, since=since, until=until, since_id=since_id):
+                yield chunk.encode("utf-8")
+        finally:
+            conn.close()
+
+    return _gzip(encoded()) if gzip else encoded()
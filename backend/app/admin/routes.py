@@ -1,8 +1,20 @@
-from flask import Blueprint, request, session, current_app
+import math
+from itertools import islice
+
+from flask import Blueprint, Response, request, session, current_app
 from werkzeug.security import check_password_hash
 
-from ..db import query_all, query_one
+from ..db import (
+    ALL_KEYWORDS, ROLLUP_GRANULARITIES, decode_cursor, encode_cursor, int_arg, query_all, query_one, table_count, table_versions,
+)
 from ..activity import log_activity
+from ..changes import feed_params, is_feed_request
+from ..analyses import search_request
+from ..http_cache import conditional
+from ..rollups import bucket_range, search_series
+from ..profiling import MAX_SECONDS, MIN_INTERVAL, SAMPLER, recent_request_profiles
+from ..retention import load_index, read_archive, roll_over
+from .export import EXPORT_COLUMNS, FORMATS, stream_export
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -18,6 +30,28 @@ def _admin_required(fn):
     return wrapper
 
 
+def _logged(action, unless=None):
+    """Log an admin view, before @conditional can answer it with a 304 (the view
+    itself doesn't run then). Skipped when ``unless()`` is true."""
+    from functools import wraps
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if unless is None or not unless():
+                log_activity(action, actor_type="admin")
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _statistics():
+    return {
+        "total_users": table_count("users"),
+        "total_searches": table_count("searches"),
+        "total_activities": table_count("activity_log"),
+    }
+
+
 @admin_bp.post("/login")
 def login():
     data = request.get_json(silent=True) or {}
@@ -57,94 +91,447 @@ def me():
 
 @admin_bp.get("/users")
 @_admin_required
+@_logged("admin_view_users")
+@conditional(lambda: table_versions("users"))
 def get_users():
-    log_activity("admin_view_users", actor_type="admin")
     rows = query_all("SELECT id, username, is_admin, created_at FROM users ORDER BY id")
     return {"users": [dict(r) for r in rows]}
 
 
+FEED_ERROR = {"error": "since_id must be a row id and wait a number of seconds"}
+
+
+def _changes(table: str, sql: str, params: tuple, since_id: int, wait: float, limit: int) -> tuple[list, dict]:
+    """Rows of ``sql`` (which must end in id > ? ORDER BY id LIMIT ?) newer than ``since_id``,
+    long-polling up to ``wait`` seconds; plus next_since_id / has_more for the response."""
+    rows = current_app.extensions["changes"].poll(
+        table, lambda: query_all(sql, (*params, since_id, limit + 1)), wait
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, {"next_since_id": rows[-1]["id"] if rows else since_id, "has_more": has_more}
+
+
 @admin_bp.get("/searches")
 @_admin_required
+@_logged("admin_view_searches", unless=is_feed_request)
+@conditional(lambda: table_versions("searches"), unless=is_feed_request)
 def get_searches():
-    log_activity("admin_view_searches", actor_type="admin")
+    """The latest 500 searches, newest first. With since_id=<id> (and optionally wait=<seconds>,
+    limit, default 500), only newer searches, oldest first; feed polls are not logged."""
+    if is_feed_request():
+        try:
+            since_id, wait = feed_params(request.args)
+        except ValueError:
+            return FEED_ERROR, 400
+        try:
+            limit = int_arg(request.args, "limit", 500, hi=500)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        rows, page = _changes(
+            "searches",
+            """SELECT id, user_id, keyword, tweet_count, positive, neutral, negative, model_version, created_at
+               FROM searches WHERE id > ? ORDER BY id LIMIT ?""",
+            (),
+            since_id,
+            wait,
+            limit,
+        )
+        return {"searches": rows, **page}
     rows = query_all(
-        "SELECT id, user_id, keyword, tweet_count, positive, neutral, negative, created_at FROM searches ORDER BY created_at DESC LIMIT 500"
+        "SELECT id, user_id, keyword, tweet_count, positive, neutral, negative, model_version, created_at FROM searches ORDER BY created_at DESC LIMIT 500"
     )
     return {"searches": [dict(r) for r in rows]}
 
 
 @admin_bp.get("/statistics")
 @_admin_required
+@_logged("admin_view_statistics")
+# The activity_log version skips admin rows, so this view's own log row (and any
+# other admin view's) doesn't change the ETag; a 304 may hold back total_activities
+# by those rows until users, searches or non-admin activity move.
+@conditional(lambda: table_versions("users", "searches", "activity_log"))
 def get_statistics():
-    log_activity("admin_view_statistics", actor_type="admin")
-    users = query_one("SELECT COUNT(*) as c FROM users")
-    searches = query_one("SELECT COUNT(*) as c FROM searches")
-    activities = query_one("SELECT COUNT(*) as c FROM activity_log")
-    return {
-        "total_users": users["c"] if users else 0,
-        "total_searches": searches["c"] if searches else 0,
-        "total_activities": activities["c"] if activities else 0,
-    }
+    return _statistics()
+
+
+@admin_bp.get("/rollups/searches")
+@_admin_required
+def get_search_rollups():
+    """Analyses and mean sentiment per bucket. Query params: granularity (hour | day,
+    default day), since, until, keyword (default: all keywords)."""
+    granularity = request.args.get("granularity", "day")
+    keyword = (request.args.get("keyword") or "").strip() or None
+    try:
+        series = search_series(keyword, granularity, request.args.get("since"), request.args.get("until"))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return {"granularity": granularity, "keyword": keyword, "series": series}
+
+
+@admin_bp.get("/rollups/keywords")
+@_admin_required
+def get_keyword_rollups():
+    """Top keywords by analyses in one bucket range. Query params: granularity, since, until, limit."""
+    granularity = request.args.get("granularity", "day")
+    if granularity not in ROLLUP_GRANULARITIES:
+        return {"error": "granularity must be hour or day"}, 400
+    try:
+        limit = int_arg(request.args, "limit", 20, hi=100)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    since, until = bucket_range(granularity, request.args.get("since"), request.args.get("until"))
+    rows = query_all(
+        """SELECT keyword, SUM(analyses) AS analyses
+           FROM search_rollups
+           WHERE granularity = ? AND keyword != ? AND bucket >= ? AND bucket < ?
+           GROUP BY keyword ORDER BY analyses DESC LIMIT ?""",
+        (granularity, ALL_KEYWORDS, since, until, limit),
+    )
+    return {"granularity": granularity, "keywords": rows}
+
+
+@admin_bp.get("/rollups/activity")
+@_admin_required
+def get_activity_rollups():
+    """Actions by type and active users per bucket. Query params: granularity, since, until."""
+    granularity = request.args.get("granularity", "day")
+    if granularity not in ROLLUP_GRANULARITIES:
+        return {"error": "granularity must be hour or day"}, 400
+    since, until = bucket_range(granularity, request.args.get("since"), request.args.get("until"))
+    series: dict = {}
+    for r in query_all(
+        """SELECT bucket, action, n FROM activity_rollups
+           WHERE granularity = ? AND bucket >= ? AND bucket < ? ORDER BY bucket""",
+        (granularity, since, until),
+    ):
+        series.setdefault(r["bucket"], {"bucket": r["bucket"], "actions": {}, "active_users": 0})
+        series[r["bucket"]]["actions"][r["action"]] = r["n"]
+    for r in query_all(
+        """SELECT bucket, active_users FROM usage_rollups
+           WHERE granularity = ? AND bucket >= ? AND bucket < ?""",
+        (granularity, since, until),
+    ):
+        series.setdefault(r["bucket"], {"bucket": r["bucket"], "actions": {}, "active_users": 0})
+        series[r["bucket"]]["active_users"] = r["active_users"]
+    return {"granularity": granularity, "series": [series[b] for b in sorted(series)]}
 
 
 @admin_bp.get("/activity")
 @_admin_required
 def get_activity():
-    """Paginated activity log. Query params: limit (default 100), offset (default 0)."""
+    """Activity log, newest first, paged by (created_at, id).
+
+    Query params: limit (default 100, max 500), cursor (next_cursor from the previous
+    page), and optional filters action, actor_type, user_id, since, until
+    (created_at bounds, e.g. "2025-01-31" or "2025-01-31 12:00:00").
+
+    With since_id=<id> (and optionally wait=<seconds>) it is a change feed instead:
+    rows newer than that id matching the action/actor_type/user_id filters, oldest
+    first. Feed polls are not logged, so a polling dashboard doesn't wake itself.
+    """
+    try:
+        limit = int_arg(request.args, "limit", 100, hi=500)
+        user_id = int_arg(request.args, "user_id", None, lo=None)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    feed = is_feed_request()
+    where: list[str] = []
+    params: list = []
+    # In a feed the filters are applied to the id range scan (unary + keeps SQLite
+    # off the filter indexes, which would walk the column's whole history).
+    prefix = "+" if feed else ""
+    for column in ("action", "actor_type"):
+        value = (request.args.get(column) or "").strip()
+        if value:
+            where.append(f"{prefix}{column} = ?")
+            params.append(value)
+    if user_id is not None:
+        where.append(f"{prefix}user_id = ?")
+        params.append(user_id)
+    if feed:
+        try:
+            since_id, wait = feed_params(request.args)
+        except ValueError:
+            return FEED_ERROR, 400
+        rows, page = _changes(
+            "activity_log",
+            f"""SELECT id, action, actor_type, user_id, payload, ip_address, user_agent, created_at
+                FROM activity_log WHERE {' AND '.join([*where, 'id > ?'])} ORDER BY id LIMIT ?""",
+            tuple(params),
+            since_id,
+            wait,
+            limit,
+        )
+        return {"activities": rows, "total": table_count("activity_log"), "limit": limit, **page}
+
     log_activity("admin_view_activity_log", actor_type="admin")
-    limit = min(int(request.args.get("limit", 100)), 500)
-    offset = max(0, int(request.args.get("offset", 0)))
+    since = (request.args.get("since") or "").strip()
+    if since:
+        where.append("created_at >= ?")
+        params.append(since)
+    until = (request.args.get("until") or "").strip()
+    if until:
+        where.append("created_at < ?")
+        params.append(until)
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            before_created, before_id = decode_cursor(cursor)
+        except ValueError:
+            return {"error": "invalid cursor"}, 400
+        where.append("(created_at, id) < (?, ?)")
+        params.extend([before_created, before_id])
+
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
     rows = query_all(
-        """SELECT id, action, actor_type, user_id, payload, ip_address, user_agent, created_at
-           FROM activity_log ORDER BY created_at DESC LIMIT ? OFFSET ?""",
-        (limit, offset),
+        f"""SELECT id, action, actor_type, user_id, payload, ip_address, user_agent, created_at
+            FROM activity_log {where_sql} ORDER BY created_at DESC, id DESC LIMIT ?""",
+        (*params, limit + 1),
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "activities": rows,
+        "total": table_count("activity_log"),
+        "limit": limit,
+        "next_cursor": encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None,
+        "has_more": has_more,
+    }
+
+
+@admin_bp.get("/activity/archive")
+@_admin_required
+def get_archived_activity():
+    """Read archived activity rows. Query params: since, until (created_at bounds,
+    e.g. "2025-01-01"), action, actor_type, user_id, limit (default 1000, max 10000)."""
+    try:
+        limit = int_arg(request.args, "limit", 1000, hi=10000)
+        user_id = int_arg(request.args, "user_id", None, lo=None)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    log_activity("admin_view_activity_archive", actor_type="admin")
+    rows = read_archive(
+        current_app.config["ACTIVITY_ARCHIVE_DIR"],
+        (request.args.get("since") or "").strip() or None,
+        (request.args.get("until") or "").strip() or None,
+        action=(request.args.get("action") or "").strip() or None,
+        actor_type=(request.args.get("actor_type") or "").strip() or None,
+        user_id=user_id,
     )
-    total = query_one("SELECT COUNT(*) as c FROM activity_log")
+    activities = list(islice(rows, limit + 1))
     return {
-        "activities": [dict(r) for r in rows],
-        "total": total["c"] if total else 0,
+        "activities": activities[:limit],
+        "truncated": len(activities) > limit,
         "limit": limit,
-        "offset": offset,
     }
 
 
+@admin_bp.get("/activity/archive/index")
+@_admin_required
+def get_archive_index():
+    """List archive segments: day -> file, rows, id range."""
+    return {"segments": load_index(current_app.config["ACTIVITY_ARCHIVE_DIR"])}
+
+
+@admin_bp.post("/activity/rollover")
+@_admin_required
+def rollover_activity():
+    """Archive activity rows older than the retention window now."""
+    log_activity("admin_activity_rollover", actor_type="admin")
+    archived = roll_over(
+        current_app.config["ACTIVITY_DB_PATH"],
+        current_app.config["ACTIVITY_ARCHIVE_DIR"],
+        int(current_app.config["ACTIVITY_RETENTION_DAYS"]),
+    )
+    return {"ok": True, "archived": archived, "total": sum(archived.values())}
+
+
+@admin_bp.get("/analyses/search")
+@_admin_required
+def search_all_analyses():
+    """Full-text search over every user's analyzed texts. Same params as
+    /api/analyses/search, plus an optional user_id filter."""
+    try:
+        user_id = int_arg(request.args, "user_id", None, lo=None)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    log_activity("admin_search_analyses", actor_type="admin", payload={"q": request.args.get("q")})
+    return search_request(request.args, user_id=user_id)
+
+
+@admin_bp.get("/semantic-cache")
+@_admin_required
+def semantic_cache_stats():
+    """Hit rate, size and audit agreement of the near-duplicate result cache."""
+    active = current_app.extensions["models"].peek()
+    cache = getattr(active[1], "semantic_cache", None) if active else None
+    if cache is None:
+        return {"enabled": bool(current_app.config.get("SEMANTIC_CACHE_ENABLED")), "loaded": False}
+    return {"enabled": True, "loaded": True, **cache.stats()}
+
+
+@admin_bp.get("/quota")
+@_admin_required
+def get_upstream_quota():
+    """Remaining upstream budget, token bucket and any server-imposed block per source."""
+    return {"sources": current_app.extensions["quota"].status()}
+
+
+@admin_bp.get("/models")
+@_admin_required
+def get_models():
+    """Active model, any load in progress, re-scoring progress, token cache use and stored
+    analyses per model version."""
+    registry = current_app.extensions["models"]
+    rows = query_all("SELECT model_version, COUNT(*) AS n FROM analyses GROUP BY model_version ORDER BY n DESC")
+    active = registry.peek()
+    token_cache = getattr(active[1], "token_cache", None) if active else None
+    return {
+        **registry.status(),
+        "token_cache": token_cache.stats() if token_cache is not None else None,
+        "analyses_by_version": [dict(r) for r in rows],
+    }
+
+
+@admin_bp.post("/models")
+@_admin_required
+def load_model():
+    """Load a model in the background and swap it in when ready.
+
+    Body: {"version": "<hugging face model name>", "rescore": true|false}. With
+    rescore, stored analyses are re-scored with the new model after the swap.
+    """
+    data = request.get_json(silent=True) or {}
+    version = (data.get("version") or "").strip()
+    if not version:
+        return {"error": "version is required"}, 400
+    registry = current_app.extensions["models"]
+    if not registry.load(version, rescore=bool(data.get("rescore"))):
+        return {"error": f"already loading {registry.loading}"}, 409
+    log_activity("admin_load_model", actor_type="admin", payload={"version": version, "rescore": bool(data.get("rescore"))})
+    return registry.status(), 202
+
+
+@admin_bp.post("/models/rescore")
+@_admin_required
+def rescore_analyses():
+    """Start (default) or stop re-scoring stored analyses with the active model. Body: {"action": "start"|"stop"}."""
+    data = request.get_json(silent=True) or {}
+    rescorer = current_app.extensions["models"].rescorer
+    if data.get("action") == "stop":
+        rescorer.stop()
+    elif not rescorer.start():
+        return {"error": "re-scoring is already running", **rescorer.status()}, 409
+    log_activity("admin_rescore", actor_type="admin", payload={"action": data.get("action") or "start"})
+    return rescorer.status()
+
+
+@admin_bp.post("/profile")
+@_admin_required
+def start_profile():
+    """Start sampling every thread's stack. Query params: seconds (default 10, max 120),
+    interval_ms (default 10, at most the run length). Fetch the result with GET /profile
+    once it is ready."""
+    # type=float yields None for unparsable values; NaN and inf fail the range checks.
+    # Values above the limits are clamped.
+    seconds = request.args.get("seconds", type=float) if "seconds" in request.args else 10.0
+    interval_ms = request.args.get("interval_ms", type=float) if "interval_ms" in request.args else 10.0
+    if seconds is None or not 0 < seconds < math.inf:
+        return {"error": "seconds must be a positive number"}, 400
+    if interval_ms is None or not 0 < interval_ms < math.inf:
+        return {"error": "interval_ms must be a positive number"}, 400
+    seconds = min(seconds, MAX_SECONDS)
+    interval = min(max(interval_ms / 1000.0, MIN_INTERVAL), seconds)
+    if not SAMPLER.start(seconds, interval):
+        return {"error": "a profile is already running", **SAMPLER.status()}, 409
+    log_activity("admin_start_profile", actor_type="admin", payload={"seconds": seconds})
+    return SAMPLER.status(), 202
+
+
+@admin_bp.get("/profile")
+@_admin_required
+def get_profile():
+    """Collapsed stacks from the last sampling run (text/plain), or its status while running."""
+    if SAMPLER.result is None:
+        return SAMPLER.status(), (202 if SAMPLER.running else 404)
+    return Response(SAMPLER.result, mimetype="text/plain")
+
+
+@admin_bp.get("/profile/requests")
+@_admin_required
+def get_request_profiles():
+    """cProfile reports of recent requests sent with an X-Profile header."""
+    return {"profiles": recent_request_profiles()}
+
+
 @admin_bp.get("/verify")
 @_admin_required
 def verify_storage():
-    """Quick check that all tables exist and have consistent counts."""
-    from ..db import query_one
-    users_count = query_one("SELECT COUNT(*) as c FROM users")
-    searches_count = query_one("SELECT COUNT(*) as c FROM searches")
-    activity_count = query_one("SELECT COUNT(*) as c FROM activity_log")
+    """Quick check that all tables exist and have consistent counts.
+
+    Counts come from table_counts; pass deep=1 to also run COUNT(*) on each table
+    and report any drift between the counter and the real row count.
+    """
+    tables = ("users", "searches", "activity_log")
+    counts = {t: table_count(t) for t in tables}
     # Sample latest activity to confirm structure
     sample = query_one(
         "SELECT id, action, actor_type, user_id, created_at FROM activity_log ORDER BY id DESC LIMIT 1"
     )
-    return {
+    result = {
         "ok": True,
-        "tables": {
-            "users": users_count["c"] if users_count else 0,
-            "searches": searches_count["c"] if searches_count else 0,
-            "activity_log": activity_count["c"] if activity_count else 0,
-        },
+        "tables": counts,
         "latest_activity": dict(sample) if sample else None,
     }
+    if request.args.get("deep", "").lower() in ("1", "true", "yes"):
+        actual = {t: query_one(f"SELECT COUNT(*) as c FROM {t}")["c"] for t in tables}
+        drift = {t: counts[t] - actual[t] for t in tables if counts[t] != actual[t]}
+        result["ok"] = not drift
+        result["drift"] = drift
+    return result
 
 
 @admin_bp.get("/export")
 @_admin_required
 def export_all():
-    """Export all stored data: users, searches, activity_log."""
+    """Stream stored data: users, searches, activity_log.
+
+    Query params: format (json | ndjson | csv, default json), table (repeatable or
+    comma-separated; default all three), gzip=1, since / until (created_at bounds)
+    and since_id (only rows with a larger id, for incremental exports).
+    """
     log_activity("admin_export_data", actor_type="admin")
-    users = query_all("SELECT id, username, is_admin, created_at FROM users ORDER BY id")
-    searches = query_all(
-        "SELECT id, user_id, keyword, tweet_count, positive, neutral, negative, created_at FROM searches ORDER BY created_at DESC"
+    fmt = (request.args.get("format") or "json").lower()
+    if fmt not in FORMATS:
+        return {"error": f"format must be one of {', '.join(FORMATS)}"}, 400
+    tables = [t.strip() for v in request.args.getlist("table") for t in v.split(",") if t.strip()]
+    tables = tables or list(EXPORT_COLUMNS)
+    unknown = [t for t in tables if t not in EXPORT_COLUMNS]
+    if unknown:
+        return {"error": f"unknown table: {', '.join(unknown)}"}, 400
+    try:
+        since_id = int_arg(request.args, "since_id", None, lo=0)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    gzip = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+
+    body = stream_export(
+        current_app.config["SQLITE_PATH"],
+        tables,
+        fmt,
+        activity_db_path=current_app.config["ACTIVITY_DB_PATH"],
+        gzip=gzip,
+        since=(request.args.get("since") or "").strip() or None,
+        until=(request.args.get("until") or "").strip() or None,
+        since_id=since_id,
     )
-    activities = query_all(
-        "SELECT id, action, actor_type, user_id, payload, ip_address, user_agent, created_at FROM activity_log ORDER BY created_at DESC"
+    mimetype = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}[fmt]
+    filename = f"admin-export.{fmt}"
+    if gzip:
+        mimetype, filename = "application/gzip", filename + ".gz"
+    return Response(
+        body,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    return {
-        "users": [dict(r) for r in users],
-        "searches": [dict(r) for r in searches],
-        "activity_log": [dict(r) for r in activities],
-    }
@@ -0,0 +1,190 @@
+"""Admission control in front of model inference.
+
+At most ``ADMISSION_MAX_CONCURRENCY`` requests run the model at once; the rest
+wait in a bounded FIFO queue. A request is turned away (shed) up front, before
+it occupies a worker for nothing, when:
+
+* the user already has ``ADMISSION_PER_USER`` requests admitted or waiting
+  (``user_limit``),
+* ``ADMISSION_QUEUE_MAX`` requests are already waiting (``queue_full``),
+* the estimated queue wait plus one service time exceeds the request's
+  deadline (``deadline``).
+
+A request that was admitted to the queue but still hasn't reached the model
+when its deadline passes is shed too (``timeout``). The estimate uses an EWMA
+of observed inference time. Shed requests get 503 with ``Retry-After`` set to
+the estimated time for the queue to drain, or with ``ADMISSION_DEGRADED`` a
+lexicon-only result flagged ``approximate``.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List
+
+from flask import Flask, current_app, has_app_context
+
+from .metrics import REGISTRY, Counter, Histogram
+
+INITIAL_SERVICE_SECONDS = 0.25
+EWMA_ALPHA = 0.2
+
+ADMISSION_SHED = REGISTRY.register(Counter(
+    "app_admission_shed_total", "Inference requests turned away by admission control.", ("reason", "outcome")
+))
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "app_admission_wait_seconds", "Time admitted requests spent queued before inference."
+))
+
+
+class Shed(Exception):
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int = 1, max_queue: int = 32, per_user: int = 2) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.per_user = max(1, per_user)
+        self.service_seconds = INITIAL_SERVICE_SECONDS
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._by_user: Dict[Hashable, int] = defaultdict(int)
+
+    def _estimated_wait(self) -> float:
+        """Seconds a request arriving now would queue before starting (call under the lock)."""
+        ahead = self._running + self._waiting - self.max_concurrency + 1
+        return max(0, ahead) * self.service_seconds / self.max_concurrency
+
+    def _drain_seconds(self) -> float:
+        return (self._running + self._waiting) * self.service_seconds / self.max_concurrency
+
+    def _release_user(self, user: Hashable) -> None:
+        self._by_user[user] -= 1
+        if self._by_user[user] <= 0:
+            del self._by_user[user]
+
+    @contextmanager
+    def admit(self, user: Hashable, deadline_s: float, observe: bool = True) -> Iterator[None]:
+        """Hold an inference slot for the body of the ``with``; raises Shed instead of waiting past the deadline.
+
+        With ``observe=False`` the slot's time is left out of the service-time EWMA, for
+        background work (a whole re-scoring batch) that isn't a request's inference."""
+        arrived = time.monotonic()
+        expires = arrived + deadline_s
+        with self._cond:
+            if self._by_user.get(user, 0) >= self.per_user:
+                raise Shed("user_limit", self._drain_seconds())
+            if self._waiting >= self.max_queue and self._running >= self.max_concurrency:
+                raise Shed("queue_full", self._drain_seconds())
+            if self._estimated_wait() + self.service_seconds > deadline_s:
+                raise Shed("deadline", self._drain_seconds())
+            self._by_user[user] += 1
+            self._waiting += 1
+            while self._running >= self.max_concurrency:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    self._waiting -= 1
+                    self._release_user(user)
+                    # Pass the wakeup on so a slot freed for us isn't left idle.
+                    self._cond.notify()
+                    raise Shed("timeout", self._drain_seconds())
+                self._cond.wait(remaining)
+            self._waiting -= 1
+            self._running += 1
+        started = time.monotonic()
+        ADMISSION_WAIT_SECONDS.observe(started - arrived)
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._running -= 1
+                self._release_user(user)
+                if observe:
+                    self.service_seconds += EWMA_ALPHA * (elapsed - self.service_seconds)
+                self._cond.notify()
+
+    def idle(self) -> bool:
+        """True when no request is waiting for a slot, so background work may take one."""
+        with self._cond:
+            return self._waiting == 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "running": self._running,
+                "queued": self._waiting,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "service_seconds": round(self.service_seconds, 4),
+                "estimated_wait_seconds": round(self._estimated_wait(), 4),
+            }
+
+
+def _admission_gauges() -> List[str]:
+    if not has_app_context():
+        return []
+    controller = current_app.extensions.get("admission")
+    if controller is None:
+        return []
+    s = controller.stats()
+    return [
+        "# HELP app_admission_queued Inference requests waiting for a model slot.",
+        "# TYPE app_admission_queued gauge",
+        f"app_admission_queued {s['queued']}",
+        "# HELP app_admission_running Inference requests holding a model slot.",
+        "# TYPE app_admission_running gauge",
+        f"app_admission_running {s['running']}",
+        "# HELP app_admission_service_seconds Smoothed inference time used for wait estimates.",
+        "# TYPE app_admission_service_seconds gauge",
+        f"app_admission_service_seconds {s['service_seconds']}",
+    ]
+
+
+REGISTRY.add_collector(_admission_gauges)
+
+
+def init_admission(app: Flask) -> None:
+    if not app.config["ADMISSION_ENABLED"]:
+        return
+    app.extensions["admission"] = AdmissionController(
+        max_concurrency=app.config["ADMISSION_MAX_CONCURRENCY"],
+        max_queue=app.config["ADMISSION_QUEUE_MAX"],
+        per_user=app.config["ADMISSION_PER_USER"],
+    )
+
+
+def request_deadline(header_value) -> float:
+    """Deadline in seconds from an ``X-Deadline-Ms`` header, capped at ADMISSION_DEADLINE_MS.
+    A missing, unparsable, non-finite or non-positive header gets the cap."""
+    limit_ms = current_app.config["ADMISSION_DEADLINE_MS"]
+    try:
+        deadline_ms = float(header_value) if header_value else limit_ms
+    except ValueError:
+        deadline_ms = limit_ms
+    if not math.isfinite(deadline_ms) or deadline_ms <= 0:
+        deadline_ms = limit_ms
+    return max(min(deadline_ms, limit_ms), 1.0) / 1000.0
+
+
+@contextmanager
+def inference_slot(user: Hashable, deadline_s: float) -> Iterator[None]:
+    """``AdmissionController.admit`` for the current app, or a no-op when admission control is off."""
+    controller = current_app.extensions.get("admission")
+    if controller is None:
+        yield
+        return
+    with controller.admit(user, deadline_s):
+        yield
@@ -0,0 +1,146 @@
+"""Persist analyzed texts and search them with the analyses_fts index.
+
+Rows are written through a BatchWriter so storing and indexing the text adds
+no commit to the /api/analyze request. A full queue drops rows (and counts
+them) instead of making the request wait.
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, current_app
+
+from .batch import BatchWriter, register_shutdown
+from .db import _connect, int_arg, query_all
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = """INSERT INTO analyses
+    (search_id, user_id, topic, text, sentiment, confidence, positive, neutral, negative, created_at, model_version)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+SENTIMENTS = ("positive", "neutral", "negative")
+# OperationalError messages for a query FTS5 can't parse (fts_query quotes the input,
+# so these should not occur, but they are the caller's fault, not a 500).
+FTS_QUERY_ERRORS = ("fts5", "syntax error", "unterminated string", "malformed match")
+
+
+def init_analyses(app: Flask) -> None:
+    writer = BatchWriter(
+        app.config["SQLITE_PATH"],
+        INSERT_SQL,
+        name="analysis-writer",
+        batch_size=app.config["ANALYSIS_BATCH_SIZE"],
+        flush_ms=app.config["ANALYSIS_FLUSH_MS"],
+        max_queue=app.config["ANALYSIS_QUEUE_MAX"],
+        overflow=app.config["ANALYSIS_OVERFLOW"],
+        connect=_connect,
+    )
+    register_shutdown(writer)
+    app.extensions["analysis_writer"] = writer
+
+
+def record_analysis(
+    *,
+    user_id: int,
+    search_id: Optional[int],
+    topic: str,
+    text: str,
+    sentiment: str,
+    confidence: float,
+    probabilities: Dict[str, float],
+    model_version: Optional[str] = None,
+) -> None:
+    """Queue an analyzed text for storage and indexing. Call from request context."""
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    row = (
+        search_id, user_id, topic, text, sentiment, confidence,
+        probabilities["positive"], probabilities["neutral"], probabilities["negative"], created_at, model_version,
+    )
+    writer = current_app.extensions.get("analysis_writer")
+    if writer is None or not writer.submit(row):
+        # Counted in app_batch_writer_rows_total{outcome="dropped"}.
+        logger.debug("Analysis text not stored (writer unavailable or queue full)")
+
+
+def fts_query(q: str, match: str = "phrase") -> str:
+    """Turn user input into an FTS5 query: one quoted phrase, or all quoted terms."""
+    q = q.replace("\x00", "")  # FTS5 ends a quoted string at a NUL
+    if match == "all":
+        return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+    return '"' + q.replace('"', '""') + '"'
+
+
+def search_analyses(
+    q: str,
+    *,
+    user_id: Optional[int] = None,
+    sentiment: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    match: str = "phrase",
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """Ranked (bm25) full-text search over stored analyses, best match first."""
+    where = ["analyses_fts MATCH ?"]
+    params: list = [fts_query(q, match)]
+    if user_id is not None:
+        where.append("a.user_id = ?")
+        params.append(user_id)
+    if sentiment:
+        where.append("a.sentiment = ?")
+        params.append(sentiment)
+    if since:
+        where.append("a.created_at >= ?")
+        params.append(since)
+    if until:
+        where.append("a.created_at < ?")
+        params.append(until)
+    return query_all(
+        f"""SELECT a.id, a.search_id, a.user_id, a.topic, a.text, a.sentiment, a.confidence,
+                   a.positive, a.neutral, a.negative, a.created_at, a.model_version,
+                   snippet(analyses_fts, 0, '[', ']', '…', 12) AS snippet,
+                   bm25(analyses_fts) AS rank
+            FROM analyses_fts JOIN analyses a ON a.id = analyses_fts.rowid
+            WHERE {' AND '.join(where)}
+            ORDER BY rank LIMIT ?""",
+        (*params, limit),
+    )
+
+
+def search_request(args, *, user_id: Optional[int] = None):
+    """Shared query-string handling for the user and admin search endpoints."""
+    q = (args.get("q") or "").strip()
+    if not q:
+        return {"error": "q is required"}, 400
+    sentiment = (args.get("sentiment") or "").strip().lower() or None
+    if sentiment and sentiment not in SENTIMENTS:
+        return {"error": f"sentiment must be one of {', '.join(SENTIMENTS)}"}, 400
+    match = args.get("match", "phrase")
+    if match not in ("phrase", "all"):
+        return {"error": "match must be phrase or all"}, 400
+    try:
+        limit = int_arg(args, "limit", 20, hi=100)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        results = search_analyses(
+            q,
+            user_id=user_id,
+            sentiment=sentiment,
+            since=(args.get("since") or "").strip() or None,
+            until=(args.get("until") or "").strip() or None,
+            match=match,
+            limit=limit,
+        )
+    except sqlite3.OperationalError as e:
+        message = str(e).lower()
+        if "no such table" in message:
+            return {"error": "full-text search is not available on this database"}, 503
+        if any(m in message for m in FTS_QUERY_ERRORS):
+            return {"error": "invalid search query"}, 400
+        raise
+    return {"query": q, "results": results}
@@ -0,0 +1,65 @@
+"""Event-loop versions of I/O-bound API views, served by app.asgi.
+
+Each drives the same step generator as its Flask view in routes.py (e.g.
+``fetch_news_flow``); only the upstream calls differ: they are awaited on the shared httpx client,
+so a slow NewsAPI or Twitter response holds a coroutine instead of a worker
+thread. The Flask request context is pushed for the view as usual, so session,
+config, quota and activity logging work unchanged; the synchronous steps
+between upstream calls run in a worker thread, off the loop.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+import httpx
+from flask import current_app
+
+from ..auth.utils import login_required
+from ..metrics import timed
+from ..news.async_client import AsyncNewsAPIClient
+from ..quota import get_quota
+from ..twitter.async_client import AsyncTwitterClient
+from .routes import UpstreamCall, _fetch_failed, fetch_news_flow
+
+
+async def _call_upstream(http: httpx.AsyncClient, call: UpstreamCall):
+    config = current_app.config
+    if call.source == "newsapi":
+        client = AsyncNewsAPIClient(config["NEWS_API_KEY"], http, config.get("NEWS_API_BASE_URL", ""), quota=get_quota())
+        return await client.search_articles(call.query, max_results=call.max_results, priority=call.priority)
+    client = AsyncTwitterClient(
+        config["TWITTER_BEARER_TOKEN"], http, config.get("TWITTER_API_BASE_URL", ""), quota=get_quota()
+    )
+    return await client.recent_search(query=call.query, max_results=call.max_results, priority=call.priority)
+
+
+def _advance(flow, value=None, error: Optional[Exception] = None):
+    """Run ``flow`` up to its next upstream call: ``(call, None)``, or ``(None, response)``
+    once it returns. Called in a worker thread (a StopIteration can't cross back
+    to the loop through the future)."""
+    try:
+        call = flow.throw(error) if error is not None else flow.send(value)
+    except StopIteration as done:
+        return None, done.value
+    return call, None
+
+
+@login_required
+async def fetch_news_async(http: httpx.AsyncClient):
+    """POST /api/fetch-news on the event loop; see routes.fetch_news. The flow's own
+    steps (parsing, pre-tokenizing, activity logging) run in a worker thread."""
+    try:
+        flow = fetch_news_flow()
+        call, response = await asyncio.to_thread(_advance, flow)
+        while call is not None:
+            try:
+                with timed("upstream"):
+                    result = await _call_upstream(http, call)
+            except Exception as e:
+                call, response = await asyncio.to_thread(_advance, flow, error=e)
+            else:
+                call, response = await asyncio.to_thread(_advance, flow, result)
+        return response
+    except Exception as e:
+        return _fetch_failed(e)
@@ -1,174 +1,284 @@
 from __future__ import annotations
 
+import math
+from typing import Any, Generator, NamedTuple
+
 from flask import Blueprint, current_app, request, session
 
 from ..auth.utils import login_required
-from ..db import execute, query_all
+from ..db import decode_cursor, encode_cursor, execute, int_arg, query_all, query_one, table_versions
 from ..activity import log_activity
+from ..changes import feed_params, is_feed_request, notify_change
+from ..admission import ADMISSION_SHED, Shed, inference_slot, request_deadline
+from ..http_cache import conditional
+from ..metrics import UPSTREAM_ERRORS, timed
+from ..analyses import record_analysis, search_request
+from ..rollups import search_series
+from ..quota import QuotaExceeded, get_quota
+from ..trending import is_trending_keyword, record_keyword
 from ..twitter.client import TwitterClient
 from ..twitter.mock_client import MockTwitterClient
 from ..news.client import NewsAPIClient
+from ..ml.lexicon import lexicon_analysis
 
 api_bp = Blueprint("api", __name__)
 
-_model = None
-
-# Trending topics/news list (can be extended to fetch from news API)
-TRENDING_TOPICS = [
-    {"id": 1, "title": "India Budget 2025", "category": "Politics"},
-    {"id": 2, "title": "Artificial Intelligence", "category": "Technology"},
-    {"id": 3, "title": "Climate Change", "category": "Environment"},
-    {"id": 4, "title": "Global Economy", "category": "Business"},
-    {"id": 5, "title": "Space Exploration", "category": "Science"},
-    {"id": 6, "title": "Electric Vehicles", "category": "Technology"},
-    {"id": 7, "title": "Healthcare Innovation", "category": "Health"},
-    {"id": 8, "title": "Cryptocurrency", "category": "Finance"},
-    {"id": 9, "title": "Renewable Energy", "category": "Environment"},
-    {"id": 10, "title": "Education Technology", "category": "Education"},
-    {"id": 11, "title": "Social Media", "category": "Technology"},
-    {"id": 12, "title": "Sports News", "category": "Sports"},
-]
+def _current_model():
+    """The active (model_version, model) pair; loads the default model on first use."""
+    try:
+        return current_app.extensions["models"].current()
+    except ImportError as e:
+        raise RuntimeError(
+            "ML dependencies (transformers, torch) not installed. "
+            "Install with: pip install transformers torch"
+        ) from e
+    except Exception as e:
+        raise RuntimeError(
+            f"Failed to load ML model: {str(e)}. "
+            "This might be due to network issues downloading the model or insufficient disk space."
+        ) from e
 
 
 def _get_model():
-    global _model
-    if _model is None:
-        try:
-            from ..ml.sentiment import TwitterRobertaSentiment
-            print("Loading RoBERTa model (first time - this may take 30-60 seconds)...")
-            _model = TwitterRobertaSentiment()
-            print("Model loaded successfully!")
-        except ImportError as e:
-            raise RuntimeError(
-                "ML dependencies (transformers, torch) not installed. "
-                "Install with: pip install transformers torch"
-            ) from e
-        except Exception as e:
-            raise RuntimeError(
-                f"Failed to load ML model: {str(e)}. "
-                "This might be due to network issues downloading the model or insufficient disk space."
-            ) from e
-    return _model
+    return _current_model()[1]
+
+
+def _pretokenize(news_items) -> None:
+    """Queue fetched texts for tokenization so a later /analyze of one skips it.
+    Only when a model is already loaded; fetching never triggers a model load."""
+    active = current_app.extensions["models"].peek()
+    pretokenize = getattr(active[1], "pretokenize", None) if active else None
+    if pretokenize is not None:
+        pretokenize([item["text"] for item in news_items])
 
 
 @api_bp.get("/trending")
 @login_required
+@conditional(lambda: (current_app.extensions["trending"].validator(), current_app.config["TRENDING_TOP_K"]))
 def get_trending():
-    """Get list of trending topics/news"""
-    return {"topics": TRENDING_TOPICS}
+    """Get trending topics, ranked by recent fetch/analyze traffic."""
+    tracker = current_app.extensions["trending"]
+    return {"topics": tracker.topics(int(current_app.config["TRENDING_TOP_K"]))}
 
 
-@api_bp.post("/fetch-news")
+@api_bp.get("/topics/<path:keyword>/series")
 @login_required
-def fetch_news():
-    """Fetch news articles/tweets for a given topic"""
+def get_topic_series(keyword: str):
+    """Sentiment over time for one topic, read from the search_rollups table.
+
+    Query params: granularity (hour | day, default day), since, until.
+    Each bucket has the analysis count, mean per label and a 95% confidence band.
+    """
+    keyword = keyword.strip()
+    if not keyword:
+        return {"error": "keyword is required"}, 400
+    granularity = request.args.get("granularity", "day")
     try:
-        data = request.get_json(silent=True) or {}
-        keyword = (data.get("keyword") or "").strip()
-        if not keyword:
-            return {"error": "keyword is required"}, 400
+        series = search_series(keyword, granularity, request.args.get("since"), request.args.get("until"))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return {"topic": keyword, "granularity": granularity, "series": series}
 
-        max_results = int(current_app.config["TWEET_MAX_RESULTS"])
-        data_source = current_app.config.get("DATA_SOURCE", "newsapi")
-        
-        # Try NewsAPI first (free), then Twitter, then demo mode
-        if data_source == "newsapi" or (data_source != "twitter" and data_source != "demo"):
-            news_api_key = current_app.config.get("NEWS_API_KEY", "")
-            if news_api_key and news_api_key != "your-news-api-key":
-                try:
-                    news_client = NewsAPIClient(news_api_key)
-                    articles = news_client.search_articles(keyword, max_results=max_results)
-                    
-                    if articles:
-                        news_items = [
-                            {
-                                "id": article["id"],
-                                "text": article["text"],
-                                "title": article.get("title", ""),
-                                "source": article.get("source", ""),
-                                "topic": keyword
-                            }
-                            for article in articles
-                        ]
-                        log_activity("fetch_news", user_id=int(session["user_id"]), payload={"keyword": keyword, "count": len(news_items), "source": "NewsAPI"})
-                        return {
-                            "topic": keyword,
-                            "news_items": news_items,
-                            "count": len(news_items),
-                            "source": "NewsAPI"
-                        }
-                except Exception as e:
-                    # If NewsAPI fails, fall back to other options
-                    print(f"NewsAPI failed: {e}, trying fallback...")
-        
-        # Fallback to Twitter API (if available)
-        if data_source == "twitter":
-            demo_mode = current_app.config.get("DEMO_MODE", False)
-            
-            if demo_mode:
-                client = MockTwitterClient()
-                query = keyword
-            else:
-                bearer_token = current_app.config["TWITTER_BEARER_TOKEN"]
-                
-                if not bearer_token or bearer_token == "your-twitter-api-v2-bearer-token":
-                    return {
-                        "error": "No data source configured. Set NEWS_API_KEY in .env for free real-time news, or TWITTER_BEARER_TOKEN for Twitter (requires paid plan)."
-                    }, 500
-
-                client = TwitterClient(bearer_token)
-                query = f'({keyword}) lang:en -is:retweet'
-            
-            try:
-                texts = client.recent_search(query=query, max_results=max_results)
-            except RuntimeError as e:
-                error_msg = str(e)
-                if "402" in error_msg or "Payment Required" in error_msg:
-                    return {
-                        "error": "Twitter API requires paid subscription. Set NEWS_API_KEY in .env for free real-time news from NewsAPI.",
-                        "suggestion": "Get free API key at https://newsapi.org/register"
-                    }, 402
-                raise
 
-            if not texts:
-                log_activity("fetch_news", user_id=int(session["user_id"]), payload={"keyword": keyword, "count": 0, "source": "Twitter"})
-                return {
-                    "news_items": [],
-                    "message": "No news/tweets found for this topic. Try a different keyword."
-                }
-
-            news_items = [
-                {"id": i + 1, "text": text, "topic": keyword}
-                for i, text in enumerate(texts)
-            ]
-            log_activity("fetch_news", user_id=int(session["user_id"]), payload={"keyword": keyword, "count": len(news_items), "source": "Twitter"})
-            return {
-                "topic": keyword,
-                "news_items": news_items,
-                "count": len(news_items),
-                "source": "Twitter"
-            }
-        
-        # Final fallback: Demo mode
-        client = MockTwitterClient()
-        texts = client.recent_search(keyword, max_results=max_results)
-        news_items = [
-            {"id": i + 1, "text": text, "topic": keyword}
-            for i, text in enumerate(texts)
-        ]
-        log_activity("fetch_news", user_id=int(session["user_id"]), payload={"keyword": keyword, "count": len(news_items), "source": "Demo"})
+def _fetch_request():
+    """(keyword, priority) from a fetch-news body, or an error response."""
+    data = request.get_json(silent=True) or {}
+    keyword = (data.get("keyword") or "").strip()
+    if not keyword:
+        return None, ({"error": "keyword is required"}, 400)
+    # Keywords already trending get the budget held back for trending refreshes.
+    priority = "trending" if is_trending_keyword(keyword) else "user"
+    record_keyword(keyword)
+    return (keyword, priority), None
+
+
+def _use_newsapi() -> bool:
+    data_source = current_app.config.get("DATA_SOURCE", "newsapi")
+    news_api_key = current_app.config.get("NEWS_API_KEY", "")
+    return (data_source not in ("twitter", "demo")) and bool(news_api_key) and news_api_key != "your-news-api-key"
+
+
+def _twitter_query(keyword: str):
+    """(query, use_mock) for the Twitter fallback, or an error response when no token is set."""
+    if current_app.config.get("DEMO_MODE", False):
+        return (keyword, True), None
+    bearer_token = current_app.config["TWITTER_BEARER_TOKEN"]
+    if not bearer_token or bearer_token == "your-twitter-api-v2-bearer-token":
+        return None, ({
+            "error": "No data source configured. Set NEWS_API_KEY in .env for free real-time news, or TWITTER_BEARER_TOKEN for Twitter (requires paid plan)."
+        }, 500)
+    return (f'({keyword}) lang:en -is:retweet', False), None
+
+
+def _twitter_error(e: Exception):
+    """Response for a failed Twitter call, or None to let the error propagate."""
+    if isinstance(e, QuotaExceeded):
+        return (
+            {"error": f"Twitter API budget exhausted, try again in {math.ceil(e.retry_after)}s.", "reason": e.reason},
+            429,
+            {"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    UPSTREAM_ERRORS.inc(source="twitter")
+    error_msg = str(e)
+    if "402" in error_msg or "Payment Required" in error_msg:
         return {
-            "topic": keyword,
-            "news_items": news_items,
-            "count": len(news_items),
-            "source": "Demo"
+            "error": "Twitter API requires paid subscription. Set NEWS_API_KEY in .env for free real-time news from NewsAPI.",
+            "suggestion": "Get free API key at https://newsapi.org/register"
+        }, 402
+    return None
+
+
+def _article_items(articles, keyword: str):
+    return [
+        {
+            "id": article["id"],
+            "text": article["text"],
+            "title": article.get("title", ""),
+            "source": article.get("source", ""),
+            "topic": keyword
         }
+        for article in articles
+    ]
+
+
+def _text_items(texts, keyword: str):
+    return [
+        {"id": i + 1, "text": text, "topic": keyword}
+        for i, text in enumerate(texts)
+    ]
+
+
+def _nothing_found(keyword: str) -> dict:
+    log_activity("fetch_news", user_id=int(session["user_id"]), payload={"keyword": keyword, "count": 0, "source": "Twitter"})
+    return {
+        "news_items": [],
+        "message": "No news/tweets found for this topic. Try a different keyword."
+    }
+
+
+def _fetched(keyword: str, news_items, source: str) -> dict:
+    _pretokenize(news_items)
+    log_activity("fetch_news", user_id=int(session["user_id"]), payload={"keyword": keyword, "count": len(news_items), "source": source})
+    return {
+        "topic": keyword,
+        "news_items": news_items,
+        "count": len(news_items),
+        "source": source
+    }
+
+
+def _fetch_failed(e: Exception):
+    current_app.logger.exception("Fetching news failed")
+    return {"error": f"Failed to fetch news: {str(e)}"}, 500
+
+
+class UpstreamCall(NamedTuple):
+    source: str  # "newsapi" | "twitter"
+    query: str
+    max_results: int
+    priority: str
+
+
+def fetch_news_flow() -> Generator[UpstreamCall, Any, Any]:
+    """The fetch-news steps, shared by the WSGI view and the ASGI one (app.api.async_routes).
+
+    A generator: it yields an ``UpstreamCall`` for each NewsAPI/Twitter request
+    and is sent the result (or thrown the exception) by the caller, which is
+    the only part that differs: a blocking call here, an await on the event
+    loop there. Its return value is the response.
+    """
+    fetch, error = _fetch_request()
+    if error:
+        return error
+    keyword, priority = fetch
+    max_results = int(current_app.config["TWEET_MAX_RESULTS"])
+
+    # Try NewsAPI first (free), then Twitter, then demo mode
+    if _use_newsapi():
+        try:
+            articles = yield UpstreamCall("newsapi", keyword, max_results, priority)
+            if articles:
+                return _fetched(keyword, _article_items(articles, keyword), "NewsAPI")
+        except QuotaExceeded as e:
+            # Budget spent or rate limited: don't send a call that would fail.
+            current_app.logger.info("NewsAPI skipped: %s, trying fallback", e)
+        except Exception as e:
+            # If NewsAPI fails, fall back to other options
+            UPSTREAM_ERRORS.inc(source="newsapi")
+            current_app.logger.warning("NewsAPI failed: %s, trying fallback", e)
+
+    # Fallback to Twitter API (if available)
+    if current_app.config.get("DATA_SOURCE", "newsapi") == "twitter":
+        target, error = _twitter_query(keyword)
+        if error:
+            return error
+        query, use_mock = target
+        try:
+            if use_mock:
+                texts = MockTwitterClient().recent_search(query=query, max_results=max_results)
+            else:
+                texts = yield UpstreamCall("twitter", query, max_results, priority)
+        except RuntimeError as e:
+            response = _twitter_error(e)
+            if response is None:
+                raise
+            return response
+        if not texts:
+            return _nothing_found(keyword)
+        return _fetched(keyword, _text_items(texts, keyword), "Twitter")
+
+    # Final fallback: Demo mode
+    texts = MockTwitterClient().recent_search(keyword, max_results=max_results)
+    return _fetched(keyword, _text_items(texts, keyword), "Demo")
+
+
+def _call_upstream(call: UpstreamCall):
+    config = current_app.config
+    if call.source == "newsapi":
+        client = NewsAPIClient(config["NEWS_API_KEY"], config.get("NEWS_API_BASE_URL", ""), quota=get_quota())
+        return client.search_articles(call.query, max_results=call.max_results, priority=call.priority)
+    client = TwitterClient(config["TWITTER_BEARER_TOKEN"], config.get("TWITTER_API_BASE_URL", ""), quota=get_quota())
+    return client.recent_search(query=call.query, max_results=call.max_results, priority=call.priority)
+
 
+@api_bp.post("/fetch-news")
+@login_required
+def fetch_news():
+    """Fetch news articles/tweets for a given topic.
+
+    The ASGI entry point (app.asgi) serves this path with fetch_news_async, which
+    runs the same fetch_news_flow with the upstream waits on the event loop."""
+    try:
+        flow = fetch_news_flow()
+        call = next(flow)
+        while True:
+            try:
+                with timed("upstream"):
+                    result = _call_upstream(call)
+            except Exception as e:
+                call = flow.throw(e)
+            else:
+                call = flow.send(result)
+    except StopIteration as done:
+        return done.value
     except Exception as e:
-        import traceback
-        error_msg = str(e)
-        traceback.print_exc()
-        return {"error": f"Failed to fetch news: {error_msg}"}, 500
+        return _fetch_failed(e)
+
+
+def _analysis_response(news_text: str, topic: str, analysis: dict, model_version: str) -> dict:
+    return {
+        "news_text": news_text[:100] + "..." if len(news_text) > 100 else news_text,
+        "full_text": news_text,
+        "topic": topic,
+        "sentiment": analysis["probabilities"],
+        "classification": analysis["sentiment"],
+        "confidence": analysis["confidence"],
+        "explanation": analysis["explanation"],
+        "key_words": analysis["key_words"],
+        "cache": analysis.get("cache", {"reused": False}),
+        "approximate": analysis.get("approximate", False),
+        "model_version": model_version,
+    }
 
 
 @api_bp.post("/analyze")
@@ -182,20 +292,46 @@ def analyze():
         
         if not news_text:
             return {"error": "news_text is required"}, 400
+        if topic:
+            record_keyword(topic)
 
         # Analyze single news item with explanation
-        model = _get_model()
-        analysis = model.analyze_with_explanation(news_text)
+        model_version, model = _current_model()
+        user_id = int(session["user_id"])
+        try:
+            with inference_slot(user_id, request_deadline(request.headers.get("X-Deadline-Ms"))):
+                analysis = model.analyze_with_explanation(news_text)
+        except Shed as shed:
+            if not current_app.config["ADMISSION_DEGRADED"]:
+                ADMISSION_SHED.inc(reason=shed.reason, outcome="rejected")
+                return (
+                    {"error": "The sentiment model is busy, please retry shortly.", "reason": shed.reason},
+                    503,
+                    {"Retry-After": shed.retry_after_header},
+                )
+            # Lexicon-only answer; not stored in history so rollups only see model scores.
+            ADMISSION_SHED.inc(reason=shed.reason, outcome="degraded")
+            return _analysis_response(news_text, topic, lexicon_analysis(news_text), "lexicon")
 
         # Store history (optional but implemented)
-        user_id = int(session["user_id"])
-        execute(
+        search_id = execute(
             """
-            INSERT INTO searches (user_id, keyword, tweet_count, positive, neutral, negative)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO searches (user_id, keyword, tweet_count, positive, neutral, negative, model_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
             (user_id, topic or "Custom", 1, analysis["probabilities"]["positive"], 
-             analysis["probabilities"]["neutral"], analysis["probabilities"]["negative"]),
+             analysis["probabilities"]["neutral"], analysis["probabilities"]["negative"], model_version),
+        )
+        notify_change("searches")
+        record_analysis(
+            user_id=user_id,
+            search_id=search_id,
+            topic=topic or "Custom",
+            text=news_text,
+            sentiment=analysis["sentiment"],
+            confidence=analysis["confidence"],
+            probabilities=analysis["probabilities"],
+            model_version=model_version,
         )
         log_activity("analyze", user_id=user_id, payload={
             "topic": topic or "Custom",
@@ -206,16 +342,7 @@ def analyze():
             "negative": analysis["probabilities"]["negative"],
         })
 
-        return {
-            "news_text": news_text[:100] + "..." if len(news_text) > 100 else news_text,
-            "full_text": news_text,
-            "topic": topic,
-            "sentiment": analysis["probabilities"],
-            "classification": analysis["sentiment"],
-            "confidence": analysis["confidence"],
-            "explanation": analysis["explanation"],
-            "key_words": analysis["key_words"]
-        }
+        return _analysis_response(news_text, topic, analysis, model_version)
     except Exception as e:
         import traceback
         error_msg = str(e)
@@ -223,53 +350,137 @@ def analyze():
         return {"error": f"Analysis failed: {error_msg}"}, 500
 
 
-@api_bp.get("/history")
+@api_bp.get("/analyses/search")
 @login_required
-def get_history():
-    """Get search history for the logged-in user"""
+def search_my_analyses():
+    """Full-text search over the logged-in user's analyzed texts, best match first.
+
+    Query params: q (required), match (phrase | all, default phrase),
+    sentiment (positive | neutral | negative), since, until, limit (default 20, max 100).
+    """
+    return search_request(request.args, user_id=int(session["user_id"]))
+
+
+def _history_statistics(user_id: int) -> dict:
+    stats = query_one(
+        """
+        SELECT total_searches, total_tweets, sum_positive, sum_neutral, sum_negative
+        FROM user_search_stats WHERE user_id = ?
+        """,
+        (user_id,),
+    )
+    total_searches = stats["total_searches"] if stats else 0
+    total_tweets = stats["total_tweets"] if stats else 0
+
+    # Calculate average sentiment
+    if total_searches > 0:
+        avg_positive = stats["sum_positive"] / total_searches
+        avg_neutral = stats["sum_neutral"] / total_searches
+        avg_negative = stats["sum_negative"] / total_searches
+    else:
+        avg_positive = avg_neutral = avg_negative = 0.0
+
+    return {
+        "total_searches": total_searches,
+        "total_tweets_analyzed": total_tweets,
+        "average_sentiment": {
+            "positive": round(avg_positive, 2),
+            "neutral": round(avg_neutral, 2),
+            "negative": round(avg_negative, 2)
+        }
+    }
+
+
+def _history_changes(user_id: int, limit: int):
+    """The user's searches with id > since_id, oldest first (see app.changes)."""
     try:
-        from ..db import query_all
-        
-        user_id = int(session["user_id"])
-        
-        # Get all searches for this user, ordered by most recent first
-        searches = query_all(
+        since_id, wait = feed_params(request.args)
+    except ValueError:
+        return {"error": "since_id must be a row id and wait a number of seconds"}, 400
+    searches = current_app.extensions["changes"].poll(
+        "searches",
+        lambda: query_all(
             """
-            SELECT id, keyword, tweet_count, positive, neutral, negative, created_at
+            SELECT id, keyword, tweet_count, positive, neutral, negative, model_version, created_at
             FROM searches
-            WHERE user_id = ?
-            ORDER BY created_at DESC
+            WHERE user_id = ? AND id > ?
+            ORDER BY id
+            LIMIT ?
             """,
-            (user_id,)
-        )
-        
-        # Calculate statistics
-        total_searches = len(searches)
-        total_tweets = sum(s["tweet_count"] for s in searches)
-        
-        # Calculate average sentiment
-        if total_searches > 0:
-            avg_positive = sum(s["positive"] for s in searches) / total_searches
-            avg_neutral = sum(s["neutral"] for s in searches) / total_searches
-            avg_negative = sum(s["negative"] for s in searches) / total_searches
+            (user_id, since_id, limit + 1),
+        ),
+        wait,
+    )
+    has_more = len(searches) > limit
+    searches = searches[:limit]
+    return {
+        "searches": searches,
+        "next_since_id": searches[-1]["id"] if searches else since_id,
+        "has_more": has_more,
+        "statistics": _history_statistics(user_id),
+    }
+
+
+@api_bp.get("/history")
+@login_required
+@conditional(lambda: (session["user_id"], table_versions("searches")), unless=is_feed_request)
+def get_history():
+    """Get search history for the logged-in user.
+
+    Query params: limit (default 50, max 200), cursor (next_cursor from the previous page).
+    Rows are ordered newest first and paged by (created_at, id); statistics come
+    from user_search_stats, so neither part scans the user's full history.
+    With since_id (and optionally wait), returns only newer rows, oldest first.
+    """
+    try:
+        limit = int_arg(request.args, "limit", 50, hi=200)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        user_id = int(session["user_id"])
+        if is_feed_request():
+            return _history_changes(user_id, limit)
+        cursor = request.args.get("cursor")
+
+        if cursor:
+            try:
+                before_created, before_id = decode_cursor(cursor)
+            except ValueError:
+                return {"error": "invalid cursor"}, 400
+            searches = query_all(
+                """
+                SELECT id, keyword, tweet_count, positive, neutral, negative, model_version, created_at
+                FROM searches
+                WHERE user_id = ? AND (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+                """,
+                (user_id, before_created, before_id, limit + 1),
+            )
         else:
-            avg_positive = avg_neutral = avg_negative = 0.0
-        
+            searches = query_all(
+                """
+                SELECT id, keyword, tweet_count, positive, neutral, negative, model_version, created_at
+                FROM searches
+                WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+                """,
+                (user_id, limit + 1),
+            )
+
+        has_more = len(searches) > limit
+        searches = searches[:limit]
+        next_cursor = encode_cursor(searches[-1]["created_at"], searches[-1]["id"]) if has_more else None
+
         return {
             "searches": searches,
-            "statistics": {
-                "total_searches": total_searches,
-                "total_tweets_analyzed": total_tweets,
-                "average_sentiment": {
-                    "positive": round(avg_positive, 2),
-                    "neutral": round(avg_neutral, 2),
-                    "negative": round(avg_negative, 2)
-                }
-            }
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "statistics": _history_statistics(user_id),
         }
     except Exception as e:
         import traceback
         error_msg = str(e)
         traceback.print_exc()
         return {"error": f"Failed to fetch history: {error_msg}"}, 500
-
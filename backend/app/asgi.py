@@ -0,0 +1,140 @@
+"""ASGI entry point: I/O-bound routes on the event loop, the rest of Flask in a thread pool.
+
+Under the WSGI server every in-flight request holds a worker thread, and
+/api/fetch-news can wait up to 20 s on NewsAPI or Twitter. Here the paths in
+``ASYNC_ROUTES`` are served by coroutines (app.api.async_routes) that await
+the upstream on one shared ``httpx.AsyncClient``, so thousands of concurrent
+upstream waits cost coroutines and pooled connections, not threads. Every
+other request, including /api/analyze and its CPU-bound inference, goes to the
+unchanged Flask app on a2wsgi's own thread pool (``ASGI_WSGI_THREADS``), so it
+never runs on, or blocks, the event loop.
+
+    uvicorn --factory app.asgi:create_asgi_app --port 5000
+    gunicorn -k uvicorn.workers.UvicornWorker -b 0.0.0.0:$PORT "app.asgi:create_asgi_app()"
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import io
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask import Flask
+
+from . import create_app
+from .api.async_routes import fetch_news_async
+
+ASYNC_ROUTES: Dict[Tuple[str, str], Callable[[httpx.AsyncClient], Any]] = {
+    ("POST", "/api/fetch-news"): fetch_news_async,
+}
+
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+
+class AsgiApp:
+    def __init__(self, flask_app: Flask) -> None:
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config["ASGI_WSGI_THREADS"])
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        """The shared upstream client; opened at lifespan startup, or on first use without lifespan."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.flask_app.config["ASYNC_UPSTREAM_MAX_CONNECTIONS"]),
+            )
+        return self._http
+
+    async def __call__(self, scope: dict, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http":
+            root, path = scope.get("root_path", ""), scope["path"]
+            if root and path.startswith(root):
+                path = path[len(root):]
+            view = ASYNC_ROUTES.get((scope["method"], path))
+            if view is not None:
+                await self._dispatch(view, scope, receive, send)
+                return
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._client()  # open the pool on the server's loop
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._http is not None:
+                    await self._http.aclose()
+                    self._http = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _dispatch(self, view, scope: dict, receive: Receive, send: Send) -> None:
+        """Run ``view`` the way Flask's wsgi_app would: request context, before/after
+        request hooks, error handlers and teardown all apply.
+
+        Everything synchronous (session load, the hooks, error handlers, teardown)
+        runs on the default executor, since it can touch SQLite; only ``view``'s
+        own awaits run on the loop. The request context lives in a
+        ``contextvars.Context`` of its own that each step enters in turn."""
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        app = self.flask_app
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        ctx = app.request_context(build_environ(scope, io.BytesIO(bytes(body))))
+
+        def blocking(fn, *args):
+            return loop.run_in_executor(None, context.run, fn, *args)
+
+        await blocking(ctx.push)
+        try:
+            try:
+                try:
+                    rv = await blocking(app.preprocess_request)
+                    if rv is None:
+                        rv = await asyncio.create_task(self._view(view), context=context)
+                except Exception as e:
+                    rv = await blocking(_handling, app.handle_user_exception, e)
+                response = await blocking(app.finalize_request, rv)
+            except Exception as e:
+                response = await blocking(_handling, app.handle_exception, e)
+            payload = response.get_data()
+            headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in response.headers.to_wsgi_list()]
+            status = response.status_code
+            response.close()
+        finally:
+            await blocking(ctx.pop)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _view(self, view):
+        rv = view(self._client())
+        if inspect.isawaitable(rv):
+            rv = await rv
+        return rv
+
+
+def _handling(handler, e: Exception):
+    """``handler(e)`` with ``e`` as the exception being handled, as in Flask's own
+    except blocks (handle_user_exception re-raises with a bare ``raise``)."""
+    try:
+        raise e
+    except Exception:
+        return handler(e)
+
+
+def create_asgi_app() -> AsgiApp:
+    return AsgiApp(create_app())
@@ -0,0 +1,247 @@
+"""Background group-commit writer for append-only tables.
+
+Rows are queued in memory and a single writer thread flushes them with
+``executemany`` inside one transaction, so request handlers never wait on
+an fsync for audit-style inserts.
+"""
+from __future__ import annotations
+
+import atexit
+import collections
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Deque, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+
+class BatchWriter:
+    """Buffer rows for one INSERT statement and flush them in batches.
+
+    A flush happens when ``batch_size`` rows are pending or ``flush_ms`` has
+    elapsed since the oldest pending row, whichever comes first. When the queue
+    holds ``max_queue`` rows the ``overflow`` policy decides what happens:
+    ``drop_newest`` discards the new row, ``drop_oldest`` evicts the oldest
+    pending row, and ``block`` waits up to ``block_timeout`` seconds for room
+    before discarding.
+
+    A flush that fails because the database is busy or locked (another process
+    holding a write transaction, e.g. the retention job) is retried up to
+    ``retries`` times, backing off from ``retry_backoff`` seconds and doubling.
+    Rows are only dropped (counted in ``failed`` and logged as errors) once the
+    retries are spent or on errors that retrying can't fix.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        sql: str,
+        *,
+        name: str = "batch-writer",
+        batch_size: int = 100,
+        flush_ms: int = 250,
+        max_queue: int = 10000,
+        overflow: str = "drop_oldest",
+        block_timeout: float = 0.05,
+        retries: int = 5,
+        retry_backoff: float = 0.1,
+        connect: Optional[Callable[[str], sqlite3.Connection]] = None,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        self.db_path = db_path
+        self.sql = sql
+        self.name = name
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(1, int(flush_ms)) / 1000.0
+        self.max_queue = max(1, int(max_queue))
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.retries = max(0, int(retries))
+        self.retry_backoff = retry_backoff
+        self._connect = connect or (lambda path: sqlite3.connect(path, check_same_thread=False))
+
+        self._queue: Deque[Sequence[Any]] = collections.deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._inflight = 0
+        self._flush_requested = False
+        self._listeners: List[Callable[[int], None]] = []
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+        self.flushes = 0
+
+    # -- producer side -------------------------------------------------
+
+    def submit(self, row: Sequence[Any]) -> bool:
+        """Queue a row for writing. Returns False if the row was dropped."""
+        with self._cond:
+            if self._closed:
+                self.dropped += 1
+                return False
+            self._ensure_started()
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.overflow == "block":
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.max_queue and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if len(self._queue) >= self.max_queue or self._closed:
+                        self.dropped += 1
+                        return False
+                else:
+                    self.dropped += 1
+                    return False
+            self._queue.append(row)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def add_listener(self, fn: Callable[[int], None]) -> None:
+        """Call ``fn(rows_written)`` on the writer thread after each successful commit."""
+        self._listeners.append(fn)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue) + self._inflight
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retried": self.retried,
+            "flushes": self.flushes,
+        }
+
+    # -- writer side ---------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        # Started lazily (under the lock) so a pre-fork master never owns the thread.
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _take_batch(self) -> List[Sequence[Any]]:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while not self._closed and len(self._queue) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if self._queue and (remaining <= 0 or self._flush_requested):
+                    break
+                if remaining <= 0:
+                    deadline = time.monotonic() + self.flush_interval
+                    remaining = self.flush_interval
+                self._cond.wait(remaining)
+            n = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(n)]
+            self._inflight = n
+            if not self._queue:
+                self._flush_requested = False
+            # Wake producers blocked on a full queue.
+            self._cond.notify_all()
+            return batch
+
+    @staticmethod
+    def _transient(error: Exception) -> bool:
+        if not isinstance(error, sqlite3.OperationalError):
+            return False
+        message = str(error).lower()
+        return "locked" in message or "busy" in message
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Sequence[Any]]) -> None:
+        delay = self.retry_backoff
+        for attempt in range(self.retries + 1):
+            try:
+                with conn:
+                    conn.executemany(self.sql, batch)
+                break
+            except Exception as e:
+                if attempt < self.retries and self._transient(e):
+                    self.retried += 1
+                    logger.warning("%s: flush of %d rows hit %s, retrying in %.2fs", self.name, len(batch), e, delay)
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                self.failed += len(batch)
+                logger.error("%s: flush failed, %d rows lost: %s", self.name, len(batch), e, exc_info=True)
+                return
+        self.written += len(batch)
+        self.flushes += 1
+        for fn in list(self._listeners):
+            try:
+                fn(len(batch))
+            except Exception:
+                logger.exception("%s: flush listener failed", self.name)
+
+    def _run(self) -> None:
+        conn = self._connect(self.db_path)
+        try:
+            while True:
+                batch = self._take_batch()
+                if batch:
+                    self._write(conn, batch)
+                with self._cond:
+                    self._inflight = 0
+                    self._cond.notify_all()
+                    if self._closed and not self._queue:
+                        break
+        finally:
+            conn.close()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wake the writer and wait until every queued row is committed (or timeout)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._inflight:
+                if self._thread is None or not self._thread.is_alive():
+                    return False
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait(min(remaining, 0.01))
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush everything still queued and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        if self._queue:
+            # Writer never started or did not finish in time: write inline.
+            conn = self._connect(self.db_path)
+            try:
+                with self._cond:
+                    batch = list(self._queue)
+                    self._queue.clear()
+                self._write(conn, batch)
+            finally:
+                conn.close()
+
+
+def register_shutdown(writer: BatchWriter) -> None:
+    """Flush ``writer`` when the interpreter exits (gunicorn worker shutdown, Ctrl+C)."""
+    atexit.register(writer.close)
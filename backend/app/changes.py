@@ -0,0 +1,111 @@
+"""Since-cursor change feeds and long-polling for the polled list endpoints.
+
+/api/history, /api/admin/searches and /api/admin/activity take ``since_id=<id>``
+(as the admin export does) and then return only rows with a larger id, oldest
+first, so a poll is one range scan over the new rows instead of a re-read of
+the whole list. The response carries ``next_since_id`` for the following poll
+and ``has_more`` when ``limit`` cut the batch short.
+
+With ``wait=<seconds>`` (capped at CHANGE_FEED_MAX_WAIT_S) a poll that finds
+nothing blocks until a writer commits to the table, then looks again. Writers
+call ``notify_change(table)`` after their commit: the analyze route for
+searches, and the activity writer's flush listener (or the synchronous
+fallback) for activity_log. Notifications only reach waiters in the same
+process, so a waiter also re-checks every CHANGE_FEED_RECHECK_MS to see rows
+committed by other workers. A waiter holds a server thread, so at most
+CHANGE_FEED_MAX_WAITERS wait at once; beyond that a poll answers right away.
+A server that runs one request per worker (``wsgi.multithread`` false, e.g.
+gunicorn's default sync worker) never waits, since that would stall the worker.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+from flask import Flask, current_app, request
+
+
+class ChangeNotifier:
+    def __init__(self, max_waiters: int, recheck: float) -> None:
+        self.max_waiters = max(0, max_waiters)
+        self.recheck = max(0.05, recheck)
+        self._cond = threading.Condition()
+        self._marks: Dict[str, int] = {}
+        self.waiting = 0
+
+    def mark(self, table: str) -> int:
+        """Commit counter for ``table``; read it before querying, pass it to ``wait``."""
+        with self._cond:
+            return self._marks.get(table, 0)
+
+    def notify(self, table: str) -> None:
+        with self._cond:
+            self._marks[table] = self._marks.get(table, 0) + 1
+            self._cond.notify_all()
+
+    def wait(self, table: str, mark: int, timeout: float) -> bool:
+        """Block until ``table`` is notified after ``mark`` was read, or ``timeout`` seconds pass."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._marks.get(table, 0) != mark, timeout)
+
+    def poll(self, table: str, fetch: Callable[[], List[Any]], wait: float) -> List[Any]:
+        """``fetch()``, and while it returns nothing, wait for ``table`` to change, up to ``wait`` seconds."""
+        mark = self.mark(table)
+        rows = fetch()
+        if rows or wait <= 0:
+            return rows
+        with self._cond:
+            if self.waiting >= self.max_waiters:
+                return rows
+            self.waiting += 1
+        try:
+            deadline = time.monotonic() + wait
+            while not rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.wait(table, mark, min(remaining, self.recheck))
+                mark = self.mark(table)
+                rows = fetch()
+        finally:
+            with self._cond:
+                self.waiting -= 1
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"waiting": self.waiting, "max_waiters": self.max_waiters, "commits": dict(self._marks)}
+
+
+def feed_params(args: Mapping[str, str]) -> Tuple[int, float]:
+    """(since_id, wait) from the query string. Raises ValueError on bad values."""
+    since_id = int(args["since_id"])
+    if since_id < 0:
+        raise ValueError("since_id must be >= 0")
+    wait = float(args.get("wait") or 0)
+    if not request.environ.get("wsgi.multithread"):
+        wait = 0.0
+    return since_id, max(0.0, min(wait, float(current_app.config["CHANGE_FEED_MAX_WAIT_S"])))
+
+
+def is_feed_request() -> bool:
+    return "since_id" in request.args
+
+
+def notify_change(table: str) -> None:
+    """Wake long-polls on ``table``. Call after the write is committed."""
+    notifier = current_app.extensions.get("changes")
+    if notifier is not None:
+        notifier.notify(table)
+
+
+def init_changes(app: Flask) -> None:
+    notifier = ChangeNotifier(
+        app.config["CHANGE_FEED_MAX_WAITERS"],
+        app.config["CHANGE_FEED_RECHECK_MS"] / 1000.0,
+    )
+    writer = app.extensions.get("activity_writer")
+    if writer is not None:
+        writer.add_listener(lambda rows_written: notifier.notify("activity_log"))
+    app.extensions["changes"] = notifier
@@ -33,6 +33,20 @@ class Config:
         sqlite_path = os.getenv("SQLITE_PATH", "app.db")
         # Resolve relative path so db is always in backend folder (works from any cwd)
         self.SQLITE_PATH = sqlite_path if os.path.isabs(sqlite_path) else str(_BACKEND_ROOT / sqlite_path)
+        # Create/migrate the schema in create_app(). Turn off when deploys run `flask init-db` instead.
+        self.DB_INIT_ON_START = os.getenv("DB_INIT_ON_START", "true").lower() == "true"
+        # activity_log and its rollups get their own file (default: activity.db next to
+        # SQLITE_PATH) so audit writes never queue behind users/searches writes. Journal
+        # mode and page size apply to that file only; changing the page size of an existing
+        # file rebuilds it with VACUUM on the next schema init.
+        activity_db_path = os.getenv("ACTIVITY_DB_PATH", "")
+        if not activity_db_path:
+            activity_db_path = str(Path(self.SQLITE_PATH).with_name("activity.db"))
+        self.ACTIVITY_DB_PATH = (
+            activity_db_path if os.path.isabs(activity_db_path) else str(_BACKEND_ROOT / activity_db_path)
+        )
+        self.ACTIVITY_DB_JOURNAL_MODE = os.getenv("ACTIVITY_DB_JOURNAL_MODE", "wal").lower()
+        self.ACTIVITY_DB_PAGE_SIZE = int(os.getenv("ACTIVITY_DB_PAGE_SIZE", "4096"))
 
         self.TWITTER_BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN", "")
         self.TWEET_MAX_RESULTS = int(os.getenv("TWEET_MAX_RESULTS", "50"))
@@ -40,12 +54,121 @@ class Config:
         # NewsAPI for real-time news (free alternative to Twitter)
         self.NEWS_API_KEY = os.getenv("NEWS_API_KEY", "")
         
+        # Override upstream API roots (e.g. a local stub server for load tests).
+        self.NEWS_API_BASE_URL = os.getenv("NEWS_API_BASE_URL", "")
+        self.TWITTER_API_BASE_URL = os.getenv("TWITTER_API_BASE_URL", "")
+
+        # ASGI entry point (app.asgi): threads running the Flask routes, and the pool
+        # of upstream connections shared by the event-loop fetch path.
+        self.ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "10"))
+        self.ASYNC_UPSTREAM_MAX_CONNECTIONS = int(os.getenv("ASYNC_UPSTREAM_MAX_CONNECTIONS", "100"))
+        
+        # Upstream budgets, shared by all workers through SQLite: a daily cap (0 = none, reset at
+        # UTC midnight) and a token bucket of RATE_PER_MIN calls per minute up to BURST. The last
+        # QUOTA_RESERVE_FRACTION of a daily cap is kept for keywords that are already trending.
+        self.NEWS_API_DAILY_LIMIT = int(os.getenv("NEWS_API_DAILY_LIMIT", "100"))
+        self.NEWS_API_RATE_PER_MIN = float(os.getenv("NEWS_API_RATE_PER_MIN", "10"))
+        self.NEWS_API_BURST = float(os.getenv("NEWS_API_BURST", "5"))
+        self.TWITTER_DAILY_LIMIT = int(os.getenv("TWITTER_DAILY_LIMIT", "0"))
+        self.TWITTER_RATE_PER_MIN = float(os.getenv("TWITTER_RATE_PER_MIN", "4"))
+        self.TWITTER_BURST = float(os.getenv("TWITTER_BURST", "10"))
+        self.QUOTA_RESERVE_FRACTION = float(os.getenv("QUOTA_RESERVE_FRACTION", "0.2"))
+        # The budgets get their own file (default: quota.db next to SQLITE_PATH), so the
+        # BEGIN IMMEDIATE around every upstream call never blocks users/searches writes.
+        quota_db_path = os.getenv("QUOTA_DB_PATH", "")
+        if not quota_db_path:
+            quota_db_path = str(Path(self.SQLITE_PATH).with_name("quota.db"))
+        self.QUOTA_DB_PATH = quota_db_path if os.path.isabs(quota_db_path) else str(_BACKEND_ROOT / quota_db_path)
+        
         # Demo mode: Use mock Twitter client instead of real API (for testing without paid API)
         self.DEMO_MODE = os.getenv("DEMO_MODE", "false").lower() == "true"
         
         # Data source preference: "newsapi" (free), "twitter" (paid), or "demo" (mock)
         self.DATA_SOURCE = os.getenv("DATA_SOURCE", "newsapi").lower()
         
+        # Activity log writer: events are queued and flushed in one transaction every
+        # ACTIVITY_BATCH_SIZE events or ACTIVITY_FLUSH_MS milliseconds. When the queue is
+        # full, ACTIVITY_OVERFLOW picks drop_oldest, drop_newest or block. Set
+        # ACTIVITY_ASYNC=false to write synchronously inside the request (old behaviour).
+        self.ACTIVITY_ASYNC = os.getenv("ACTIVITY_ASYNC", "true").lower() == "true"
+        self.ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "100"))
+        self.ACTIVITY_FLUSH_MS = int(os.getenv("ACTIVITY_FLUSH_MS", "250"))
+        self.ACTIVITY_QUEUE_MAX = int(os.getenv("ACTIVITY_QUEUE_MAX", "10000"))
+        self.ACTIVITY_OVERFLOW = os.getenv("ACTIVITY_OVERFLOW", "drop_oldest").lower()
+
+        # Analyzed texts are stored for full-text search through the same kind of
+        # batched writer. A full queue drops rows (ANALYSIS_OVERFLOW, as for activity)
+        # rather than holding up /api/analyze.
+        self.ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "100"))
+        self.ANALYSIS_FLUSH_MS = int(os.getenv("ANALYSIS_FLUSH_MS", "250"))
+        self.ANALYSIS_QUEUE_MAX = int(os.getenv("ANALYSIS_QUEUE_MAX", "10000"))
+        self.ANALYSIS_OVERFLOW = os.getenv("ANALYSIS_OVERFLOW", "drop_oldest").lower()
+
+        # Sentiment model loaded at startup (a Hugging Face model name; also the model_version
+        # stored with each score). Admins can hot-swap it at /api/admin/models; re-scoring
+        # stored texts then runs RESCORE_BATCH_SIZE texts at a time, pausing RESCORE_PAUSE_MS
+        # between batches and yielding to queued live requests.
+        self.SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL", "cardiffnlp/twitter-roberta-base-sentiment")
+        self.RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "16"))
+        self.RESCORE_PAUSE_MS = float(os.getenv("RESCORE_PAUSE_MS", "200"))
+        # Token ids of fetched news items are computed in the background and kept for this many
+        # texts, so analyzing a fetched item skips tokenization (0 disables).
+        self.TOKEN_CACHE_MAX_ITEMS = int(os.getenv("TOKEN_CACHE_MAX_ITEMS", "10000"))
+
+        # Semantic cache: reuse the sentiment of a cached text whose hashed word vector is
+        # within SEMANTIC_CACHE_MAX_DISTANCE cosine distance. SEMANTIC_CACHE_AUDIT_RATE of
+        # hits are re-scored to measure how often reuse disagrees with the model.
+        self.SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+        self.SEMANTIC_CACHE_MAX_ITEMS = int(os.getenv("SEMANTIC_CACHE_MAX_ITEMS", "20000"))
+        self.SEMANTIC_CACHE_MAX_DISTANCE = float(os.getenv("SEMANTIC_CACHE_MAX_DISTANCE", "0.08"))
+        self.SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05"))
+
+        # Activity log retention: rows older than ACTIVITY_RETENTION_DAYS are moved into
+        # gzip NDJSON archive segments under ACTIVITY_ARCHIVE_DIR every ACTIVITY_ROLLOVER_HOURS
+        # (0 disables the background rollover; `python -m app.retention` runs it by hand).
+        self.ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "90"))
+        self.ACTIVITY_ROLLOVER_HOURS = float(os.getenv("ACTIVITY_ROLLOVER_HOURS", "6"))
+        archive_dir = os.getenv("ACTIVITY_ARCHIVE_DIR", "archive")
+        self.ACTIVITY_ARCHIVE_DIR = archive_dir if os.path.isabs(archive_dir) else str(_BACKEND_ROOT / archive_dir)
+
+        # Change feeds (?since_id=<id>) on the polled lists. A poll with wait=<s> blocks up to
+        # CHANGE_FEED_MAX_WAIT_S for new rows, re-checking every CHANGE_FEED_RECHECK_MS for rows
+        # written by other processes; at most CHANGE_FEED_MAX_WAITERS polls hold a thread at once.
+        self.CHANGE_FEED_MAX_WAIT_S = float(os.getenv("CHANGE_FEED_MAX_WAIT_S", "25"))
+        self.CHANGE_FEED_RECHECK_MS = float(os.getenv("CHANGE_FEED_RECHECK_MS", "1000"))
+        self.CHANGE_FEED_MAX_WAITERS = int(os.getenv("CHANGE_FEED_MAX_WAITERS", "4"))
+
+        # Trending topics: a Space-Saving sketch of requested keywords holding at most
+        # TRENDING_CAPACITY entries, with counts halving every TRENDING_HALF_LIFE_HOURS,
+        # snapshotted to SQLite (one set of rows per worker) every TRENDING_SNAPSHOT_SECONDS.
+        self.TRENDING_CAPACITY = int(os.getenv("TRENDING_CAPACITY", "256"))
+        self.TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "6"))
+        self.TRENDING_SNAPSHOT_SECONDS = float(os.getenv("TRENDING_SNAPSHOT_SECONDS", "60"))
+        self.TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", "12"))
+
+        # Admission control for /api/analyze: ADMISSION_MAX_CONCURRENCY requests run the model
+        # at once and up to ADMISSION_QUEUE_MAX wait; each user may have ADMISSION_PER_USER
+        # admitted or waiting. A request whose estimated wait exceeds its deadline
+        # (X-Deadline-Ms header, capped at ADMISSION_DEADLINE_MS) gets 503 + Retry-After, or a
+        # lexicon-only result flagged approximate when ADMISSION_DEGRADED is true.
+        self.ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+        self.ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "1"))
+        self.ADMISSION_QUEUE_MAX = int(os.getenv("ADMISSION_QUEUE_MAX", "32"))
+        self.ADMISSION_PER_USER = int(os.getenv("ADMISSION_PER_USER", "2"))
+        self.ADMISSION_DEADLINE_MS = float(os.getenv("ADMISSION_DEADLINE_MS", "10000"))
+        self.ADMISSION_DEGRADED = os.getenv("ADMISSION_DEGRADED", "false").lower() == "true"
+
+        # JSON responses of at least COMPRESS_MIN_BYTES are gzip-compressed (brotli when the
+        # brotli package is installed and the client accepts it). 0 disables compression.
+        self.COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+        # Bearer token for scraping /api/metrics. Unset, only an admin session can read it.
+        self.METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+        # Optional token: requests with "X-Profile: <PROFILE_TOKEN>" run under cProfile
+        # (admins can also send "X-Profile: 1" with their session).
+        self.PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
         # Admin credentials (set in .env for security)
         self.ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
         self.ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
@@ -1,9 +1,12 @@
+import base64
 import sqlite3
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 from flask import Flask, g
 
+from .metrics import timed
+
 
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS users (
@@ -26,16 +29,15 @@ CREATE TABLE IF NOT EXISTS searches (
   FOREIGN KEY(user_id) REFERENCES users(id)
 );
 
-CREATE TABLE IF NOT EXISTS activity_log (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  action TEXT NOT NULL,
-  actor_type TEXT NOT NULL DEFAULT 'user',
-  user_id INTEGER,
-  payload TEXT,
-  ip_address TEXT,
-  user_agent TEXT,
-  created_at TEXT NOT NULL DEFAULT (datetime('now')),
-  FOREIGN KEY(user_id) REFERENCES users(id)
+-- Last snapshot of each worker's trending sketch (app.trending).
+CREATE TABLE IF NOT EXISTS trending_snapshot (
+  worker TEXT NOT NULL,
+  keyword TEXT NOT NULL,
+  title TEXT NOT NULL,
+  count REAL NOT NULL,
+  error REAL NOT NULL,
+  updated_at REAL NOT NULL,
+  PRIMARY KEY (worker, keyword)
 );
 """
 
@@ -50,8 +52,34 @@ def _ensure_is_admin_column(conn: sqlite3.Connection) -> None:
         conn.commit()
 
 
+def _ensure_trending_snapshot_worker(conn: sqlite3.Connection) -> None:
+    """Key trending_snapshot by worker (for existing DBs, where keyword alone was the key)."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(trending_snapshot)")]
+    if "worker" in columns:
+        return
+    with conn:
+        conn.execute("ALTER TABLE trending_snapshot RENAME TO trending_snapshot_old")
+        conn.execute("""
+            CREATE TABLE trending_snapshot (
+              worker TEXT NOT NULL,
+              keyword TEXT NOT NULL,
+              title TEXT NOT NULL,
+              count REAL NOT NULL,
+              error REAL NOT NULL,
+              updated_at REAL NOT NULL,
+              PRIMARY KEY (worker, keyword)
+            )
+        """)
+        conn.execute(
+            """INSERT INTO trending_snapshot (worker, keyword, title, count, error, updated_at)
+               SELECT '', keyword, title, count, error, updated_at FROM trending_snapshot_old"""
+        )
+        conn.execute("DROP TABLE trending_snapshot_old")
+
+
 def _ensure_activity_log_table(conn: sqlite3.Connection) -> None:
-    """Create activity_log table if it doesn't exist (for existing DBs)."""
+    """Create activity_log in the audit database. user_id refers to users in the
+    main database, which SQLite can't enforce across files, so there is no FOREIGN KEY."""
     conn.execute("""
         CREATE TABLE IF NOT EXISTS activity_log (
           id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,38 +89,595 @@ def _ensure_activity_log_table(conn: sqlite3.Connection) -> None:
           payload TEXT,
           ip_address TEXT,
           user_agent TEXT,
-          created_at TEXT NOT NULL DEFAULT (datetime('now')),
-          FOREIGN KEY(user_id) REFERENCES users(id)
+          created_at TEXT NOT NULL DEFAULT (datetime('now'))
         )
     """)
     conn.commit()
 
 
+def _ensure_history_indexes(conn: sqlite3.Connection) -> None:
+    """Index searches for per-user keyset pagination on (created_at, id), and for the
+    per-user change feed on id."""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_searches_user_created ON searches(user_id, created_at, id)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_searches_user_id ON searches(user_id, id)")
+    conn.commit()
+
+
+def _ensure_user_search_stats(conn: sqlite3.Connection) -> None:
+    """Create the per-user stats table kept up to date by triggers on searches.
+
+    Backfilled from searches the first time it is created (for existing DBs).
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_search_stats'"
+    ).fetchone()
+    with conn:
+        if not exists:
+            conn.execute("""
+                CREATE TABLE user_search_stats (
+                  user_id INTEGER PRIMARY KEY,
+                  total_searches INTEGER NOT NULL DEFAULT 0,
+                  total_tweets INTEGER NOT NULL DEFAULT 0,
+                  sum_positive REAL NOT NULL DEFAULT 0,
+                  sum_neutral REAL NOT NULL DEFAULT 0,
+                  sum_negative REAL NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("""
+                INSERT INTO user_search_stats
+                  (user_id, total_searches, total_tweets, sum_positive, sum_neutral, sum_negative)
+                SELECT user_id, COUNT(*), COALESCE(SUM(tweet_count), 0),
+                       COALESCE(SUM(positive), 0), COALESCE(SUM(neutral), 0), COALESCE(SUM(negative), 0)
+                FROM searches GROUP BY user_id
+            """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_searches_stats_insert AFTER INSERT ON searches
+            BEGIN
+              INSERT INTO user_search_stats
+                (user_id, total_searches, total_tweets, sum_positive, sum_neutral, sum_negative)
+              VALUES (NEW.user_id, 1, NEW.tweet_count, NEW.positive, NEW.neutral, NEW.negative)
+              ON CONFLICT(user_id) DO UPDATE SET
+                total_searches = total_searches + 1,
+                total_tweets = total_tweets + excluded.total_tweets,
+                sum_positive = sum_positive + excluded.sum_positive,
+                sum_neutral = sum_neutral + excluded.sum_neutral,
+                sum_negative = sum_negative + excluded.sum_negative;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_searches_stats_delete AFTER DELETE ON searches
+            BEGIN
+              UPDATE user_search_stats SET
+                total_searches = total_searches - 1,
+                total_tweets = total_tweets - OLD.tweet_count,
+                sum_positive = sum_positive - OLD.positive,
+                sum_neutral = sum_neutral - OLD.neutral,
+                sum_negative = sum_negative - OLD.negative
+              WHERE user_id = OLD.user_id;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_searches_stats_update AFTER UPDATE OF positive, neutral, negative ON searches
+            BEGIN
+              UPDATE user_search_stats SET
+                sum_positive = sum_positive + NEW.positive - OLD.positive,
+                sum_neutral = sum_neutral + NEW.neutral - OLD.neutral,
+                sum_negative = sum_negative + NEW.negative - OLD.negative
+              WHERE user_id = NEW.user_id;
+            END
+        """)
+
+
+def _ensure_activity_log_indexes(conn: sqlite3.Connection) -> None:
+    """Index activity_log for keyset pagination and the admin filters."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_created ON activity_log(created_at, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_action ON activity_log(action, created_at, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_actor ON activity_log(actor_type, created_at, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_user ON activity_log(user_id, created_at, id)")
+    conn.commit()
+
+
+def _ensure_table_counts(
+    conn: sqlite3.Connection, tables: tuple[str, ...] = ("users", "searches")
+) -> None:
+    """Keep row counts in table_counts via insert/delete triggers, so admin pages
+    don't need a COUNT(*) scan. Each table is seeded with one COUNT(*) the first time."""
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS table_counts (name TEXT PRIMARY KEY, n INTEGER NOT NULL DEFAULT 0)"
+        )
+        for table in tables:
+            seeded = conn.execute("SELECT 1 FROM table_counts WHERE name = ?", (table,)).fetchone()
+            if not seeded:
+                conn.execute(
+                    f"INSERT INTO table_counts (name, n) SELECT ?, COUNT(*) FROM {table}", (table,)
+                )
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert AFTER INSERT ON {table}
+                BEGIN
+                  UPDATE table_counts SET n = n + 1 WHERE name = '{table}';
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete AFTER DELETE ON {table}
+                BEGIN
+                  UPDATE table_counts SET n = n - 1 WHERE name = '{table}';
+                END
+            """)
+
+
+
+# Per-table change counters for HTTP validators. Rows written by admins (their own
+# page views) don't bump activity_log, so an admin polling a page doesn't
+# invalidate it by viewing it.
+VERSION_TRIGGER_FILTERS = {"activity_log": "WHEN NEW.actor_type <> 'admin'"}
+
+
+def _ensure_table_versions(
+    conn: sqlite3.Connection, tables: tuple[str, ...] = ("users", "searches")
+) -> None:
+    """Keep a version per table in table_versions, bumped by insert/update/delete triggers."""
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)"
+        )
+        for table in tables:
+            conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+            for op in ("INSERT", "UPDATE", "DELETE"):
+                when = VERSION_TRIGGER_FILTERS.get(table, "") if op != "DELETE" else ""
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{op.lower()} AFTER {op} ON {table}
+                    {when}
+                    BEGIN
+                      UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                """)
+
+ROLLUP_GRANULARITIES = {
+    # granularity -> SQL expression turning a created_at column into its bucket start
+    "hour": "substr({col}, 1, 13) || ':00:00'",
+    "day": "substr({col}, 1, 10)",
+}
+ALL_KEYWORDS = "*"  # search_rollups.keyword value for the all-keywords total
+
+
+def _ensure_search_rollups(conn: sqlite3.Connection) -> None:
+    """Create search_rollups: per bucket and keyword (plus an ALL_KEYWORDS row per
+    bucket), the number of analyses and the sum and sum of squares of each label,
+    kept current by insert, update and delete triggers on searches.
+
+    Backfilled from searches when first created. Tables from before the
+    sum-of-squares columns existed are rebuilt the same way.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(search_rollups)").fetchall()]
+    with conn:
+        if columns and "sq_positive" not in columns:
+            conn.execute("DROP TABLE search_rollups")
+            for gran in ROLLUP_GRANULARITIES:
+                conn.execute(f"DROP TRIGGER IF EXISTS trg_searches_rollup_{gran}")
+            columns = []
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_rollups (
+              granularity TEXT NOT NULL,
+              bucket TEXT NOT NULL,
+              keyword TEXT NOT NULL,
+              analyses INTEGER NOT NULL DEFAULT 0,
+              sum_positive REAL NOT NULL DEFAULT 0,
+              sum_neutral REAL NOT NULL DEFAULT 0,
+              sum_negative REAL NOT NULL DEFAULT 0,
+              sq_positive REAL NOT NULL DEFAULT 0,
+              sq_neutral REAL NOT NULL DEFAULT 0,
+              sq_negative REAL NOT NULL DEFAULT 0,
+              PRIMARY KEY (granularity, keyword, bucket)
+            )
+        """)
+        for gran, expr in ROLLUP_GRANULARITIES.items():
+            bucket = expr.format(col="NEW.created_at")
+            values = "NEW.positive, NEW.neutral, NEW.negative, " \
+                     "NEW.positive * NEW.positive, NEW.neutral * NEW.neutral, NEW.negative * NEW.negative"
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_searches_rollup_{gran} AFTER INSERT ON searches
+                BEGIN
+                  INSERT INTO search_rollups
+                    (granularity, bucket, keyword, analyses, sum_positive, sum_neutral, sum_negative,
+                     sq_positive, sq_neutral, sq_negative)
+                  VALUES ('{gran}', {bucket}, NEW.keyword, 1, {values}),
+                         ('{gran}', {bucket}, '{ALL_KEYWORDS}', 1, {values})
+                  ON CONFLICT(granularity, keyword, bucket) DO UPDATE SET
+                    analyses = analyses + 1,
+                    sum_positive = sum_positive + excluded.sum_positive,
+                    sum_neutral = sum_neutral + excluded.sum_neutral,
+                    sum_negative = sum_negative + excluded.sum_negative,
+                    sq_positive = sq_positive + excluded.sq_positive,
+                    sq_neutral = sq_neutral + excluded.sq_neutral,
+                    sq_negative = sq_negative + excluded.sq_negative;
+                END
+            """)
+            # Re-scoring changes a row's labels but never its keyword or bucket.
+            old_bucket = expr.format(col="OLD.created_at")
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_searches_rollup_{gran}_update
+                AFTER UPDATE OF positive, neutral, negative ON searches
+                BEGIN
+                  UPDATE search_rollups SET
+                    sum_positive = sum_positive + NEW.positive - OLD.positive,
+                    sum_neutral = sum_neutral + NEW.neutral - OLD.neutral,
+                    sum_negative = sum_negative + NEW.negative - OLD.negative,
+                    sq_positive = sq_positive + NEW.positive * NEW.positive - OLD.positive * OLD.positive,
+                    sq_neutral = sq_neutral + NEW.neutral * NEW.neutral - OLD.neutral * OLD.neutral,
+                    sq_negative = sq_negative + NEW.negative * NEW.negative - OLD.negative * OLD.negative
+                  WHERE granularity = '{gran}' AND bucket = {old_bucket}
+                    AND keyword IN (OLD.keyword, '{ALL_KEYWORDS}');
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_searches_rollup_{gran}_delete AFTER DELETE ON searches
+                BEGIN
+                  UPDATE search_rollups SET
+                    analyses = analyses - 1,
+                    sum_positive = sum_positive - OLD.positive,
+                    sum_neutral = sum_neutral - OLD.neutral,
+                    sum_negative = sum_negative - OLD.negative,
+                    sq_positive = sq_positive - OLD.positive * OLD.positive,
+                    sq_neutral = sq_neutral - OLD.neutral * OLD.neutral,
+                    sq_negative = sq_negative - OLD.negative * OLD.negative
+                  WHERE granularity = '{gran}' AND bucket = {old_bucket}
+                    AND keyword IN (OLD.keyword, '{ALL_KEYWORDS}');
+                  DELETE FROM search_rollups
+                  WHERE granularity = '{gran}' AND bucket = {old_bucket}
+                    AND keyword IN (OLD.keyword, '{ALL_KEYWORDS}') AND analyses <= 0;
+                END
+            """)
+        if not columns:
+            for gran, expr in ROLLUP_GRANULARITIES.items():
+                bucket = expr.format(col="created_at")
+                for keyword in ("keyword", f"'{ALL_KEYWORDS}'"):
+                    conn.execute(f"""
+                        INSERT INTO search_rollups
+                          (granularity, bucket, keyword, analyses, sum_positive, sum_neutral, sum_negative,
+                           sq_positive, sq_neutral, sq_negative)
+                        SELECT '{gran}', {bucket}, {keyword}, COUNT(*),
+                               SUM(positive), SUM(neutral), SUM(negative),
+                               SUM(positive * positive), SUM(neutral * neutral), SUM(negative * negative)
+                        FROM searches GROUP BY 2, 3
+                    """)
+
+
+def _ensure_activity_rollups(conn: sqlite3.Connection) -> None:
+    """Create hourly/daily rollups of activity_log, kept current by triggers.
+
+    - activity_rollups: action counts per bucket.
+    - active_users / usage_rollups: distinct users seen in activity_log per bucket.
+
+    Insert-only: rows that retention moves out of activity_log stay counted.
+    Backfilled from activity_log the first time they are created.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activity_rollups'"
+    ).fetchone()
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS activity_rollups (
+              granularity TEXT NOT NULL,
+              bucket TEXT NOT NULL,
+              action TEXT NOT NULL,
+              n INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (granularity, bucket, action)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS active_users (
+              granularity TEXT NOT NULL,
+              bucket TEXT NOT NULL,
+              user_id INTEGER NOT NULL,
+              PRIMARY KEY (granularity, bucket, user_id)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage_rollups (
+              granularity TEXT NOT NULL,
+              bucket TEXT NOT NULL,
+              active_users INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (granularity, bucket)
+            )
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_active_users_insert AFTER INSERT ON active_users
+            BEGIN
+              INSERT INTO usage_rollups (granularity, bucket, active_users)
+              VALUES (NEW.granularity, NEW.bucket, 1)
+              ON CONFLICT(granularity, bucket) DO UPDATE SET active_users = active_users + 1;
+            END
+        """)
+        for gran, expr in ROLLUP_GRANULARITIES.items():
+            bucket = expr.format(col="NEW.created_at")
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_activity_rollup_{gran} AFTER INSERT ON activity_log
+                BEGIN
+                  INSERT INTO activity_rollups (granularity, bucket, action, n)
+                  VALUES ('{gran}', {bucket}, NEW.action, 1)
+                  ON CONFLICT(granularity, bucket, action) DO UPDATE SET n = n + 1;
+                  INSERT OR IGNORE INTO active_users (granularity, bucket, user_id)
+                  SELECT '{gran}', {bucket}, NEW.user_id WHERE NEW.user_id IS NOT NULL;
+                END
+            """)
+        if not exists:
+            for gran, expr in ROLLUP_GRANULARITIES.items():
+                bucket = expr.format(col="created_at")
+                conn.execute(f"""
+                    INSERT INTO activity_rollups (granularity, bucket, action, n)
+                    SELECT '{gran}', {bucket}, action, COUNT(*) FROM activity_log GROUP BY 2, 3
+                """)
+                conn.execute(f"""
+                    INSERT OR IGNORE INTO active_users (granularity, bucket, user_id)
+                    SELECT DISTINCT '{gran}', {bucket}, user_id FROM activity_log WHERE user_id IS NOT NULL
+                """)
+
+
+def _ensure_analyses_tables(conn: sqlite3.Connection) -> None:
+    """Store analyzed texts with their scores, indexed for full-text search.
+
+    analyses_fts is an external-content FTS5 index over analyses(text, topic),
+    kept in sync by triggers. If this SQLite build lacks FTS5 the plain table
+    is still created and search is unavailable.
+    """
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              search_id INTEGER,
+              user_id INTEGER NOT NULL,
+              topic TEXT NOT NULL,
+              text TEXT NOT NULL,
+              sentiment TEXT NOT NULL,
+              confidence REAL NOT NULL,
+              positive REAL NOT NULL,
+              neutral REAL NOT NULL,
+              negative REAL NOT NULL,
+              created_at TEXT NOT NULL DEFAULT (datetime('now')),
+              FOREIGN KEY(user_id) REFERENCES users(id),
+              FOREIGN KEY(search_id) REFERENCES searches(id)
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analyses_user_created ON analyses(user_id, created_at, id)"
+        )
+    try:
+        with conn:
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+                  text, topic, content='analyses', content_rowid='id', tokenize='porter unicode61'
+                )
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_analyses_fts_insert AFTER INSERT ON analyses
+                BEGIN
+                  INSERT INTO analyses_fts (rowid, text, topic) VALUES (NEW.id, NEW.text, NEW.topic);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_analyses_fts_delete AFTER DELETE ON analyses
+                BEGIN
+                  INSERT INTO analyses_fts (analyses_fts, rowid, text, topic)
+                  VALUES ('delete', OLD.id, OLD.text, OLD.topic);
+                END
+            """)
+    except sqlite3.OperationalError as e:
+        import logging
+        logging.getLogger(__name__).warning("FTS5 unavailable, analysis search disabled: %s", e)
+
+
+LEGACY_MODEL_VERSION = "cardiffnlp/twitter-roberta-base-sentiment"  # scored every row stored before versioning
+
+
+def _ensure_model_version_columns(conn: sqlite3.Connection) -> None:
+    """Record which model produced each stored score. Rows from before the column
+    existed were all scored by LEGACY_MODEL_VERSION."""
+    with conn:
+        for table in ("searches", "analyses"):
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+            if "model_version" not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN model_version TEXT")
+                conn.execute(f"UPDATE {table} SET model_version = ?", (LEGACY_MODEL_VERSION,))
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_model_version ON analyses(model_version)")
+
+
 def _connect(db_path: str) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+# activity_log and its rollups live in a database of their own (ACTIVITY_DB_PATH), so
+# the audit writer never holds the lock that signups and history writes wait for.
+# Request connections attach it under this name; the main database has no tables
+# with these names, so unqualified queries reach them unchanged.
+ACTIVITY_SCHEMA = "activity"
+ACTIVITY_TABLES = ("activity_log", "activity_rollups", "active_users", "usage_rollups")
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+
+
+def attach_activity_db(conn: sqlite3.Connection, activity_db_path: str) -> sqlite3.Connection:
+    conn.execute(f"ATTACH DATABASE ? AS {ACTIVITY_SCHEMA}", (activity_db_path,))
+    return conn
+
+
 def get_db() -> sqlite3.Connection:
     if "db" not in g:
         conn = _connect(g.app_config["SQLITE_PATH"])  # type: ignore[attr-defined]
         _ensure_is_admin_column(conn)  # Migrate existing DBs on first request
-        _ensure_activity_log_table(conn)
+        attach_activity_db(conn, g.app_config["ACTIVITY_DB_PATH"])  # type: ignore[attr-defined]
         g.db = conn
     return g.db  # type: ignore[return-value]
 
 
-def init_db(app: Flask) -> None:
-    db_path = app.config["SQLITE_PATH"]
+def create_schema(db_path: str) -> None:
+    """Create tables, indexes and triggers and run the column migrations. Idempotent."""
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
     conn = _connect(db_path)
     conn.executescript(SCHEMA_SQL)
     conn.commit()
     _ensure_is_admin_column(conn)
+    _ensure_trending_snapshot_worker(conn)
+    _ensure_history_indexes(conn)
+    _ensure_user_search_stats(conn)
+    _ensure_table_counts(conn)
+    _ensure_table_versions(conn)
+    _ensure_search_rollups(conn)
+    _ensure_analyses_tables(conn)
+    _ensure_model_version_columns(conn)
+    conn.close()
+
+
+def _set_page_size(conn: sqlite3.Connection, page_size: int) -> None:
+    """Apply page_size. A database that already has tables is rebuilt with VACUUM,
+    which is the only way existing pages change size and can't run in WAL mode."""
+    if conn.execute("PRAGMA page_size").fetchone()[0] == page_size:
+        return
+    populated = conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+    try:
+        if populated:
+            conn.execute("PRAGMA journal_mode = delete")
+        conn.execute(f"PRAGMA page_size = {int(page_size)}")
+        if populated:
+            conn.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        # Another process has the file open (e.g. a worker that started first).
+        import logging
+        logging.getLogger(__name__).warning("Activity DB page_size change deferred: %s", e)
+
+
+def _move_activity_tables(conn: sqlite3.Connection, main_db_path: str) -> None:
+    """Move activity tables left in the main database (from before the split) into
+    the activity database ``conn`` is open on. Rollups are copied as they are, since
+    they still count rows retention has archived. Safe to rerun if interrupted."""
+    conn.execute("ATTACH DATABASE ? AS app", (main_db_path,))
+    try:
+        legacy = {
+            r[0] for r in conn.execute("SELECT name FROM app.sqlite_master WHERE type = 'table'")
+        } & set(ACTIVITY_TABLES)
+        if not legacy:
+            return
+        with conn:
+            if "activity_log" in legacy:
+                columns = "id, action, actor_type, user_id, payload, ip_address, user_agent, created_at"
+                conn.execute(f"""
+                    INSERT INTO main.activity_log ({columns})
+                    SELECT {columns} FROM app.activity_log
+                    WHERE id > (SELECT COALESCE(MAX(id), 0) FROM main.activity_log) ORDER BY id
+                """)
+                # Keep ids growing past rows that were archived before the move.
+                seq = conn.execute("SELECT seq FROM app.sqlite_sequence WHERE name = 'activity_log'").fetchone()
+                if seq and not conn.execute(
+                    "UPDATE main.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'activity_log'", (seq[0],)
+                ).rowcount:
+                    conn.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES ('activity_log', ?)", (seq[0],))
+            # The inserts above fed the rollup triggers; replace with the full history.
+            # usage_rollups goes last because inserts into active_users bump it.
+            for table in ("activity_rollups", "active_users", "usage_rollups"):
+                if table in legacy:
+                    conn.execute(f"DELETE FROM main.{table}")
+                    conn.execute(f"INSERT INTO main.{table} SELECT * FROM app.{table}")
+            for table in legacy:
+                conn.execute(f"DROP TABLE app.{table}")
+            conn.execute("DELETE FROM app.table_counts WHERE name = 'activity_log'")
+            conn.execute("DELETE FROM app.table_versions WHERE name = 'activity_log'")
+    finally:
+        conn.execute("DETACH DATABASE app")
+
+
+def create_activity_schema(
+    activity_db_path: str,
+    *,
+    journal_mode: str = "wal",
+    page_size: int = 4096,
+    main_db_path: Optional[str] = None,
+) -> None:
+    """Create or migrate the activity database: activity_log, its indexes, counters
+    and rollups. journal_mode and page_size are set on this file only. With
+    ``main_db_path``, activity tables still in the main database are moved over."""
+    if journal_mode.lower() not in JOURNAL_MODES:
+        raise ValueError(f"journal_mode must be one of {JOURNAL_MODES}, got {journal_mode!r}")
+    Path(activity_db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = _connect(activity_db_path)
+    _set_page_size(conn, page_size)
+    conn.execute(f"PRAGMA journal_mode = {journal_mode.lower()}")
     _ensure_activity_log_table(conn)
+    _ensure_activity_log_indexes(conn)
+    _ensure_table_counts(conn, ("activity_log",))
+    _ensure_table_versions(conn, ("activity_log",))
+    _ensure_activity_rollups(conn)
+    if main_db_path:
+        _move_activity_tables(conn, main_db_path)
+    conn.close()
+
+
+# Upstream budgets (app.quota) live in a third file (QUOTA_DB_PATH): every upstream
+# call takes a write lock on them, which must not queue signups and history writes.
+QUOTA_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS upstream_quota (
+  source TEXT PRIMARY KEY,
+  day TEXT NOT NULL,
+  used INTEGER NOT NULL DEFAULT 0,
+  tokens REAL NOT NULL,
+  refilled_at REAL NOT NULL,
+  blocked_until REAL NOT NULL DEFAULT 0,
+  upstream_remaining INTEGER,
+  upstream_reset REAL
+);
+"""
+
+
+def create_quota_schema(quota_db_path: str, *, main_db_path: Optional[str] = None) -> None:
+    """Create the upstream_quota table in WAL mode. With ``main_db_path``, budgets
+    still kept in the main database are moved over."""
+    Path(quota_db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = _connect(quota_db_path)
+    conn.execute("PRAGMA journal_mode = wal")
+    conn.executescript(QUOTA_SCHEMA_SQL)
+    if main_db_path and Path(main_db_path).exists():
+        conn.execute("ATTACH DATABASE ? AS app", (main_db_path,))
+        try:
+            with conn:
+                legacy = conn.execute(
+                    "SELECT 1 FROM app.sqlite_master WHERE type = 'table' AND name = 'upstream_quota'"
+                ).fetchone()
+                if legacy:
+                    conn.execute("INSERT OR IGNORE INTO main.upstream_quota SELECT * FROM app.upstream_quota")
+                    conn.execute("DROP TABLE app.upstream_quota")
+        finally:
+            conn.execute("DETACH DATABASE app")
     conn.close()
 
+
+def create_databases(config) -> None:
+    """create_schema for the main database, then the activity and quota databases."""
+    create_schema(config["SQLITE_PATH"])
+    create_activity_schema(
+        config["ACTIVITY_DB_PATH"],
+        journal_mode=config["ACTIVITY_DB_JOURNAL_MODE"],
+        page_size=config["ACTIVITY_DB_PAGE_SIZE"],
+        main_db_path=config["SQLITE_PATH"],
+    )
+    create_quota_schema(config["QUOTA_DB_PATH"], main_db_path=config["SQLITE_PATH"])
+
+
+def init_db(app: Flask) -> None:
+    # With DB_INIT_ON_START off, run `flask --app app init-db` once per deploy instead.
+    if app.config["DB_INIT_ON_START"]:
+        create_databases(app.config)
+
+    @app.cli.command("init-db")
+    def _init_db_command():
+        """Create or migrate the SQLite schema."""
+        create_databases(app.config)
+        print(
+            f"Initialized {app.config['SQLITE_PATH']}, {app.config['ACTIVITY_DB_PATH']}"
+            f" and {app.config['QUOTA_DB_PATH']}"
+        )
+
     @app.before_request
     def _attach_config():
         g.app_config = app.config
@@ -105,24 +690,83 @@ def init_db(app: Flask) -> None:
 
 
 def query_one(sql: str, params: tuple[Any, ...] = ()) -> Optional[Dict[str, Any]]:
-    cur = get_db().execute(sql, params)
-    row = cur.fetchone()
-    cur.close()
+    with timed("db"):
+        cur = get_db().execute(sql, params)
+        row = cur.fetchone()
+        cur.close()
     return dict(row) if row else None
 
 
 def query_all(sql: str, params: tuple[Any, ...] = ()) -> list[Dict[str, Any]]:
-    cur = get_db().execute(sql, params)
-    rows = cur.fetchall()
-    cur.close()
+    with timed("db"):
+        cur = get_db().execute(sql, params)
+        rows = cur.fetchall()
+        cur.close()
     return [dict(row) for row in rows]
 
 
 def execute(sql: str, params: tuple[Any, ...] = ()) -> int:
-    db = get_db()
-    cur = db.execute(sql, params)
-    db.commit()
-    last_id = cur.lastrowid
-    cur.close()
+    with timed("db"):
+        db = get_db()
+        cur = db.execute(sql, params)
+        db.commit()
+        last_id = cur.lastrowid
+        cur.close()
     return int(last_id)
 
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    """Opaque keyset cursor for (created_at, id) ordered pages."""
+    raw = f"{created_at}|{int(row_id)}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return created_at, int(row_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def int_arg(
+    args: Mapping[str, str], name: str, default: Optional[int], lo: Optional[int] = 1, hi: Optional[int] = None
+) -> Optional[int]:
+    """Integer query parameter ``name``, ``default`` when absent, clamped to [lo, hi]
+    (either bound may be None). Raises ValueError (with a message for the 400
+    response) when it isn't an integer."""
+    value = (args.get(name) or "").strip()
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if lo is not None:
+        number = max(lo, number)
+    return number if hi is None else min(number, hi)
+
+
+def table_count(table: str) -> int:
+    """Row count maintained by the table_counts triggers (in whichever database holds ``table``)."""
+    row = query_one(
+        f"""SELECT n FROM main.table_counts WHERE name = ?
+            UNION ALL SELECT n FROM {ACTIVITY_SCHEMA}.table_counts WHERE name = ?""",
+        (table, table),
+    )
+    return int(row["n"]) if row else 0
+
+
+def table_versions(*tables: str) -> Tuple[int, ...]:
+    """Change counters maintained by the table_versions triggers, in argument order."""
+    marks = ", ".join("?" for _ in tables)
+    rows = query_all(
+        f"""SELECT name, version FROM main.table_versions WHERE name IN ({marks})
+            UNION ALL SELECT name, version FROM {ACTIVITY_SCHEMA}.table_versions WHERE name IN ({marks})""",
+        (*tables, *tables),
+    )
+    versions = {r["name"]: int(r["version"]) for r in rows}
+    return tuple(versions.get(t, 0) for t in tables)
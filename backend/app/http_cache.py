@@ -0,0 +1,90 @@
+"""Conditional GET and response compression for polled read endpoints.
+
+``@conditional(validator)`` derives a weak ETag from a cheap version value,
+e.g. table_versions() counters or an in-memory version, instead of hashing
+the body. When the client's ``If-None-Match`` matches, the view is not run at
+all and a bodyless 304 is returned. Otherwise the view runs and its response
+carries the ETag.
+
+``init_http_cache`` compresses JSON responses above ``COMPRESS_MIN_BYTES``
+with brotli (when the ``brotli`` package is installed and the client accepts
+it) or gzip. Streamed responses and ones that already set Content-Encoding are
+left alone.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from flask import Flask, current_app, make_response, request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _etag(validator: Any) -> str:
+    # Path and query string are part of the tag: pages and filters have their own.
+    raw = f"{request.full_path}|{validator}".encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=12).hexdigest()
+
+
+def conditional(validator: Callable[[], Any], unless: Optional[Callable[[], bool]] = None):
+    """Answer If-None-Match from ``validator()`` before running the view.
+
+    ``validator`` must change whenever the view's body would. Put this below the
+    auth decorator so unauthenticated requests never see a 304. When ``unless()``
+    is true the view runs as is, without an ETag (e.g. change-feed polls, which
+    must not be answered 304 before they have waited).
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if unless is not None and unless():
+                return fn(*args, **kwargs)
+            tag = _etag(validator())
+            if request.if_none_match.contains_weak(tag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(tag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
+
+
+def _compress(response):
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype != "application/json"
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < current_app.config["COMPRESS_MIN_BYTES"]:
+        return response
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+        response.headers["Content-Encoding"] = "br"
+    elif accepted["gzip"]:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def init_http_cache(app: Flask) -> None:
+    if app.config["COMPRESS_MIN_BYTES"] > 0:
+        app.after_request(_compress)
@@ -0,0 +1,191 @@
+"""In-process metrics in Prometheus text format, plus per-request stage timings.
+
+``timed("stage")`` wraps a hot-path section: it records into the
+``app_stage_seconds`` histogram and, inside a request, adds the time to that
+request's ``Server-Timing`` header. Recording is a couple of ``perf_counter``
+calls and a dict update under a lock; nothing is formatted until
+``/api/metrics`` is scraped. The endpoint takes ``Authorization: Bearer
+<METRICS_TOKEN>`` or an admin session; without either it answers 404 (401 for a
+wrong token), so a deploy that never set a token doesn't expose it.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from flask import Flask, Response, current_app, g, has_app_context, request, session
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()]
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(names, (*key, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], List[str]]) -> None:
+        """``fn`` returns ready-made exposition lines (used for gauges read at scrape time)."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            try:
+                lines.extend(fn())
+            except Exception:
+                pass
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "app_http_request_duration_seconds", "Request latency by route.", ("method", "route", "status")
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "app_stage_seconds", "Time spent per hot-path stage (upstream, tokenize, inference, db, activity_log).",
+    ("stage",),
+))
+MODEL_BATCH_SIZE = REGISTRY.register(Histogram(
+    "app_model_batch_size", "Texts per model forward pass.", (), buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "app_upstream_errors_total", "Failed upstream calls by source.", ("source",)
+))
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if has_app_context():
+            timings = g.get("_stage_timings")
+            if timings is None:
+                timings = g._stage_timings = {}
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def _writer_gauges() -> List[str]:
+    lines = ["# HELP app_batch_writer_queued Rows waiting in a background writer.",
+             "# TYPE app_batch_writer_queued gauge"]
+    totals: List[str] = ["# HELP app_batch_writer_rows_total Rows handled by a background writer.",
+                         "# TYPE app_batch_writer_rows_total counter"]
+    app = current_app._get_current_object() if has_app_context() else None
+    if app is None:
+        return []
+    for name, ext in app.extensions.items():
+        stats = getattr(ext, "stats", None)
+        if not name.endswith("_writer") or stats is None:
+            continue
+        s = stats()
+        lines.append(f'app_batch_writer_queued{{writer="{name}"}} {s["queued"]}')
+        for outcome in ("written", "dropped", "failed"):
+            totals.append(f'app_batch_writer_rows_total{{writer="{name}",outcome="{outcome}"}} {s[outcome]}')
+    return lines + totals
+
+
+REGISTRY.add_collector(_writer_gauges)
+
+
+def init_metrics(app: Flask) -> None:
+    @app.before_request
+    def _start_timer():
+        g._request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.get("_request_start")
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=str(response.status_code))
+        parts = [f"{stage};dur={secs * 1000:.1f}" for stage, secs in (g.get("_stage_timings") or {}).items()]
+        parts.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(parts)
+        return response
+
+    @app.get("/api/metrics")
+    def metrics():
+        token = app.config.get("METRICS_TOKEN")
+        if not session.get("admin_logged_in"):
+            if not token:
+                return {"error": "not found"}, 404
+            if request.headers.get("Authorization") != f"Bearer {token}":
+                return {"error": "unauthorized"}, 401
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,116 @@
+"""Columnar sentiment results for batch scoring.
+
+``SentimentBatch`` holds N results as one N x 3 float32 probability array (in
+model order: negative, neutral, positive) plus label-index and confidence
+arrays, instead of N dicts. Argmax, percentage rounding and averaging are
+single NumPy operations, the batch pickles as a few flat buffers (cheap to
+send back from a worker process), and rows are only turned into Python
+objects at the edge: ``executemany`` parameters or JSON lines.
+
+Percentages follow /api/analyze: confidence to 1 decimal, probabilities to 2.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+LABELS = ["negative", "neutral", "positive"]
+_LABEL_NAMES = np.array(LABELS)
+
+
+@dataclass
+class SentimentResult:
+    positive: float
+    neutral: float
+    negative: float
+
+    def as_percentages(self) -> Dict[str, float]:
+        return {
+            "positive": round(self.positive * 100.0, 2),
+            "neutral": round(self.neutral * 100.0, 2),
+            "negative": round(self.negative * 100.0, 2),
+        }
+
+
+@dataclass
+class SentimentBatch:
+    probs: np.ndarray  # (N, 3) float32, columns in LABELS order
+    labels: np.ndarray  # (N,) int8 index into LABELS
+    confidence: np.ndarray  # (N,) float32, probability of the label
+
+    @classmethod
+    def from_probs(cls, probs) -> "SentimentBatch":
+        probs = np.asarray(probs, dtype=np.float32).reshape(-1, len(LABELS))
+        labels = np.argmax(probs, axis=1).astype(np.int8)
+        confidence = probs[np.arange(len(probs)), labels]
+        return cls(probs, labels, confidence)
+
+    @classmethod
+    def empty(cls) -> "SentimentBatch":
+        return cls.from_probs(np.empty((0, len(LABELS)), dtype=np.float32))
+
+    @classmethod
+    def concat(cls, batches: Sequence["SentimentBatch"]) -> "SentimentBatch":
+        if not batches:
+            return cls.empty()
+        return cls(
+            np.concatenate([b.probs for b in batches]),
+            np.concatenate([b.labels for b in batches]),
+            np.concatenate([b.confidence for b in batches]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.probs)
+
+    def label_names(self) -> List[str]:
+        return _LABEL_NAMES[self.labels].tolist()
+
+    def percentages(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(confidence %, N x 3 probability %) as float64, rounded like /api/analyze."""
+        return (
+            np.round(self.confidence.astype(np.float64) * 100.0, 1),
+            np.round(self.probs.astype(np.float64) * 100.0, 2),
+        )
+
+    def _columns(self) -> Tuple[List[str], List[float], List[float], List[float], List[float]]:
+        confidence, pct = self.percentages()
+        return (
+            self.label_names(),
+            confidence.tolist(),
+            pct[:, 2].tolist(),
+            pct[:, 1].tolist(),
+            pct[:, 0].tolist(),
+        )
+
+    def mean(self) -> SentimentResult:
+        if not len(self):
+            return SentimentResult(positive=0.0, neutral=0.0, negative=0.0)
+        negative, neutral, positive = self.probs.mean(axis=0, dtype=np.float64).tolist()
+        return SentimentResult(positive=positive, neutral=neutral, negative=negative)
+
+    def to_dicts(self) -> List[Dict[str, float]]:
+        """Per-text probability dicts, as returned by ``predict_proba``."""
+        negative, neutral, positive = self.probs.astype(np.float64).T.tolist()
+        return [
+            {"negative": n, "neutral": u, "positive": p}
+            for n, u, p in zip(negative, neutral, positive)
+        ]
+
+    def rows(self, ids: Sequence) -> Iterator[Tuple]:
+        """(id, sentiment, confidence, positive, neutral, negative) per text, for ``executemany``."""
+        return zip(ids, *self._columns())
+
+    def to_jsonl(self, ids: Sequence) -> str:
+        """JSON lines of {id, sentiment, confidence, positive, neutral, negative}.
+
+        Formats the rows directly: the same text ``json.dumps`` would produce for
+        each record dict, without building the dicts.
+        """
+        return "".join(
+            f'{{"id": {json.dumps(i, ensure_ascii=False)}, "sentiment": "{s}", "confidence": {c!r}, '
+            f'"positive": {p!r}, "neutral": {u!r}, "negative": {n!r}}}\n'
+            for i, s, c, p, u, n in self.rows(ids)
+        )
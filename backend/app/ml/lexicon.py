@@ -0,0 +1,57 @@
+"""Keyword lexicon shared by the model explanation and the degraded (model-free) path.
+
+Kept free of transformers/torch imports so a lexicon-only result can be
+produced while the model is saturated or unavailable.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+POSITIVE_WORDS = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
+                  'love', 'best', 'awesome', 'brilliant', 'perfect', 'outstanding',
+                  'positive', 'success', 'win', 'happy', 'joy', 'excited', 'proud']
+
+NEGATIVE_WORDS = ['bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'disappointed',
+                  'sad', 'angry', 'frustrated', 'failed', 'problem', 'issue', 'crisis',
+                  'negative', 'worried', 'concerned', 'disaster', 'tragedy', 'loss']
+
+
+def find_sentiment_words(text: str) -> Tuple[List[str], List[str]]:
+    """Words of ``text`` containing a positive / negative lexicon entry, in text order."""
+    words = text.lower().split()
+    found_positive = [w for w in words if any(pos in w for pos in POSITIVE_WORDS)]
+    found_negative = [w for w in words if any(neg in w for neg in NEGATIVE_WORDS)]
+    return found_positive, found_negative
+
+
+def lexicon_analysis(text: str) -> Dict:
+    """Approximate sentiment from lexicon hits alone, shaped like analyze_with_explanation.
+
+    Each hit adds one vote to its label. Every label starts with half a vote of
+    smoothing and neutral with one more (1.5), so a text with no hits comes out
+    neutral and a single hit only draws level with it. The result is flagged ``approximate``.
+    """
+    found_positive, found_negative = find_sentiment_words(text)
+    votes = {"positive": 0.5 + len(found_positive), "neutral": 1.5, "negative": 0.5 + len(found_negative)}
+    total = sum(votes.values())
+    probs = {label: v / total for label, v in votes.items()}
+    label = max(probs, key=probs.get)
+    confidence_pct = round(probs[label] * 100, 1)
+
+    explanation = (
+        f"Approximate result: the model is busy, so this text was scored from sentiment keywords only "
+        f"and classified as **{label.capitalize()}** ({len(found_positive)} positive, "
+        f"{len(found_negative)} negative keyword hits). Retry later for a full model analysis."
+    )
+    return {
+        "sentiment": label,
+        "confidence": confidence_pct,
+        "probabilities": {k: round(probs[k] * 100, 2) for k in ("positive", "neutral", "negative")},
+        "explanation": explanation,
+        "key_words": {
+            "positive": list(set(found_positive[:5])),
+            "negative": list(set(found_negative[:5])),
+        },
+        "cache": {"reused": False},
+        "approximate": True,
+    }
@@ -0,0 +1,63 @@
+"""Two-stage pipeline: prepare the next chunk in a thread while the current one runs.
+
+Used to overlap tokenization (a fast-tokenizer batch encode, which releases
+the GIL in Rust) with the model's forward pass. The hand-off queue is bounded,
+so the preparing stage runs at most ``depth`` chunks ahead and memory stays
+flat for long inputs.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, TypeVar
+
+C = TypeVar("C")
+P = TypeVar("P")
+R = TypeVar("R")
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def pipelined(chunks: Iterable[C], prepare: Callable[[C], P], run: Callable[[P], R], depth: int = 2) -> Iterator[R]:
+    """Yield ``run(prepare(chunk))`` for each chunk, in order, with ``prepare`` running one stage ahead."""
+    handoff: "queue.Queue[object]" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def _put(item: object) -> bool:
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for chunk in chunks:
+                if not _put(prepare(chunk)):
+                    return
+        except BaseException as e:  # surfaced in the consumer
+            _put(_Failed(e))
+            return
+        _put(_DONE)
+
+    producer = threading.Thread(target=_produce, name="pipeline-prepare", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = handoff.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield run(item)
+    finally:
+        # Consumer finished or abandoned the generator: let the producer exit.
+        stop.set()
+        producer.join(timeout=1.0)
@@ -0,0 +1,153 @@
+"""Near-duplicate sentiment reuse for rewritten headlines.
+
+Each scored text is turned into a cheap hashed bag-of-words/bigram vector
+(L2-normalised, stored as float16 in one preallocated matrix). Candidates for
+a new text come from random-hyperplane LSH buckets, and the best candidate
+within ``max_distance`` cosine distance donates its probabilities.
+
+We deliberately don't use the RoBERTa pooled embedding here: computing it
+costs the same forward pass the cache is trying to skip.
+
+Memory is capped at ``max_items`` rows; the oldest entry is evicted first
+(ring buffer). A fraction ``audit_rate`` of hits is also re-scored by the model,
+and the agreement rate is reported in ``stats()`` so we can see how often
+reuse disagrees with fresh inference.
+"""
+from __future__ import annotations
+
+import random
+import re
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        *,
+        max_items: int = 20000,
+        max_distance: float = 0.08,
+        dim: int = 512,
+        tables: int = 4,
+        bits: int = 12,
+        audit_rate: float = 0.05,
+        seed: int = 13,
+    ) -> None:
+        self.max_items = max(1, int(max_items))
+        self.max_distance = float(max_distance)
+        self.dim = int(dim)
+        self.audit_rate = float(audit_rate)
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((tables * bits, self.dim)).astype(np.float32)
+        self._tables = tables
+        self._bits = bits
+        self._weights = (1 << np.arange(bits, dtype=np.int64))
+
+        self._vectors = np.zeros((self.max_items, self.dim), dtype=np.float16)
+        self._probs = np.zeros((self.max_items, 3), dtype=np.float32)
+        self._keys: List[Optional[Tuple[int, ...]]] = [None] * self.max_items
+        self._buckets: List[Dict[int, Set[int]]] = [dict() for _ in range(tables)]
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.audits = 0
+        self.audit_agreements = 0
+        self.audit_abs_error = 0.0
+
+    # -- vectors -------------------------------------------------------
+
+    def vectorize(self, text: str) -> np.ndarray:
+        tokens = _TOKEN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feat in features:
+            h = zlib.crc32(feat.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def _signature(self, vec: np.ndarray) -> Tuple[int, ...]:
+        bits = (self._planes @ vec > 0).reshape(self._tables, self._bits)
+        return tuple(int(x) for x in bits @ self._weights)
+
+    # -- lookup / insert -----------------------------------------------
+
+    def lookup(self, text: str) -> Tuple[Optional[np.ndarray], float, np.ndarray, Tuple[int, ...]]:
+        """Return (probs or None, similarity, vector, signature) for ``text``."""
+        vec = self.vectorize(text)
+        sig = self._signature(vec)
+        with self._lock:
+            self.lookups += 1
+            candidates: Set[int] = set()
+            for t, key in enumerate(sig):
+                candidates |= self._buckets[t].get(key, set())
+            if not candidates or not vec.any():
+                return None, 0.0, vec, sig
+            idx = np.fromiter(candidates, dtype=np.int64)
+            sims = self._vectors[idx].astype(np.float32) @ vec
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if 1.0 - similarity > self.max_distance:
+                return None, similarity, vec, sig
+            self.hits += 1
+            return self._probs[idx[best]].copy(), similarity, vec, sig
+
+    def add(self, vec: np.ndarray, sig: Tuple[int, ...], probs: np.ndarray) -> None:
+        if not vec.any():
+            return
+        with self._lock:
+            slot = self._next
+            old = self._keys[slot]
+            if old is not None:
+                for t, key in enumerate(old):
+                    bucket = self._buckets[t].get(key)
+                    if bucket is not None:
+                        bucket.discard(slot)
+                        if not bucket:
+                            del self._buckets[t][key]
+            self._vectors[slot] = vec
+            self._probs[slot] = probs
+            self._keys[slot] = sig
+            for t, key in enumerate(sig):
+                self._buckets[t].setdefault(key, set()).add(slot)
+            self._next = (slot + 1) % self.max_items
+            self._size = min(self._size + 1, self.max_items)
+
+    def predict(self, text: str, infer: Callable[[str], np.ndarray]) -> Tuple[np.ndarray, Dict[str, object]]:
+        """Probabilities for ``text`` (negative, neutral, positive), reusing a near duplicate
+        when one is cached. ``infer`` runs the real model on a miss (and on audited hits)."""
+        cached, similarity, vec, sig = self.lookup(text)
+        if cached is None:
+            probs = infer(text)
+            self.add(vec, sig, probs)
+            return probs, {"reused": False}
+        if self.audit_rate > 0 and random.random() < self.audit_rate:
+            fresh = infer(text)
+            with self._lock:
+                self.audits += 1
+                self.audit_agreements += int(np.argmax(fresh) == np.argmax(cached))
+                self.audit_abs_error += float(np.abs(fresh - cached).max())
+            return fresh, {"reused": False, "audited": True, "similarity": round(similarity, 4)}
+        return cached, {"reused": True, "similarity": round(similarity, 4)}
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "size": self._size,
+                "max_items": self.max_items,
+                "memory_bytes": int(self._vectors.nbytes + self._probs.nbytes),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "audits": self.audits,
+                "audit_agreement_rate": round(self.audit_agreements / self.audits, 4) if self.audits else None,
+                "audit_mean_max_abs_error": round(self.audit_abs_error / self.audits, 4) if self.audits else None,
+            }
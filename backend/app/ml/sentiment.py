@@ -1,51 +1,162 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
+from ..metrics import MODEL_BATCH_SIZE, timed
+from .batch import LABELS, SentimentBatch, SentimentResult
+from .lexicon import find_sentiment_words
+from .pipeline import pipelined
+from .semantic_cache import SemanticCache
 
-LABELS = ["negative", "neutral", "positive"]
+if TYPE_CHECKING:
+    import torch
 
 
-def _softmax(x: np.ndarray) -> np.ndarray:
-    x = x - np.max(x)
-    e = np.exp(x)
-    return e / np.sum(e)
-
+MAX_LENGTH = 128
 
-@dataclass
-class SentimentResult:
-    positive: float
-    neutral: float
-    negative: float
 
-    def as_percentages(self) -> Dict[str, float]:
-        return {
-            "positive": round(self.positive * 100.0, 2),
-            "neutral": round(self.neutral * 100.0, 2),
-            "negative": round(self.negative * 100.0, 2),
-        }
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x = x - np.max(x, axis=-1, keepdims=True)
+    e = np.exp(x)
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+class TokenCache:
+    """LRU of token ids by text, filled ahead of time (e.g. for fetched news items)."""
+
+    def __init__(self, max_items: int = 10000) -> None:
+        self.max_items = max(0, int(max_items))
+        self._ids: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.strip().encode("utf-8"), digest_size=16).digest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        k = self.key(text)
+        with self._lock:
+            ids = self._ids.get(k)
+            if ids is None:
+                self.misses += 1
+                return None
+            self._ids.move_to_end(k)
+            self.hits += 1
+            return ids
+
+    def put(self, text: str, ids: Iterable[int]) -> None:
+        if not self.max_items:
+            return
+        k = self.key(text)
+        arr = np.asarray(ids, dtype=np.int32)
+        with self._lock:
+            self._ids[k] = arr
+            self._ids.move_to_end(k)
+            while len(self._ids) > self.max_items:
+                self._ids.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._ids), "max_items": self.max_items, "hits": self.hits, "misses": self.misses}
 
 
 class TwitterRobertaSentiment:
-    def __init__(self, model_name: str = "cardiffnlp/twitter-roberta-base-sentiment") -> None:
+    def __init__(
+        self,
+        model_name: str = "cardiffnlp/twitter-roberta-base-sentiment",
+        semantic_cache: Optional[SemanticCache] = None,
+        token_cache_size: int = 10000,
+    ) -> None:
+        # torch and transformers take seconds to import; only pay for that when a model is built.
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.semantic_cache = semantic_cache
+        self.token_cache = TokenCache(token_cache_size)
+        # One background thread for pretokenize(), so /api/fetch-news never waits on it.
+        self._pretokenizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pretokenize")
+
+    def _token_ids(self, texts: List[str]) -> List[np.ndarray]:
+        """Token ids per text: from the cache where present, the rest in one batch encode."""
+        ids: List[Optional[np.ndarray]] = [self.token_cache.get(t) for t in texts]
+        missing = [i for i, v in enumerate(ids) if v is None]
+        if missing:
+            encoded = self.tokenizer([texts[i] for i in missing], truncation=True, max_length=MAX_LENGTH)
+            for i, row in zip(missing, encoded["input_ids"]):
+                ids[i] = np.asarray(row, dtype=np.int32)
+        return ids  # type: ignore[return-value]
+
+    def _pad(self, ids: List[np.ndarray]) -> Dict[str, "torch.Tensor"]:
+        import torch
+
+        width = max(len(row) for row in ids)
+        input_ids = np.full((len(ids), width), self.tokenizer.pad_token_id, dtype=np.int64)
+        mask = np.zeros((len(ids), width), dtype=np.int64)
+        for i, row in enumerate(ids):
+            input_ids[i, : len(row)] = row
+            mask[i, : len(row)] = 1
+        return {"input_ids": torch.from_numpy(input_ids), "attention_mask": torch.from_numpy(mask)}
+
+    def _forward(self, encoded: Dict[str, "torch.Tensor"]) -> np.ndarray:
+        import torch
+
+        with timed("inference"), torch.inference_mode():
+            logits = self.model(**encoded).logits.cpu().numpy()
+        MODEL_BATCH_SIZE.observe(len(logits))
+        # Model order is: negative, neutral, positive
+        return _softmax(logits)
+
+    def pretokenize(self, texts: List[str]) -> None:
+        """Tokenize ``texts`` in the background and cache the ids for a later analyze call."""
+        texts = [t.strip() for t in texts if t and t.strip()]
+        if not texts or not self.token_cache.max_items:
+            return
+
+        def _run() -> None:
+            encoded = self.tokenizer(texts, truncation=True, max_length=MAX_LENGTH)
+            for text, row in zip(texts, encoded["input_ids"]):
+                self.token_cache.put(text, row)
+
+        self._pretokenizer.submit(_run)
+
+    def _prepare(self, texts: List[str]) -> Dict[str, "torch.Tensor"]:
+        with timed("tokenize"):
+            return self._pad(self._token_ids(texts))
+
+    def _infer(self, text: str) -> np.ndarray:
+        return self._forward(self._prepare([text]))[0]
+
+    def predict_batch(self, texts: List[str], batch_size: int = 32) -> SentimentBatch:
+        """Score many texts, padding per batch and tokenizing the next batch while the model runs.
+
+        Skips the semantic cache: batch callers (offline scoring, re-scoring) want fresh scores.
+        """
+        chunks = (texts[i : i + batch_size] for i in range(0, len(texts), batch_size))
+        parts = [SentimentBatch.from_probs(probs) for probs in pipelined(chunks, self._prepare, self._forward)]
+        return SentimentBatch.concat(parts)
+
+    def _predict(self, text: str) -> Tuple[np.ndarray, Dict]:
+        if self.semantic_cache is None:
+            return self._infer(text), {"reused": False}
+        return self.semantic_cache.predict(text, self._infer)
 
     def predict_proba(self, text: str) -> Dict[str, float]:
-        encoded = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
-        out = self.model(**encoded)
-        scores = out.logits.detach().cpu().numpy()[0]
-        probs = _softmax(scores)
-        # Model order is: negative, neutral, positive
+        probs, _ = self._predict(text)
         return {LABELS[i]: float(probs[i]) for i in range(3)}
     
     def analyze_with_explanation(self, text: str) -> Dict:
         """Analyze text and provide explanation for the sentiment classification"""
-        probs = self.predict_proba(text)
+        raw, cache_info = self._predict(text)
+        probs = {LABELS[i]: float(raw[i]) for i in range(3)}
         
         # Determine dominant sentiment
         dominant = max(probs.items(), key=lambda x: x[1])
@@ -53,21 +164,7 @@ class TwitterRobertaSentiment:
         confidence = dominant[1]
         
         # Extract key words (simple approach: look for sentiment indicators)
-        words = text.lower().split()
-        
-        # Common positive words
-        positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 
-                         'love', 'best', 'awesome', 'brilliant', 'perfect', 'outstanding',
-                         'positive', 'success', 'win', 'happy', 'joy', 'excited', 'proud']
-        
-        # Common negative words
-        negative_words = ['bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'disappointed',
-                         'sad', 'angry', 'frustrated', 'failed', 'problem', 'issue', 'crisis',
-                         'negative', 'worried', 'concerned', 'disaster', 'tragedy', 'loss']
-        
-        # Find sentiment words in the text
-        found_positive = [w for w in words if any(pos in w for pos in positive_words)]
-        found_negative = [w for w in words if any(neg in w for neg in negative_words)]
+        found_positive, found_negative = find_sentiment_words(text)
         
         # Generate explanation
         confidence_pct = round(confidence * 100, 1)
@@ -102,23 +199,9 @@ class TwitterRobertaSentiment:
             "key_words": {
                 "positive": list(set(found_positive[:5])),
                 "negative": list(set(found_negative[:5]))
-            }
+            },
+            "cache": cache_info,
         }
 
     def aggregate(self, texts: List[str]) -> SentimentResult:
-        if not texts:
-            return SentimentResult(positive=0.0, neutral=0.0, negative=0.0)
-
-        sums = {"positive": 0.0, "neutral": 0.0, "negative": 0.0}
-        for t in texts:
-            p = self.predict_proba(t)
-            for k in sums:
-                sums[k] += p[k]
-
-        n = float(len(texts))
-        return SentimentResult(
-            positive=sums["positive"] / n,
-            neutral=sums["neutral"] / n,
-            negative=sums["negative"] / n,
-        )
-
+        return self.predict_batch(texts).mean()
@@ -0,0 +1,246 @@
+"""The active sentiment model, hot swaps and re-scoring of stored results.
+
+The active model is held as one ``(version, model)`` tuple. A request reads it
+once with ``current()`` and uses that pair until it finishes, so a swap never
+disturbs requests already running on the old model; the old model is freed
+when the last of them is done. ``load(version)`` builds the new model in a
+background thread, so the process keeps serving on the warm model meanwhile,
+and replaces the tuple in a single assignment when the new one is ready.
+
+The version is the Hugging Face model name. It is stored with every score in
+searches.model_version and analyses.model_version.
+
+``Rescorer`` backfills stored analyses whose model_version is not the active
+version. It walks them in id order, ``RESCORE_BATCH_SIZE`` rows at a time, and
+updates each analysis together with its searches row (triggers keep stats and
+rollups in step). Each batch is one ``predict_batch`` call. It defers to live
+traffic: it only starts a batch when no request is queued for the model, takes
+one admission slot for the batch like a request would, and sleeps
+``RESCORE_PAUSE_MS`` between batches, so a smaller batch size hands the model
+back to requests sooner. searches rows
+without a stored text (from before analyses existed) keep their old version.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Flask
+
+from .admission import AdmissionController, Shed
+from .db import _connect
+
+logger = logging.getLogger(__name__)
+
+RESCORE_SLOT_DEADLINE_S = 60.0
+
+
+class Rescorer:
+    def __init__(
+        self,
+        registry: "ModelRegistry",
+        db_path: str,
+        admission: Optional[AdmissionController],
+        batch_size: int,
+        pause: float,
+    ) -> None:
+        self.registry = registry
+        self.db_path = db_path
+        self.admission = admission
+        self.batch_size = max(1, batch_size)
+        self.pause = pause
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.version: Optional[str] = None
+        self.rescored = 0
+        self.last_id = 0
+        self.finished_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        if self.running:
+            return False
+        self._stop.clear()
+        self.version, self.rescored, self.last_id, self.finished_at = None, 0, 0, None
+        self._thread = threading.Thread(target=self._run, name="model-rescore", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _slot(self):
+        if self.admission is None:
+            return nullcontext()
+        # A batch takes far longer than one request; don't let it inflate the wait
+        # estimate that sheds requests on "deadline".
+        return self.admission.admit("__rescore__", RESCORE_SLOT_DEADLINE_S, observe=False)
+
+    def _run(self) -> None:
+        conn = _connect(self.db_path)
+        try:
+            while not self._stop.is_set():
+                version, model = self.registry.current()
+                if version != self.version:
+                    # First batch, or the model was swapped again mid-run: start over.
+                    self.version, self.last_id = version, 0
+                rows = conn.execute(
+                    """SELECT id, search_id, text FROM analyses
+                       WHERE id > ? AND model_version IS NOT ?
+                       ORDER BY id LIMIT ?""",
+                    (self.last_id, version, self.batch_size),
+                ).fetchall()
+                if not rows:
+                    self.finished_at = time.time()
+                    return
+                if self._stop.is_set() or (self.admission is not None and not self.admission.idle()):
+                    self._stop.wait(self.pause)
+                    continue
+                try:
+                    with self._slot():
+                        batch = model.predict_batch([row["text"] for row in rows])
+                except Shed:
+                    self._stop.wait(self.pause)
+                    continue
+                rows_out = list(batch.rows([(r["id"], r["search_id"]) for r in rows]))
+                with conn:
+                    conn.executemany(
+                        """UPDATE analyses SET sentiment = ?, confidence = ?, positive = ?, neutral = ?,
+                               negative = ?, model_version = ? WHERE id = ?""",
+                        [(*scores, version, ids[0]) for ids, *scores in rows_out],
+                    )
+                    conn.executemany(
+                        "UPDATE searches SET positive = ?, neutral = ?, negative = ?, model_version = ? WHERE id = ?",
+                        [(*scores[2:], version, ids[1]) for ids, *scores in rows_out if ids[1] is not None],
+                    )
+                self.last_id = rows[-1]["id"]
+                self.rescored += len(rows)
+                self._stop.wait(self.pause)
+        except Exception as e:
+            logger.exception("Re-scoring failed")
+            self.last_error = str(e)
+        finally:
+            conn.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "version": self.version,
+            "rescored": self.rescored,
+            "last_id": self.last_id,
+            "finished_at": self.finished_at,
+            "last_error": self.last_error,
+        }
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        default_version: str,
+        db_path: str,
+        admission: Optional[AdmissionController] = None,
+        rescore_batch_size: int = 16,
+        rescore_pause: float = 0.2,
+    ) -> None:
+        self._factory = factory
+        self.default_version = default_version
+        self._active: Optional[Tuple[str, Any]] = None
+        self._first_load = threading.Lock()
+        self._state = threading.Lock()
+        self.loading: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.rescorer = Rescorer(self, db_path, admission, rescore_batch_size, rescore_pause)
+
+    def current(self) -> Tuple[str, Any]:
+        """The active (version, model), loading the default model on first use."""
+        active = self._active
+        if active is None:
+            with self._first_load:
+                if self._active is None:
+                    self._active = (self.default_version, self._factory(self.default_version))
+            active = self._active
+        return active
+
+    def peek(self) -> Optional[Tuple[str, Any]]:
+        """The active (version, model) if one is loaded, without loading."""
+        return self._active
+
+    def install(self, version: str, model: Any) -> None:
+        """Swap in an already-built model."""
+        self._active = (version, model)
+
+    def load(self, version: str, *, rescore: bool = False) -> bool:
+        """Build ``version`` in the background and swap it in; False if a load is already running."""
+        with self._state:
+            if self.loading is not None:
+                return False
+            self.loading = version
+        threading.Thread(target=self._load, args=(version, rescore), name="model-loader", daemon=True).start()
+        return True
+
+    def _load(self, version: str, rescore: bool) -> None:
+        try:
+            model = self._factory(version)
+        except Exception as e:
+            logger.exception("Loading model %s failed", version)
+            self.last_error = f"{version}: {e}"
+        else:
+            self.install(version, model)
+            self.last_error = None
+            logger.info("Model %s is now active", version)
+            if rescore:
+                self.rescorer.start()
+        finally:
+            with self._state:
+                self.loading = None
+
+    def status(self) -> Dict[str, Any]:
+        active = self._active
+        return {
+            "active": active[0] if active else None,
+            "default": self.default_version,
+            "loading": self.loading,
+            "last_error": self.last_error,
+            "rescore": self.rescorer.status(),
+        }
+
+
+def build_semantic_cache(config):
+    """Near-duplicate result reuse, if SEMANTIC_CACHE_ENABLED is set. Each model gets its own cache."""
+    if not config.get("SEMANTIC_CACHE_ENABLED"):
+        return None
+    from .ml.semantic_cache import SemanticCache
+    return SemanticCache(
+        max_items=config["SEMANTIC_CACHE_MAX_ITEMS"],
+        max_distance=config["SEMANTIC_CACHE_MAX_DISTANCE"],
+        audit_rate=config["SEMANTIC_CACHE_AUDIT_RATE"],
+    )
+
+
+def init_model_registry(app: Flask) -> None:
+    config = app.config
+
+    def factory(version: str):
+        from .ml.sentiment import TwitterRobertaSentiment
+        return TwitterRobertaSentiment(
+            version,
+            semantic_cache=build_semantic_cache(config),
+            token_cache_size=config["TOKEN_CACHE_MAX_ITEMS"],
+        )
+
+    app.extensions["models"] = ModelRegistry(
+        factory,
+        config["SENTIMENT_MODEL"],
+        config["SQLITE_PATH"],
+        admission=app.extensions.get("admission"),
+        rescore_batch_size=config["RESCORE_BATCH_SIZE"],
+        rescore_pause=config["RESCORE_PAUSE_MS"] / 1000.0,
+    )
@@ -0,0 +1,28 @@
+"""NewsAPI client for the event loop (app.asgi): same request and parsing, awaited with httpx."""
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List, Optional
+
+import httpx
+
+from ..quota import QuotaManager
+from .client import UPSTREAM_TIMEOUT, NewsAPIClient
+
+
+class AsyncNewsAPIClient(NewsAPIClient):
+    def __init__(
+        self, api_key: str, http: httpx.AsyncClient, base_url: str = "", quota: Optional[QuotaManager] = None
+    ) -> None:
+        super().__init__(api_key, base_url, quota=quota)
+        self.http = http
+
+    async def search_articles(self, query: str, max_results: int = 20, priority: str = "user") -> List[Dict[str, str]]:
+        url, params, headers = self._request(query, max_results)
+        # Quota bookkeeping is a short SQLite transaction; keep it off the loop anyway.
+        if self.quota is not None:
+            await asyncio.to_thread(self.quota.acquire, "newsapi", priority)
+        resp = await self.http.get(url, params=params, headers=headers, timeout=UPSTREAM_TIMEOUT)
+        if self.quota is not None:
+            await asyncio.to_thread(self.quota.report, "newsapi", resp.status_code, resp.headers)
+        return self._parse(resp, max_results)
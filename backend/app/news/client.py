@@ -1,26 +1,26 @@
 """NewsAPI client for fetching real-time news articles"""
 from __future__ import annotations
 
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Tuple
 
-import requests
+from ..quota import QuotaManager
+
+UPSTREAM_TIMEOUT = 20
 
 
 class NewsAPIClient:
     BASE_URL = "https://newsapi.org/v2"
 
-    def __init__(self, api_key: str) -> None:
+    def __init__(self, api_key: str, base_url: str = "", quota: Optional[QuotaManager] = None) -> None:
         self.api_key = api_key
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.quota = quota
 
-    def search_articles(self, query: str, max_results: int = 20) -> List[Dict[str, str]]:
-        """
-        Search for news articles by keyword.
-        Returns list of articles with title and description.
-        """
+    def _request(self, query: str, max_results: int) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """(url, params, headers) for a search; shared with AsyncNewsAPIClient."""
         if not self.api_key:
             raise RuntimeError("NEWS_API_KEY is not set")
-
-        url = f"{self.BASE_URL}/everything"
+        url = f"{self.base_url}/everything"
         params = {
             "q": query,
             "language": "en",
@@ -28,10 +28,12 @@ class NewsAPIClient:
             "pageSize": min(max_results, 100),  # NewsAPI max is 100
             "apiKey": self.api_key,
         }
-        
         headers = {"User-Agent": "Twitter-Sentiment-Analysis/1.0"}
-        resp = requests.get(url, params=params, headers=headers, timeout=20)
-        
+        return url, params, headers
+
+    @staticmethod
+    def _parse(resp, max_results: int) -> List[Dict[str, str]]:
+        """Articles from a response (requests or httpx, same interface)."""
         if resp.status_code == 401:
             raise RuntimeError("NewsAPI authentication failed. Check your API key.")
         elif resp.status_code == 429:
@@ -59,3 +61,19 @@ class NewsAPIClient:
                 })
         
         return result[:max_results]
+
+    def search_articles(self, query: str, max_results: int = 20, priority: str = "user") -> List[Dict[str, str]]:
+        """
+        Search for news articles by keyword.
+        Returns list of articles with title and description.
+        Raises QuotaExceeded without calling NewsAPI when the shared budget is spent.
+        """
+        url, params, headers = self._request(query, max_results)
+        if self.quota is not None:
+            self.quota.acquire("newsapi", priority)
+        import requests  # loaded on the first sync call, not when create_app() imports the routes
+
+        resp = requests.get(url, params=params, headers=headers, timeout=UPSTREAM_TIMEOUT)
+        if self.quota is not None:
+            self.quota.report("newsapi", resp.status_code, resp.headers)
+        return self._parse(resp, max_results)
@@ -0,0 +1,140 @@
+"""On-demand profiling for production: a stack-sampling profiler and per-request cProfile.
+
+Nothing runs while idle. ``POST /api/admin/profile`` starts one sampler thread
+that reads ``sys._current_frames()`` every ``interval`` seconds for ``seconds``
+seconds, and ``GET /api/admin/profile`` returns the result in collapsed-stack
+format (one ``frame;frame;frame count`` line per stack), ready for
+flamegraph.pl or speedscope. Only one sampling run is active at a time.
+
+A request sent with ``X-Profile: 1`` by a logged-in admin (or with
+``X-Profile: <PROFILE_TOKEN>``) runs under cProfile. Its report is kept in a
+small ring buffer and listed by ``GET /api/admin/profile/requests``. The
+response carries an ``X-Profile-Id`` header.
+"""
+from __future__ import annotations
+
+import collections
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Deque, Dict, List, Optional
+
+from flask import Flask, g, request, session
+
+MAX_SECONDS = 120.0
+MIN_INTERVAL = 0.001
+
+
+class StackSampler:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.seconds = 0.0
+        self.interval = 0.0
+        self.samples = 0
+        self._stacks: collections.Counter = collections.Counter()
+        self.result: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: float) -> bool:
+        """Start a sampling run; returns False if one is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self.seconds = min(max(seconds, 0.1), MAX_SECONDS)
+            self.interval = max(interval, MIN_INTERVAL)
+            self.samples = 0
+            self._stacks = collections.Counter()
+            self.result = None
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+            return True
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        parts: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(parts))
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                thread_name = names.get(ident, str(ident))
+                self._stacks[f"{thread_name};{self._collapse(frame)}"] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        self.result = "".join(f"{stack} {n}\n" for stack, n in self._stacks.most_common())
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "ready": self.result is not None,
+        }
+
+
+SAMPLER = StackSampler()
+_request_profiles: Deque[Dict[str, object]] = collections.deque(maxlen=20)
+_profile_ids = itertools.count(1)
+
+
+def recent_request_profiles() -> List[Dict[str, object]]:
+    return list(_request_profiles)
+
+
+def init_profiling(app: Flask) -> None:
+    @app.before_request
+    def _maybe_start_cprofile():
+        flag = request.headers.get("X-Profile")
+        if not flag:
+            return
+        token = app.config.get("PROFILE_TOKEN")
+        allowed = (flag == "1" and session.get("admin_logged_in")) or (token and flag == token)
+        if not allowed:
+            return
+        profiler = cProfile.Profile()
+        g._cprofile = profiler
+        profiler.enable()
+
+    @app.after_request
+    def _maybe_stop_cprofile(response):
+        profiler = g.pop("_cprofile", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        profile_id = next(_profile_ids)
+        _request_profiles.append({
+            "id": profile_id,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "created_at": time.time(),
+            "report": out.getvalue(),
+        })
+        response.headers["X-Profile-Id"] = str(profile_id)
+        return response
@@ -0,0 +1,244 @@
+"""Shared upstream quota manager for NewsAPI and Twitter.
+
+Budgets live in the ``upstream_quota`` table of their own SQLite file
+(QUOTA_DB_PATH, created by ``db.create_quota_schema``), so they survive
+restarts and are shared by every worker process without holding the lock of
+the main database. Each upstream call first runs ``acquire()`` in
+a ``BEGIN IMMEDIATE`` transaction, which:
+
+* refuses while a server-imposed block (``Retry-After``, or a rate-limit
+  header with 0 remaining) is in force,
+* refills a token bucket (``*_RATE_PER_MIN`` tokens per minute, capped at
+  ``*_BURST``) and takes one token,
+* counts the call against the daily budget (``*_DAILY_LIMIT``, reset at UTC
+  midnight; 0 means no daily cap). The last ``QUOTA_RESERVE_FRACTION`` of the
+  budget is held back for ``trending`` priority, i.e. keywords currently in
+  the trending list, so ad-hoc searches can't spend the calls that keep
+  popular topics fresh.
+
+When a call is refused, ``QuotaExceeded`` (a RuntimeError, like the clients'
+other failures) is raised with the reason and how long to wait, and no HTTP
+request is made. ``report()`` reads each response's status and rate-limit
+headers and stores them, so the next decision uses what the upstream said.
+"""
+from __future__ import annotations
+
+import math
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from flask import Flask, current_app
+
+from .db import _connect
+from .metrics import REGISTRY, Counter
+
+PRIORITIES = ("trending", "user")
+DEFAULT_BLOCK_SECONDS = 60.0
+
+QUOTA_DENIED = REGISTRY.register(Counter(
+    "app_upstream_quota_denied_total", "Upstream calls refused before sending, by source and reason.",
+    ("source", "reason"),
+))
+
+
+class QuotaExceeded(RuntimeError):
+    def __init__(self, source: str, reason: str, retry_after: float) -> None:
+        super().__init__(f"{source} quota: {reason}, retry in {math.ceil(retry_after)}s")
+        self.source = source
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class SourceLimits:
+    daily_limit: int  # 0 = no daily cap
+    rate_per_min: float
+    burst: float
+
+
+def _utc_day(now: float) -> str:
+    return datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _seconds_to_midnight(now: float) -> float:
+    current = datetime.fromtimestamp(now, timezone.utc)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - current).total_seconds()
+
+
+def _retry_after_seconds(value: Optional[str], now: float) -> Optional[float]:
+    """Parse a Retry-After header: delta seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class QuotaManager:
+    def __init__(self, db_path: str, limits: Dict[str, SourceLimits], reserve_fraction: float = 0.2) -> None:
+        self.db_path = db_path
+        self.limits = limits
+        self.reserve_fraction = min(max(reserve_fraction, 0.0), 1.0)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = _connect(self.db_path)
+        conn.isolation_level = None  # explicit BEGIN IMMEDIATE below
+        return conn
+
+    def _load(self, conn: sqlite3.Connection, source: str, now: float) -> Dict[str, Any]:
+        limits = self.limits[source]
+        row = conn.execute("SELECT * FROM upstream_quota WHERE source = ?", (source,)).fetchone()
+        if row is None:
+            state = {"source": source, "day": _utc_day(now), "used": 0, "tokens": limits.burst,
+                     "refilled_at": now, "blocked_until": 0.0, "upstream_remaining": None, "upstream_reset": None}
+        else:
+            state = dict(row)
+        if state["day"] != _utc_day(now):
+            state["day"], state["used"] = _utc_day(now), 0
+        elapsed = max(0.0, now - state["refilled_at"])
+        state["tokens"] = min(limits.burst, state["tokens"] + elapsed * limits.rate_per_min / 60.0)
+        state["refilled_at"] = now
+        if state["upstream_reset"] is not None and now >= state["upstream_reset"]:
+            state["upstream_remaining"] = state["upstream_reset"] = None
+        return state
+
+    @staticmethod
+    def _save(conn: sqlite3.Connection, state: Dict[str, Any]) -> None:
+        conn.execute(
+            """INSERT INTO upstream_quota
+                 (source, day, used, tokens, refilled_at, blocked_until, upstream_remaining, upstream_reset)
+               VALUES (:source, :day, :used, :tokens, :refilled_at, :blocked_until, :upstream_remaining, :upstream_reset)
+               ON CONFLICT(source) DO UPDATE SET
+                 day = excluded.day, used = excluded.used, tokens = excluded.tokens,
+                 refilled_at = excluded.refilled_at, blocked_until = excluded.blocked_until,
+                 upstream_remaining = excluded.upstream_remaining, upstream_reset = excluded.upstream_reset""",
+            state,
+        )
+
+    def _deny(self, source: str, reason: str, retry_after: float) -> QuotaExceeded:
+        QUOTA_DENIED.inc(source=source, reason=reason)
+        return QuotaExceeded(source, reason, retry_after)
+
+    def acquire(self, source: str, priority: str = "user") -> None:
+        """Take one call from ``source``'s budget, or raise QuotaExceeded without touching the network."""
+        if source not in self.limits:
+            return
+        limits = self.limits[source]
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                state = self._load(conn, source, now)
+                if state["blocked_until"] > now:
+                    raise self._deny(source, "retry_after", state["blocked_until"] - now)
+                if state["upstream_remaining"] is not None and state["upstream_remaining"] <= 0:
+                    raise self._deny(source, "upstream_limit", (state["upstream_reset"] or now) - now)
+                if limits.daily_limit > 0:
+                    reserve = math.ceil(limits.daily_limit * self.reserve_fraction) if priority != "trending" else 0
+                    if state["used"] >= limits.daily_limit - reserve:
+                        reason = "daily_reserved" if state["used"] < limits.daily_limit else "daily_limit"
+                        raise self._deny(source, reason, _seconds_to_midnight(now))
+                if limits.rate_per_min > 0:
+                    if state["tokens"] < 1.0:
+                        raise self._deny(source, "rate", (1.0 - state["tokens"]) * 60.0 / limits.rate_per_min)
+                    state["tokens"] -= 1.0
+                state["used"] += 1
+                if state["upstream_remaining"] is not None:
+                    state["upstream_remaining"] -= 1
+                self._save(conn, state)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def report(self, source: str, status: int, headers: Mapping[str, str]) -> None:
+        """Record what the upstream said about its limits after a call."""
+        if source not in self.limits:
+            return
+        now = time.time()
+        remaining = headers.get("x-rate-limit-remaining") or headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-rate-limit-reset") or headers.get("x-ratelimit-reset")
+        retry_after = _retry_after_seconds(headers.get("Retry-After"), now)
+        if status != 429 and remaining is None:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                state = self._load(conn, source, now)
+                if remaining is not None:
+                    try:
+                        state["upstream_remaining"] = int(remaining)
+                        # Twitter sends the reset as epoch seconds.
+                        state["upstream_reset"] = float(reset) if reset else now + DEFAULT_BLOCK_SECONDS
+                    except ValueError:
+                        pass
+                if status == 429:
+                    if retry_after is None and state["upstream_reset"]:
+                        retry_after = state["upstream_reset"] - now
+                    if retry_after is None and self.limits[source].daily_limit > 0:
+                        # NewsAPI's 429 means the daily allowance is gone.
+                        state["used"] = max(state["used"], self.limits[source].daily_limit)
+                    state["blocked_until"] = now + (retry_after if retry_after is not None else DEFAULT_BLOCK_SECONDS)
+                self._save(conn, state)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def status(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        conn = _connect(self.db_path)
+        try:
+            out = []
+            for source, limits in self.limits.items():
+                state = self._load(conn, source, now)
+                reserve = math.ceil(limits.daily_limit * self.reserve_fraction) if limits.daily_limit else 0
+                out.append({
+                    "source": source,
+                    "daily_limit": limits.daily_limit,
+                    "used_today": state["used"],
+                    "reserved_for_trending": reserve,
+                    "tokens": round(state["tokens"], 2),
+                    "rate_per_min": limits.rate_per_min,
+                    "blocked_for_seconds": round(max(0.0, state["blocked_until"] - now), 1),
+                    "upstream_remaining": state["upstream_remaining"],
+                })
+            return out
+        finally:
+            conn.close()
+
+
+def init_quota(app: Flask) -> None:
+    config = app.config
+    app.extensions["quota"] = QuotaManager(
+        config["QUOTA_DB_PATH"],
+        {
+            "newsapi": SourceLimits(
+                config["NEWS_API_DAILY_LIMIT"], config["NEWS_API_RATE_PER_MIN"], config["NEWS_API_BURST"]
+            ),
+            "twitter": SourceLimits(
+                config["TWITTER_DAILY_LIMIT"], config["TWITTER_RATE_PER_MIN"], config["TWITTER_BURST"]
+            ),
+        },
+        reserve_fraction=config["QUOTA_RESERVE_FRACTION"],
+    )
+
+
+def get_quota() -> Optional[QuotaManager]:
+    return current_app.extensions.get("quota")
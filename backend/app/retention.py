@@ -0,0 +1,215 @@
+"""Activity log retention: roll old rows out of activity_log into archive files.
+
+Rows older than ACTIVITY_RETENTION_DAYS are moved, one day at a time, into
+gzip NDJSON segments (``activity-YYYY-MM-DD.ndjson.gz``) under
+ACTIVITY_ARCHIVE_DIR, next to a small ``index.json`` listing each segment's
+row count and id range. Each day is archived and deleted inside one
+``BEGIN IMMEDIATE`` transaction, so concurrent workers cannot archive the same
+rows twice. If a run dies after writing a segment but before committing the
+delete, the rows are archived again next time; ``read_archive`` drops the
+duplicate ids, and the index entry is recounted from the segment, so it
+doesn't count them twice either.
+
+Run manually with ``python -m app.retention`` from the backend folder.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import Flask
+
+from .db import _connect
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["id", "action", "actor_type", "user_id", "payload", "ip_address", "user_agent", "created_at"]
+INDEX_FILE = "index.json"
+FETCH_SIZE = 1000
+
+
+def _segment_name(day: str) -> str:
+    return f"activity-{day}.ndjson.gz"
+
+
+def load_index(archive_dir: str) -> Dict[str, Dict[str, Any]]:
+    path = Path(archive_dir) / INDEX_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_index(archive_dir: str, index: Dict[str, Dict[str, Any]]) -> None:
+    path = Path(archive_dir) / INDEX_FILE
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _segment_entry(segment: Path) -> Dict[str, Any]:
+    """The index entry for a segment, counted from the file itself: a rerun after a
+    rolled-back delete leaves the same entry however often the rows were appended."""
+    ids = set()
+    with gzip.open(segment, "rt", encoding="utf-8") as f:
+        for line in f:
+            ids.add(json.loads(line)["id"])
+    return {"file": segment.name, "rows": len(ids), "min_id": min(ids), "max_id": max(ids)}
+
+
+def roll_over(db_path: str, archive_dir: str, retention_days: int) -> Dict[str, int]:
+    """Move activity_log rows older than ``retention_days`` into archive segments.
+    ``db_path`` is the activity database (ACTIVITY_DB_PATH).
+
+    Returns ``{day: rows_archived}`` for this run.
+    """
+    if retention_days <= 0:
+        return {}
+    Path(archive_dir).mkdir(parents=True, exist_ok=True)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+    conn = _connect(db_path)
+    conn.isolation_level = None  # explicit BEGIN/COMMIT below
+    archived: Dict[str, int] = {}
+    try:
+        days = [
+            r[0]
+            for r in conn.execute(
+                "SELECT DISTINCT substr(created_at, 1, 10) FROM activity_log WHERE created_at < ? ORDER BY 1",
+                (cutoff,),
+            )
+        ]
+        for day in days:
+            n = _archive_day(conn, archive_dir, day)
+            if n:
+                archived[day] = n
+    finally:
+        conn.close()
+    if archived:
+        logger.info("Archived %d activity_log rows across %d day(s)", sum(archived.values()), len(archived))
+    return archived
+
+
+def _archive_day(conn, archive_dir: str, day: str) -> int:
+    start, end = day, (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cur = conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM activity_log WHERE created_at >= ? AND created_at < ? ORDER BY id",
+            (start, end),
+        )
+        count = 0
+        segment = Path(archive_dir) / _segment_name(day)
+        # Append as a new gzip member; readers see concatenated members as one stream.
+        with gzip.open(segment, "at", encoding="utf-8") as f:
+            while True:
+                rows = cur.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    f.write(json.dumps(dict(zip(COLUMNS, tuple(row))), default=str) + "\n")
+                count += len(rows)
+        cur.close()
+        with open(segment, "rb") as f:
+            os.fsync(f.fileno())
+        if count:
+            conn.execute("DELETE FROM activity_log WHERE created_at >= ? AND created_at < ?", (start, end))
+            index = load_index(archive_dir)
+            index[day] = _segment_entry(segment)
+            _save_index(archive_dir, index)
+        conn.execute("COMMIT")
+        return count
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def read_archive(
+    archive_dir: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    *,
+    action: Optional[str] = None,
+    actor_type: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield archived rows with ``since <= created_at < until``, oldest day first.
+
+    Only segments whose day overlaps the range are opened (found via the index).
+    """
+    index = load_index(archive_dir)
+    since_day = since[:10] if since else None
+    until_day = until[:10] if until else None
+    for day in sorted(index):
+        if since_day and day < since_day:
+            continue
+        if until_day and day > until_day:
+            break
+        seen: set = set()
+        with gzip.open(Path(archive_dir) / index[day]["file"], "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if row["id"] in seen:
+                    continue
+                seen.add(row["id"])
+                if since and row["created_at"] < since:
+                    continue
+                if until and row["created_at"] >= until:
+                    continue
+                if action and row["action"] != action:
+                    continue
+                if actor_type and row["actor_type"] != actor_type:
+                    continue
+                if user_id is not None and row["user_id"] != user_id:
+                    continue
+                yield row
+
+
+def init_retention(app: Flask) -> None:
+    """Start the periodic rollover thread when ACTIVITY_ROLLOVER_HOURS > 0."""
+    hours = app.config.get("ACTIVITY_ROLLOVER_HOURS", 0)
+    days = app.config.get("ACTIVITY_RETENTION_DAYS", 0)
+    if hours <= 0 or days <= 0:
+        return
+    db_path, archive_dir = app.config["ACTIVITY_DB_PATH"], app.config["ACTIVITY_ARCHIVE_DIR"]
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while not stop.wait(hours * 3600):
+            try:
+                roll_over(db_path, archive_dir, days)
+            except Exception:
+                logger.exception("Activity log rollover failed")
+
+    thread = threading.Thread(target=_loop, name="activity-rollover", daemon=True)
+    thread.start()
+    app.extensions["activity_rollover"] = stop
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    from .config import Config
+
+    config = Config()
+    parser = argparse.ArgumentParser(description="Archive old activity_log rows")
+    parser.add_argument("--days", type=int, default=config.ACTIVITY_RETENTION_DAYS, help="retention window in days")
+    parser.add_argument("--archive-dir", default=config.ACTIVITY_ARCHIVE_DIR)
+    parser.add_argument("--db", default=config.ACTIVITY_DB_PATH, help="activity database")
+    args = parser.parse_args(argv)
+    archived = roll_over(args.db, args.archive_dir, args.days)
+    for day, n in archived.items():
+        print(f"{day}: {n} rows")
+    print(f"Archived {sum(archived.values())} rows into {args.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
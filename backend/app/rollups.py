@@ -0,0 +1,79 @@
+"""Read helpers for the search_rollups / activity rollup tables (see db.py)."""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import ALL_KEYWORDS, ROLLUP_GRANULARITIES, query_all
+
+LABELS = ("positive", "neutral", "negative")
+Z_95 = 1.96
+
+
+def bucket_range(granularity: str, since: Optional[str], until: Optional[str]) -> Tuple[str, str]:
+    """Normalise since/until for a bucket query, defaulting to the last 30 days or 48 hours."""
+    now = datetime.now(timezone.utc)
+    default_since = now - (timedelta(days=30) if granularity == "day" else timedelta(hours=48))
+    since = (since or "").strip() or default_since.strftime("%Y-%m-%d %H:00:00")
+    until = (until or "").strip() or "9999"
+    if granularity == "day":
+        since = since[:10]
+    return since, until
+
+
+def _label_stats(n: int, total: float, squares: float) -> Dict[str, Any]:
+    mean = total / n
+    if n < 2:
+        # One sample has no spread to estimate; a zero-width band would read as certainty.
+        return {"mean": round(mean, 2), "stddev": None, "low": None, "high": None}
+    variance = max(0.0, (squares - total * total / n) / (n - 1))
+    half_width = Z_95 * math.sqrt(variance / n)
+    return {
+        "mean": round(mean, 2),
+        "stddev": round(math.sqrt(variance), 2),
+        "low": round(max(0.0, mean - half_width), 2),
+        "high": round(min(100.0, mean + half_width), 2),
+    }
+
+
+def search_series(
+    keyword: Optional[str],
+    granularity: str = "day",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Bucketed sentiment for one keyword (or all keywords when ``keyword`` is None).
+
+    Each point has the number of analyses, the mean of each label and a 95%
+    confidence band on that mean, all computed from the stored sums. Buckets
+    with a single analysis have ``band`` and ``stddev`` set to None.
+    """
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError("granularity must be hour or day")
+    since, until = bucket_range(granularity, since, until)
+    rows = query_all(
+        """SELECT bucket, analyses, sum_positive, sum_neutral, sum_negative,
+                  sq_positive, sq_neutral, sq_negative
+           FROM search_rollups
+           WHERE granularity = ? AND keyword = ? AND bucket >= ? AND bucket < ?
+           ORDER BY bucket LIMIT 1000""",
+        (granularity, keyword or ALL_KEYWORDS, since, until),
+    )
+    series = []
+    for r in rows:
+        n = r["analyses"]
+        if not n:
+            continue
+        stats = {label: _label_stats(n, r[f"sum_{label}"], r[f"sq_{label}"]) for label in LABELS}
+        series.append({
+            "bucket": r["bucket"],
+            "analyses": n,
+            "mean": {label: stats[label]["mean"] for label in LABELS},
+            "band": (
+                {label: {"low": stats[label]["low"], "high": stats[label]["high"]} for label in LABELS}
+                if n > 1 else None
+            ),
+            "stddev": {label: stats[label]["stddev"] for label in LABELS} if n > 1 else None,
+        })
+    return series
@@ -0,0 +1,329 @@
+"""Trending topics computed from traffic with a decayed Space-Saving sketch.
+
+Every keyword passed to ``/api/fetch-news`` or ``/api/analyze`` is recorded in a
+fixed-size Space-Saving summary (Metwally et al.), so memory stays bounded no
+matter how many distinct keywords arrive. Counts decay exponentially with a
+configurable half-life, so old bursts fade out. Decay is applied lazily: each
+hit is recorded with weight ``2 ** ((t - t0) / half_life)`` against a fixed
+origin ``t0``, and reads divide by the current factor. The smallest counter,
+evicted when a new keyword arrives, is found through a min-heap, so
+``record()`` is O(log capacity).
+
+Each worker snapshots its own counters to ``trending_snapshot`` periodically,
+under a worker id of its own, so workers don't overwrite each other. On first
+use (never while building the app) a worker loads every worker's rows, merged,
+as a read-only baseline; the list it serves is that baseline plus its own
+traffic, and it only ever writes its own traffic back.
+"""
+from __future__ import annotations
+
+import atexit
+import heapq
+import logging
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from flask import Flask, current_app
+
+from .db import _connect
+
+logger = logging.getLogger(__name__)
+
+# Editorial seed list: used to fill the list while there is little traffic and
+# to give known topics a category.
+SEED_TOPICS = [
+    {"title": "India Budget 2025", "category": "Politics"},
+    {"title": "Artificial Intelligence", "category": "Technology"},
+    {"title": "Climate Change", "category": "Environment"},
+    {"title": "Global Economy", "category": "Business"},
+    {"title": "Space Exploration", "category": "Science"},
+    {"title": "Electric Vehicles", "category": "Technology"},
+    {"title": "Healthcare Innovation", "category": "Health"},
+    {"title": "Cryptocurrency", "category": "Finance"},
+    {"title": "Renewable Energy", "category": "Environment"},
+    {"title": "Education Technology", "category": "Education"},
+    {"title": "Social Media", "category": "Technology"},
+    {"title": "Sports News", "category": "Sports"},
+]
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_keyword(keyword: str) -> str:
+    return _WS.sub(" ", keyword).strip().casefold()
+
+
+class SpaceSaving:
+    """Top-k heavy hitters over a stream with exponential time decay."""
+
+    def __init__(self, capacity: int = 256, half_life: float = 6 * 3600.0) -> None:
+        self.capacity = max(1, int(capacity))
+        self.half_life = float(half_life)
+        self._origin = time.time()
+        # key -> [scaled count, scaled overestimation error, display title, heap id]
+        self._counters: Dict[str, list] = {}
+        # One [count, heap id, key] per counter. Counts only grow between pushes, so
+        # a heap count is a lower bound and is refreshed lazily when it reaches the top.
+        self._heap: List[list] = []
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _scale(self, now: float) -> float:
+        return 2.0 ** ((now - self._origin) / self.half_life)
+
+    def _rebase(self, now: float) -> None:
+        # Keep scaled values from overflowing by moving the origin forward.
+        factor = self._scale(now)
+        for entry in self._counters.values():
+            entry[0] /= factor
+            entry[1] /= factor
+        self._origin = now
+        self._reheap()
+
+    def _reheap(self) -> None:
+        self._heap = [[entry[0], entry[3], key] for key, entry in self._counters.items()]
+        heapq.heapify(self._heap)
+
+    def _add(self, key: str, count: float, error: float, title: str) -> None:
+        self._next_id += 1
+        self._counters[key] = [count, error, title, self._next_id]
+        heapq.heappush(self._heap, [count, self._next_id, key])
+
+    def _evict_min(self) -> list:
+        """Remove and return the entry with the smallest count."""
+        while True:
+            count, heap_id, key = heapq.heappop(self._heap)
+            entry = self._counters.get(key)
+            if entry is None or entry[3] != heap_id:
+                continue  # left over from an evicted counter
+            if entry[0] != count:
+                heapq.heappush(self._heap, [entry[0], heap_id, key])
+                continue
+            return self._counters.pop(key)
+
+    def record(self, keyword: str, weight: float = 1.0, now: Optional[float] = None) -> None:
+        key = normalize_keyword(keyword)
+        if not key:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self._origin > 64 * self.half_life:
+                self._rebase(now)
+            w = weight * self._scale(now)
+            entry = self._counters.get(key)
+            if entry is not None:
+                entry[0] += w
+                entry[2] = keyword.strip()
+            elif len(self._counters) < self.capacity:
+                self._add(key, w, 0.0, keyword.strip())
+            else:
+                floor = self._evict_min()[0]
+                self._add(key, floor + w, floor, keyword.strip())
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Dict[str, object]]:
+        now = time.time() if now is None else now
+        with self._lock:
+            factor = self._scale(now)
+            # Rank by the guaranteed count (count - error) so keywords that only
+            # inherited a large floor on eviction don't crowd out real hitters.
+            best = heapq.nlargest(k, self._counters.items(), key=lambda item: item[1][0] - item[1][1])
+            return [
+                {"keyword": key, "title": e[2], "score": (e[0] - e[1]) / factor, "error": e[1] / factor}
+                for key, e in best
+            ]
+
+    def dump(self, now: Optional[float] = None) -> List[tuple]:
+        now = time.time() if now is None else now
+        with self._lock:
+            factor = self._scale(now)
+            return [(key, e[2], e[0] / factor, e[1] / factor, now) for key, e in self._counters.items()]
+
+    def load(self, rows: List[tuple], now: Optional[float] = None) -> None:
+        """Add (keyword, title, count, error, updated_at) rows, decaying them to ``now``.
+
+        Rows for the same keyword (from different workers) are summed.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            factor = self._scale(now)
+            for key, title, count, error, updated_at in rows:
+                decay = 2.0 ** (-max(0.0, now - updated_at) / self.half_life)
+                entry = self._counters.setdefault(key, [0.0, 0.0, title, 0])
+                entry[0] += count * decay * factor
+                entry[1] += error * decay * factor
+            for entry in self._counters.values():
+                self._next_id += 1
+                entry[3] = self._next_id
+            self._reheap()
+            while len(self._counters) > self.capacity:
+                self._evict_min()
+
+
+def merged_top(sketches: List[SpaceSaving], k: int, now: Optional[float] = None) -> List[Dict[str, object]]:
+    """Top ``k`` over several sketches, summing each keyword's counts and errors."""
+    now = time.time() if now is None else now
+    merged: Dict[str, list] = {}
+    for sketch in sketches:
+        for key, title, count, error, _ in sketch.dump(now):
+            entry = merged.setdefault(key, [0.0, 0.0, title])
+            entry[0] += count
+            entry[1] += error
+            entry[2] = title
+    best = heapq.nlargest(k, merged.items(), key=lambda item: item[1][0] - item[1][1])
+    return [{"keyword": key, "title": e[2], "score": e[0] - e[1], "error": e[1]} for key, e in best]
+
+
+class TrendingTracker:
+    """This worker's sketch, the restored snapshots, and its periodic SQLite snapshot."""
+
+    # Snapshot rows this many half-lives old have decayed to nothing and are deleted.
+    EXPIRE_HALF_LIVES = 16
+
+    def __init__(self, db_path: str, capacity: int, half_life: float, snapshot_seconds: float) -> None:
+        self.db_path = db_path
+        self.worker_id = uuid.uuid4().hex[:12]
+        self.sketch = SpaceSaving(capacity, half_life)  # traffic seen by this worker
+        self.baseline = SpaceSaving(capacity, half_life)  # all workers' snapshots, loaded once
+        self.snapshot_seconds = snapshot_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._dirty = False
+        self._restored = False
+        self.version = 0  # bumped on every record; used as the /api/trending validator
+
+    def restore(self) -> None:
+        conn = _connect(self.db_path)
+        try:
+            rows = [tuple(r) for r in conn.execute(
+                "SELECT keyword, title, count, error, updated_at FROM trending_snapshot"
+            )]
+        finally:
+            conn.close()
+        self.baseline.load(rows)
+        self.version += 1
+
+    def _ensure_restored(self) -> None:
+        """Load the last snapshot once, on first use rather than in create_app()."""
+        if self._restored:
+            return
+        with self._start_lock:
+            if self._restored:
+                return
+            try:
+                self.restore()
+            except Exception:
+                logger.warning("Could not restore trending snapshot", exc_info=True)
+            self._restored = True
+
+    def record(self, keyword: str) -> None:
+        self._ensure_restored()
+        self.sketch.record(keyword)
+        self.version += 1
+        self._dirty = True
+        if self.snapshot_seconds > 0 and self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trending-snapshot", daemon=True)
+                    self._thread.start()
+
+    def snapshot(self) -> None:
+        """Replace this worker's rows with its current counters; other workers' rows are kept."""
+        now = time.time()
+        rows = [(self.worker_id,) + row for row in self.sketch.dump(now)]
+        conn = _connect(self.db_path)
+        try:
+            with conn:
+                conn.execute("DELETE FROM trending_snapshot WHERE worker = ?", (self.worker_id,))
+                conn.execute(
+                    "DELETE FROM trending_snapshot WHERE updated_at < ?",
+                    (now - self.EXPIRE_HALF_LIVES * self.sketch.half_life,),
+                )
+                conn.executemany(
+                    """INSERT INTO trending_snapshot (worker, keyword, title, count, error, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    rows,
+                )
+        finally:
+            conn.close()
+        self._dirty = False
+
+    def close(self) -> None:
+        """Write a final snapshot if anything changed since the last one."""
+        if self._dirty:
+            self.snapshot()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.snapshot_seconds)
+            if not self._dirty:
+                continue
+            try:
+                self.snapshot()
+            except Exception:
+                logger.exception("Trending snapshot failed")
+
+    def validator(self, now: Optional[float] = None) -> tuple:
+        """ETag input for /api/trending: the record counter plus a decay epoch.
+
+        Decay lowers every score without a record, so the epoch (1/100 of a
+        half-life, under 1% of decay) makes revalidating clients refetch the
+        rescaled scores.
+        """
+        self._ensure_restored()  # restoring bumps the version; do it before the tag is taken
+        now = time.time() if now is None else now
+        return self.version, int(now // (self.sketch.half_life / 100.0))
+
+    def top(self, k: int) -> List[Dict[str, object]]:
+        self._ensure_restored()
+        return merged_top([self.baseline, self.sketch], k)
+
+    def is_trending(self, keyword: str, k: int) -> bool:
+        key = normalize_keyword(keyword)
+        return any(item["keyword"] == key for item in self.top(k))
+
+    def topics(self, k: int) -> List[Dict[str, object]]:
+        """Top ``k`` topics, padded with seed topics while traffic is thin."""
+        seeds = {normalize_keyword(t["title"]): t for t in SEED_TOPICS}
+        out = []
+        for item in self.top(k):
+            seed = seeds.get(item["keyword"])
+            out.append({
+                "id": item["keyword"],
+                "title": seed["title"] if seed else item["title"],
+                "category": seed["category"] if seed else "Trending",
+                "score": round(item["score"], 3),
+            })
+        taken = {t["id"] for t in out}
+        for key, seed in seeds.items():
+            if len(out) >= k:
+                break
+            if key not in taken:
+                out.append({"id": key, "title": seed["title"], "category": seed["category"], "score": 0.0})
+        return out
+
+
+def init_trending(app: Flask) -> None:
+    tracker = TrendingTracker(
+        app.config["SQLITE_PATH"],
+        capacity=app.config["TRENDING_CAPACITY"],
+        half_life=app.config["TRENDING_HALF_LIFE_HOURS"] * 3600.0,
+        snapshot_seconds=app.config["TRENDING_SNAPSHOT_SECONDS"],
+    )
+    app.extensions["trending"] = tracker
+    atexit.register(tracker.close)
+
+
+def record_keyword(keyword: str) -> None:
+    """Feed a keyword into the app's trending sketch. Call from request context."""
+    tracker = current_app.extensions.get("trending")
+    if tracker is not None and keyword:
+        tracker.record(keyword)
+
+
+def is_trending_keyword(keyword: str) -> bool:
+    """Whether ``keyword`` is in the app's current trending list. Call from request context."""
+    tracker = current_app.extensions.get("trending")
+    return tracker is not None and tracker.is_trending(keyword, int(current_app.config["TRENDING_TOP_K"]))
@@ -0,0 +1,27 @@
+"""Twitter client for the event loop (app.asgi): same request and parsing, awaited with httpx."""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+import httpx
+
+from ..quota import QuotaManager
+from .client import UPSTREAM_TIMEOUT, TwitterClient
+
+
+class AsyncTwitterClient(TwitterClient):
+    def __init__(
+        self, bearer_token: str, http: httpx.AsyncClient, base_url: str = "", quota: Optional[QuotaManager] = None
+    ) -> None:
+        super().__init__(bearer_token, base_url, quota=quota)
+        self.http = http
+
+    async def recent_search(self, query: str, max_results: int = 50, priority: str = "user") -> List[str]:
+        url, params, headers = self._request(query, max_results)
+        if self.quota is not None:
+            await asyncio.to_thread(self.quota.acquire, "twitter", priority)
+        resp = await self.http.get(url, params=params, headers=headers, timeout=UPSTREAM_TIMEOUT)
+        if self.quota is not None:
+            await asyncio.to_thread(self.quota.report, "twitter", resp.status_code, resp.headers)
+        return self._parse(resp)
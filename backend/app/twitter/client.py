@@ -1,29 +1,36 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
+from ..quota import QuotaManager
+
+UPSTREAM_TIMEOUT = 20
 
 
 class TwitterClient:
     BASE_URL = "https://api.twitter.com/2"
 
-    def __init__(self, bearer_token: str) -> None:
+    def __init__(self, bearer_token: str, base_url: str = "", quota: Optional[QuotaManager] = None) -> None:
         self.bearer_token = bearer_token
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.quota = quota
 
-    def recent_search(self, query: str, max_results: int = 50) -> List[str]:
+    def _request(self, query: str, max_results: int) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """(url, params, headers) for a recent search; shared with AsyncTwitterClient."""
         if not self.bearer_token:
             raise RuntimeError("TWITTER_BEARER_TOKEN is not set")
-
-        url = f"{self.BASE_URL}/tweets/search/recent"
+        url = f"{self.base_url}/tweets/search/recent"
         params = {
             "query": query,
             "max_results": max_results,
             "tweet.fields": "lang,created_at",
         }
         headers = {"Authorization": f"Bearer {self.bearer_token}"}
-        resp = requests.get(url, params=params, headers=headers, timeout=20)
-        
+        return url, params, headers
+
+    @staticmethod
+    def _parse(resp) -> List[str]:
+        """Tweet texts from a response (requests or httpx, same interface)."""
         # Handle specific error cases
         if resp.status_code == 402:
             raise RuntimeError(
@@ -43,3 +50,13 @@ class TwitterClient:
         # Return tweet texts only
         return [t.get("text", "") for t in tweets if t.get("text")]
 
+    def recent_search(self, query: str, max_results: int = 50, priority: str = "user") -> List[str]:
+        url, params, headers = self._request(query, max_results)
+        if self.quota is not None:
+            self.quota.acquire("twitter", priority)
+        import requests  # loaded on the first sync call, not when create_app() imports the routes
+
+        resp = requests.get(url, params=params, headers=headers, timeout=UPSTREAM_TIMEOUT)
+        if self.quota is not None:
+            self.quota.report("twitter", resp.status_code, resp.headers)
+        return self._parse(resp)
@@ -27,7 +27,7 @@ class MockTwitterClient:
         """Initialize mock client (token not needed for demo)"""
         pass
     
-    def recent_search(self, query: str, max_results: int = 50) -> List[str]:
+    def recent_search(self, query: str, max_results: int = 50, priority: str = "user") -> List[str]:
         """
         Return mock tweets based on the keyword.
         For demo purposes, returns a mix of positive, negative, and neutral tweets.
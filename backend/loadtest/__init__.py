@@ -0,0 +1,4 @@
+"""Load-test harness: local upstream stand-ins, a stub model and a traffic driver.
+
+Run from the backend folder with ``python -m loadtest --help``.
+"""
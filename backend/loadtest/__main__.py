@@ -0,0 +1,256 @@
+"""Drive mixed traffic at a target rate against a locally booted app.
+
+Boots ``create_app()`` against a temporary SQLite database, points NewsAPI and
+Twitter at a local stub server and swaps in the deterministic stub model, then
+sends an open-loop request schedule (login, fetch-news, analyze, history,
+admin) at ``--rps`` for ``--duration`` seconds. Latency is measured from each
+request's scheduled send time, so a slow server can't hide its backlog
+(no coordinated omission).
+
+    cd backend
+    python -m loadtest --rps 50 --duration 30 --upstream-latency-ms 80 --model-cost-ms 25
+    python -m loadtest --asgi --mix fetch_news=1 --upstream-latency-ms 2000 --rps 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+
+from .stub_model import StubSentimentModel
+from .stub_upstream import RECORDED, StubUpstream
+
+DEFAULT_MIX = "login=5,fetch_news=20,analyze=40,history=25,admin=10"
+KEYWORDS = ["Climate Change", "Artificial Intelligence", "Global Economy", "Electric Vehicles", "Cryptocurrency"]
+
+
+def _parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def boot_app(args, upstream: StubUpstream, workdir: str):
+    os.environ.update({
+        "SQLITE_PATH": os.path.join(workdir, "loadtest.db"),
+        "ACTIVITY_DB_PATH": os.path.join(workdir, "loadtest-activity.db"),
+        "QUOTA_DB_PATH": os.path.join(workdir, "loadtest-quota.db"),
+        "DATA_SOURCE": "newsapi",
+        "NEWS_API_KEY": "stub-key",
+        "NEWS_API_BASE_URL": upstream.newsapi_url,
+        "TWITTER_API_BASE_URL": upstream.twitter_url,
+        # The stub has no quota; let the quota manager only react to injected 429s.
+        "NEWS_API_DAILY_LIMIT": "0",
+        "NEWS_API_RATE_PER_MIN": "0",
+        "TWITTER_DAILY_LIMIT": "0",
+        "TWITTER_RATE_PER_MIN": "0",
+        "ACTIVITY_ARCHIVE_DIR": os.path.join(workdir, "archive"),
+        "ACTIVITY_ROLLOVER_HOURS": "0",
+        "ADMIN_USERNAME": "loadtest-admin",
+        "ADMIN_PASSWORD": "loadtest-admin",
+        "SECRET_KEY": "loadtest",
+    })
+    from werkzeug.serving import make_server
+
+    from app import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    app = create_app()
+    app.extensions["models"].install("stub", StubSentimentModel(base_ms=args.model_cost_ms, per_item_ms=args.model_item_ms))
+    if args.asgi:
+        from app.asgi import AsgiApp
+        server = AsgiServer(AsgiApp(app))
+    else:
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, name="app-server", daemon=True).start()
+    return app, server, f"http://127.0.0.1:{server.server_port}/api"
+
+
+class AsgiServer:
+    """uvicorn on a background thread, with the same server_port/shutdown() as werkzeug's server."""
+
+    def __init__(self, asgi_app) -> None:
+        import socket
+
+        import uvicorn
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.server_port = self.sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(asgi_app, log_level="warning", lifespan="on"))
+        self.thread = threading.Thread(
+            target=self.server.run, kwargs={"sockets": [self.sock]}, name="app-server", daemon=True
+        )
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    def shutdown(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class Driver:
+    def __init__(self, base: str, users: int, admins: int, seed: int) -> None:
+        self.base = base
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.users: "queue.Queue[Tuple[requests.Session, str]]" = queue.Queue()
+        self.admins: "queue.Queue[requests.Session]" = queue.Queue()
+        for i in range(users):
+            s = requests.Session()
+            name = f"lt-user-{i}"
+            s.post(f"{base}/auth/signup", json={"username": name, "password": "password"}, timeout=30)
+            self.users.put((s, name))
+        for _ in range(admins):
+            s = requests.Session()
+            s.post(f"{base}/admin/login", json={"username": "loadtest-admin", "password": "loadtest-admin"}, timeout=30)
+            self.admins.put(s)
+        headlines = json.loads((RECORDED / "newsapi_everything.json").read_text(encoding="utf-8"))["articles"]
+        self.texts = [f"{a['title']}. {a['description']}" for a in headlines]
+        self.results: Dict[str, List[Tuple[float, bool]]] = defaultdict(list)
+        self.results_lock = threading.Lock()
+
+    def _choice(self, seq):
+        with self.rng_lock:
+            return self.rng.choice(seq)
+
+    def run_op(self, op: str, scheduled: float) -> None:
+        ok = False
+        try:
+            if op == "admin":
+                s = self.admins.get()
+                try:
+                    path = self._choice(["/admin/statistics", "/admin/activity?limit=50", "/admin/searches"])
+                    ok = s.get(self.base + path, timeout=60).ok
+                finally:
+                    self.admins.put(s)
+            else:
+                s, name = self.users.get()
+                try:
+                    if op == "login":
+                        r = s.post(f"{self.base}/auth/login", json={"username": name, "password": "password"}, timeout=60)
+                    elif op == "fetch_news":
+                        r = s.post(f"{self.base}/fetch-news", json={"keyword": self._choice(KEYWORDS)}, timeout=60)
+                    elif op == "analyze":
+                        r = s.post(
+                            f"{self.base}/analyze",
+                            json={"news_text": self._choice(self.texts), "topic": self._choice(KEYWORDS)},
+                            timeout=60,
+                        )
+                    elif op == "history":
+                        r = s.get(f"{self.base}/history?limit=20", timeout=60)
+                    else:
+                        raise ValueError(f"unknown op {op}")
+                    ok = r.ok
+                finally:
+                    self.users.put((s, name))
+        except requests.RequestException:
+            ok = False
+        latency = time.perf_counter() - scheduled
+        with self.results_lock:
+            self.results[op].append((latency, ok))
+
+
+def report(results: Dict[str, List[Tuple[float, bool]]], elapsed: float) -> List[Dict[str, object]]:
+    rows = []
+    for op in sorted(results):
+        samples = results[op]
+        lat = sorted(l for l, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        rows.append({
+            "endpoint": op,
+            "requests": len(samples),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(_percentile(lat, 50) * 1000, 1),
+            "p95_ms": round(_percentile(lat, 95) * 1000, 1),
+            "p99_ms": round(_percentile(lat, 99) * 1000, 1),
+            "max_ms": round((lat[-1] if lat else 0.0) * 1000, 1),
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rps", type=float, default=20.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=32, help="max in-flight requests")
+    parser.add_argument("--users", type=int, default=40, help="simulated user accounts")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"op weights (default {DEFAULT_MIX})")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--model-cost-ms", type=float, default=20.0, help="stub model cost per forward pass")
+    parser.add_argument("--model-item-ms", type=float, default=5.0, help="extra stub model cost per text in a batch")
+    parser.add_argument("--asgi", action="store_true",
+                        help="serve through app.asgi (fetch-news on the event loop) under uvicorn")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    mix = _parse_mix(args.mix)
+    ops, weights = zip(*mix)
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    upstream = StubUpstream(
+        latency_ms=args.upstream_latency_ms,
+        jitter_ms=args.upstream_jitter_ms,
+        error_rate=args.upstream_error_rate,
+        seed=args.seed,
+    ).start()
+    app, server, base = boot_app(args, upstream, workdir)
+    driver = Driver(base, max(args.users, args.concurrency), admins=4, seed=args.seed)
+
+    rng = random.Random(args.seed)
+    total = int(args.rps * args.duration)
+    print(f"Driving {total} requests at {args.rps} rps against {base} ...", file=sys.stderr)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i / args.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(driver.run_op, rng.choices(ops, weights)[0], scheduled)
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    upstream.stop()
+    rows = report(driver.results, elapsed)
+    if args.json:
+        print(json.dumps({"elapsed_s": round(elapsed, 2), "endpoints": rows}, indent=2))
+    else:
+        print(f"\nElapsed {elapsed:.1f}s; upstream calls {upstream.requests} ({upstream.errors} injected errors)")
+        header = f"{'endpoint':<12}{'reqs':>7}{'err%':>7}{'rps':>8}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}{'maxms':>9}"
+        print(header)
+        print("-" * len(header))
+        for r in rows:
+            print(f"{r['endpoint']:<12}{r['requests']:>7}{r['error_rate'] * 100:>6.1f}%{r['throughput_rps']:>8}"
+                  f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Deterministic stand-in for TwitterRobertaSentiment.
+
+Scores are derived from a hash of the text, so the same text always gets the
+same result, and every forward pass sleeps ``base_ms + per_item_ms * n`` to
+mimic model cost. Forward passes are serialised with a lock, like the single
+real model in a worker.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from typing import Dict, List
+
+from app.ml.batch import SentimentBatch
+
+
+class StubSentimentModel:
+    def __init__(self, base_ms: float = 20.0, per_item_ms: float = 5.0) -> None:
+        self.base_ms = base_ms
+        self.per_item_ms = per_item_ms
+        self.semantic_cache = None
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    def _scores(self, text: str) -> List[float]:
+        digest = hashlib.sha1(text.encode("utf-8")).digest()
+        raw = [digest[0] + 1, digest[1] + 1, digest[2] + 1]
+        total = float(sum(raw))
+        return [r / total for r in raw]
+
+    def predict_batch(self, texts: List[str]) -> SentimentBatch:
+        with self._lock:
+            time.sleep((self.base_ms + self.per_item_ms * len(texts)) / 1000.0)
+            self.batches += 1
+        return SentimentBatch.from_probs([self._scores(t) for t in texts])
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        return self.predict_batch([text]).to_dicts()[0]
+
+    def analyze_with_explanation(self, text: str) -> Dict:
+        probs = self.predict_proba(text)
+        label = max(probs, key=probs.get)
+        confidence = round(probs[label] * 100, 1)
+        return {
+            "sentiment": label,
+            "confidence": confidence,
+            "probabilities": {k: round(v * 100, 2) for k, v in probs.items()},
+            "explanation": f"Stub model: classified as {label} with {confidence}% confidence.",
+            "key_words": {"positive": [], "negative": []},
+            "cache": {"reused": False},
+        }
@@ -0,0 +1,117 @@
+"""Local HTTP stand-in for NewsAPI and the Twitter v2 API.
+
+Replays the recorded responses in ``recorded/`` with configurable latency and
+error rate, so the app can be driven without real API keys or quotas:
+
+    server = StubUpstream(latency_ms=50, error_rate=0.02).start()
+    # NEWS_API_BASE_URL=server.newsapi_url, TWITTER_API_BASE_URL=server.twitter_url
+    server.stop()
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+RECORDED = Path(__file__).resolve().parent / "recorded"
+
+
+class StubUpstream:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 429,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.newsapi_body = json.loads((RECORDED / "newsapi_everything.json").read_text(encoding="utf-8"))
+        self.twitter_body = json.loads((RECORDED / "twitter_recent_search.json").read_text(encoding="utf-8"))
+        self.requests = 0
+        self.errors = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def newsapi_url(self) -> str:
+        return f"{self.base_url}/newsapi/v2"
+
+    @property
+    def twitter_url(self) -> str:
+        return f"{self.base_url}/twitter/2"
+
+    def start(self) -> "StubUpstream":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-upstream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _decide(self) -> tuple[float, bool]:
+        with self._rng_lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            fail = self._rng.random() < self.error_rate
+            self.requests += 1
+            self.errors += int(fail)
+        return delay, fail
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # keep load-test output readable
+                pass
+
+            def _send(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                delay, fail = stub._decide()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self._send(stub.error_status, {"status": "error", "code": "rateLimited"}, {"Retry-After": "1"})
+                    return
+                if url.path == "/newsapi/v2/everything":
+                    size = int(query.get("pageSize", ["20"])[0])
+                    body = dict(stub.newsapi_body, articles=stub.newsapi_body["articles"][:size])
+                    self._send(200, body)
+                elif url.path == "/twitter/2/tweets/search/recent":
+                    size = int(query.get("max_results", ["10"])[0])
+                    self._send(200, dict(stub.twitter_body, data=stub.twitter_body["data"][:size]))
+                else:
+                    self._send(404, {"error": "not found"})
+
+        return Handler
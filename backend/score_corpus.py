@@ -0,0 +1,259 @@
+"""Score a CSV/JSONL corpus offline with a pool of model-owning worker processes.
+
+The input is streamed record by record (``.gz`` works too) and sent to the
+workers in batches, with at most ``2 x workers`` batches in flight, so memory
+stays flat however large the file is. Results are written in input order to a
+JSONL file or a SQLite database, and a checkpoint records how many input
+records are safely written. Re-running the same command after a crash or
+Ctrl-C resumes from the checkpoint.
+
+    python score_corpus.py articles.csv -o scores.jsonl --workers 4
+    python score_corpus.py dump.jsonl.gz -o scores.db --text-field body --id-field url
+
+Output per record: id, sentiment, confidence and positive/neutral/negative
+percentages, as returned by /api/analyze.
+"""
+import argparse
+import csv
+import gzip
+import json
+import multiprocessing as mp
+import os
+import signal
+import sqlite3
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+_worker_model = None
+
+
+# --- input -------------------------------------------------------------------
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def iter_records(path, fmt, text_field, id_field):
+    """Yield (id, text) for every record; id defaults to the 1-based record number."""
+    with _open_text(path) as f:
+        if fmt == "csv":
+            csv.field_size_limit(sys.maxsize)
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for n, row in enumerate(rows, start=1):
+            record_id = row.get(id_field) if id_field else None
+            yield (str(record_id) if record_id not in (None, "") else str(n)), (row.get(text_field) or "").strip()
+
+
+def iter_batches(records, batch_size, skip):
+    batch = []
+    for n, record in enumerate(records):
+        if n < skip:
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- workers -----------------------------------------------------------------
+
+def _init_worker(model_name, stub_model, threads):
+    global _worker_model
+    # Ctrl-C is handled once, by the parent, which checkpoints and stops the pool.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if stub_model:
+        from loadtest.stub_model import StubSentimentModel
+        _worker_model = StubSentimentModel(base_ms=0, per_item_ms=stub_model)
+        return
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from app.ml.sentiment import TwitterRobertaSentiment
+    _worker_model = TwitterRobertaSentiment(model_name)
+
+
+def _score_batch(batch, jsonl):
+    """Score one batch and format it for the sink here in the worker: JSON lines or SQLite rows."""
+    scored = [(record_id, text) for record_id, text in batch if text]
+    result = _worker_model.predict_batch([text for _, text in scored])
+    ids = [record_id for record_id, _ in scored]
+    return len(batch), (result.to_jsonl(ids) if jsonl else list(result.rows(ids)))
+
+
+# --- output + checkpoint -----------------------------------------------------
+
+class JsonlSink:
+    """Appends JSON lines; the checkpoint file stores records done and the output size at that point."""
+
+    jsonl = True
+
+    def __init__(self, path, checkpoint_path, source):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.source = source
+        state = self._load_checkpoint()
+        self.done = state.get("records", 0)
+        size = state.get("output_bytes", 0)
+        self.f = open(path, "ab")
+        # Drop anything written after the last checkpoint (a crash between write and checkpoint).
+        self.f.truncate(size)
+        self.f.seek(size)
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        if state.get("input") != self.source:
+            raise SystemExit(f"Checkpoint {self.checkpoint_path} belongs to {state.get('input')}, not {self.source}")
+        return state
+
+    def write(self, consumed, lines):
+        self.f.write(lines.encode("utf-8"))
+        self.done += consumed
+
+    def commit(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"input": self.source, "records": self.done, "output_bytes": self.f.tell()}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def close(self):
+        self.f.close()
+
+
+class SqliteSink:
+    """Writes scores and the checkpoint row in the same transaction, so they can't disagree."""
+
+    jsonl = False
+
+    def __init__(self, path, source):
+        self.source = source
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+              id TEXT PRIMARY KEY,
+              sentiment TEXT NOT NULL,
+              confidence REAL NOT NULL,
+              positive REAL NOT NULL,
+              neutral REAL NOT NULL,
+              negative REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS score_checkpoint (
+              input TEXT PRIMARY KEY,
+              records INTEGER NOT NULL
+            );
+            """
+        )
+        row = self.conn.execute("SELECT records FROM score_checkpoint WHERE input = ?", (source,)).fetchone()
+        self.done = row[0] if row else 0
+
+    def write(self, consumed, rows):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scores (id, sentiment, confidence, positive, neutral, negative)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.done += consumed
+
+    def commit(self):
+        self.conn.execute(
+            "INSERT INTO score_checkpoint (input, records) VALUES (?, ?)"
+            " ON CONFLICT(input) DO UPDATE SET records = excluded.records",
+            (self.source, self.done),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# --- main --------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL corpus offline (resumable).")
+    parser.add_argument("input", help="CSV or JSONL file, optionally .gz")
+    parser.add_argument("-o", "--output", required=True, help="results file: .jsonl, or .db/.sqlite for SQLite")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from the file name)")
+    parser.add_argument("--text-field", default="text", help="column/key holding the text (default: text)")
+    parser.add_argument("--id-field", help="column/key holding a record id (default: record number)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--batch-size", type=int, default=64, help="records per task sent to a worker")
+    parser.add_argument("--checkpoint-every", type=float, default=10.0, help="seconds between checkpoints")
+    parser.add_argument("--model", default="cardiffnlp/twitter-roberta-base-sentiment")
+    parser.add_argument("--stub-model", type=float, metavar="MS_PER_ITEM",
+                        help="use the deterministic load-test stub model instead (dry runs)")
+    args = parser.parse_args(argv)
+
+    source = str(Path(args.input).resolve())
+    name = args.input[:-3] if args.input.endswith(".gz") else args.input
+    fmt = args.format or ("csv" if name.endswith(".csv") else "jsonl")
+    if args.output.endswith((".db", ".sqlite", ".sqlite3")):
+        sink = SqliteSink(args.output, source)
+    else:
+        sink = JsonlSink(args.output, args.output + ".checkpoint", source)
+    if sink.done:
+        print(f"Resuming after {sink.done} records", file=sys.stderr)
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    records = iter_records(args.input, fmt, args.text_field, args.id_field)
+    batches = iter_batches(records, args.batch_size, skip=sink.done)
+    start_done = sink.done
+    started = last_report = last_commit = time.monotonic()
+
+    ctx = mp.get_context("spawn")
+    pool = ctx.Pool(args.workers, initializer=_init_worker, initargs=(args.model, args.stub_model, threads))
+    pending = deque()
+    try:
+        for batch in batches:
+            pending.append(pool.apply_async(_score_batch, (batch, sink.jsonl)))
+            # Bounded in-flight work keeps memory flat; results are written in input order.
+            while len(pending) >= 2 * args.workers or (pending and pending[0].ready()):
+                sink.write(*pending.popleft().get())
+            now = time.monotonic()
+            if now - last_commit >= args.checkpoint_every:
+                sink.commit()
+                last_commit = now
+            if now - last_report >= 5:
+                rate = (sink.done - start_done) / (now - started)
+                print(f"{sink.done} records scored ({rate:.1f}/s)", file=sys.stderr)
+                last_report = now
+        while pending:
+            sink.write(*pending.popleft().get())
+        sink.commit()
+    except KeyboardInterrupt:
+        # Keep what has finished; the next run resumes from here.
+        pool.terminate()
+        sink.commit()
+        print(f"\nInterrupted: {sink.done} records saved, re-run to resume", file=sys.stderr)
+        return 130
+    finally:
+        pool.terminate()
+        pool.join()
+        sink.close()
+
+    elapsed = time.monotonic() - started
+    scored = sink.done - start_done
+    print(f"Done: {sink.done} records ({scored} this run in {elapsed:.1f}s, {scored / max(elapsed, 1e-9):.1f}/s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Import-time and startup benchmark with a budget, for CI.
+
+Each run uses a fresh interpreter, so nothing is warm from an earlier import:
+
+* ``python -X importtime -c "import app"``: import time of the package, which
+  should be next to nothing (Flask and the blueprints load in create_app), and
+  a check that importing it did not touch the database;
+* startup, ``import app; create_app()``, against databases that already exist
+  (what every worker boot and restart pays): wall time, the slowest imports it
+  pulled in, and which heavy modules (torch, transformers, numpy, and requests,
+  which only the sync upstream clients need) ended up loaded. None should be
+  until they are used;
+* first init, the same against new files: startup plus creating every table,
+  index and trigger, paid once per deploy. DDL commits one statement at a
+  time, so this is dominated by fsyncs and gets its own, larger budget;
+* ``create_app()`` with ``DB_INIT_ON_START=false``, which must not create or
+  open any database: schema work belongs to ``flask init-db``.
+
+The median of ``--runs`` runs is compared against the budgets, and the exit
+status is 1 when a budget is exceeded or a heavy module was loaded.
+
+    python startup_bench.py
+    python startup_bench.py --runs 9 --startup-budget-ms 500 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent
+HEAVY_MODULES = ("torch", "transformers", "numpy", "requests")
+
+STARTUP_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import app
+app.create_app()
+print(json.dumps({"startup_ms": (time.perf_counter() - started) * 1e3}))
+"""
+
+
+def _activity_db(db_path):
+    return db_path[:-len(".db")] + "-activity.db"
+
+
+def _quota_db(db_path):
+    return db_path[:-len(".db")] + "-quota.db"
+
+
+def _db_files(db_path):
+    return (db_path, _activity_db(db_path), _quota_db(db_path))
+
+
+def _env(db_path):
+    return dict(
+        os.environ, SQLITE_PATH=db_path, ACTIVITY_DB_PATH=_activity_db(db_path), QUOTA_DB_PATH=_quota_db(db_path),
+        PYTHONPATH=str(BACKEND_ROOT),
+    )
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from ``-X importtime`` output."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            out[name] = (int(self_us), int(cumulative_us))
+    return out
+
+
+def measure_import(workdir):
+    db_path = os.path.join(workdir, "import.db")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=workdir, env=_env(db_path), capture_output=True, text=True, check=True,
+    )
+    modules = parse_importtime(proc.stderr)
+    return {"import_ms": modules["app"][1] / 1000.0, "touched_db": any(os.path.exists(p) for p in _db_files(db_path))}
+
+
+def measure_init_off(workdir):
+    db_path = os.path.join(workdir, "init-off.db")
+    subprocess.run(
+        [sys.executable, "-c", "import app; app.create_app()"],
+        cwd=workdir, env=dict(_env(db_path), DB_INIT_ON_START="false"), capture_output=True, text=True, check=True,
+    )
+    return any(os.path.exists(p) for p in _db_files(db_path))
+
+
+def _init_databases(db_path):
+    subprocess.run(
+        [sys.executable, "-c", "import app; app.create_app()"],
+        cwd=os.path.dirname(db_path), env=_env(db_path), capture_output=True, text=True, check=True,
+    )
+
+
+def measure_startup(workdir, n, fresh=False):
+    db_path = os.path.join(workdir, f"{'init' if fresh else 'startup'}-{n}.db")
+    if not fresh:
+        _init_databases(db_path)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SNIPPET],
+        cwd=workdir, env=_env(db_path), capture_output=True, text=True, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(proc.stderr)
+    # Top-level modules only: their cumulative times don't overlap.
+    top = [(n, c / 1000.0) for n, (_, c) in modules.items() if "." not in n]
+    result["slowest"] = sorted(top, key=lambda m: -m[1])[:10]
+    result["heavy"] = sorted({n.split(".")[0] for n in modules} & set(HEAVY_MODULES))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement (median is used)")
+    parser.add_argument("--import-budget-ms", type=float, default=50.0, help="budget for `import app`")
+    parser.add_argument("--startup-budget-ms", type=float, default=800.0,
+                        help="budget for `import app; create_app()` on existing databases")
+    # Measured at 1.0-1.1 s on a 1-vCPU VM with a virtio disk; most of it is fsync.
+    parser.add_argument("--init-budget-ms", type=float, default=1500.0,
+                        help="budget for `import app; create_app()` creating new databases")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as workdir:
+        imports = [measure_import(workdir) for _ in range(args.runs)]
+        startups = [measure_startup(workdir, n) for n in range(args.runs)]
+        inits = [measure_startup(workdir, n, fresh=True) for n in range(args.runs)]
+        init_off_touched_db = measure_init_off(workdir)
+
+    report = {
+        "import_ms": round(statistics.median(r["import_ms"] for r in imports), 1),
+        "startup_ms": round(statistics.median(r["startup_ms"] for r in startups), 1),
+        "import_budget_ms": args.import_budget_ms,
+        "startup_budget_ms": args.startup_budget_ms,
+        "init_ms": round(statistics.median(r["startup_ms"] for r in inits), 1),
+        "init_budget_ms": args.init_budget_ms,
+        "heavy_modules": sorted({m for r in startups + inits for m in r["heavy"]}),
+        "import_touched_db": any(r["touched_db"] for r in imports),
+        "init_off_touched_db": init_off_touched_db,
+        "slowest_imports_ms": [(n, round(ms, 1)) for n, ms in startups[-1]["slowest"]],
+    }
+    failures = []
+    if report["import_ms"] > args.import_budget_ms:
+        failures.append(f"import app took {report['import_ms']}ms (budget {args.import_budget_ms}ms)")
+    if report["startup_ms"] > args.startup_budget_ms:
+        failures.append(f"startup took {report['startup_ms']}ms (budget {args.startup_budget_ms}ms)")
+    if report["init_ms"] > args.init_budget_ms:
+        failures.append(f"first init took {report['init_ms']}ms (budget {args.init_budget_ms}ms)")
+    if report["heavy_modules"]:
+        failures.append(f"heavy modules loaded at startup: {', '.join(report['heavy_modules'])}")
+    if report["import_touched_db"]:
+        failures.append("importing the package created the database")
+    if report["init_off_touched_db"]:
+        failures.append("create_app() touched the database with DB_INIT_ON_START=false")
+    report["failures"] = failures
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import app      {report['import_ms']:8.1f} ms  (budget {args.import_budget_ms:.0f})")
+        print(f"startup         {report['startup_ms']:8.1f} ms  (budget {args.startup_budget_ms:.0f})")
+        print(f"first init      {report['init_ms']:8.1f} ms  (budget {args.init_budget_ms:.0f})")
+        print("slowest imports during startup:")
+        for name, ms in report["slowest_imports_ms"]:
+            print(f"  {ms:8.1f} ms  {name}")
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
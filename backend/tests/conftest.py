@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app on throwaway databases, with no background rollover or snapshot threads."""
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "app.db"))
+    monkeypatch.setenv("ACTIVITY_DB_PATH", str(tmp_path / "activity.db"))
+    monkeypatch.setenv("QUOTA_DB_PATH", str(tmp_path / "quota.db"))
+    monkeypatch.setenv("ACTIVITY_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setenv("ACTIVITY_ROLLOVER_HOURS", "0")
+    monkeypatch.setenv("TRENDING_SNAPSHOT_SECONDS", "0")
+    monkeypatch.setenv("DB_INIT_ON_START", "true")
+    monkeypatch.setenv("ADMIN_USERNAME", "admin")
+    monkeypatch.setenv("ADMIN_PASSWORD", "admin-pw")
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app
+    writer = app.extensions.get("activity_writer")
+    if writer is not None:
+        writer.close()
+
+
+@pytest.fixture
+def db(app):
+    """A direct connection to the main database, for seeding rows."""
+    conn = sqlite3.connect(app.config["SQLITE_PATH"])
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def add_user(db, username="alice", password="pw"):
+    cur = db.execute(
+        "INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, generate_password_hash(password))
+    )
+    db.commit()
+    return cur.lastrowid
+
+
+def add_search(db, user_id, keyword="apple", created_at="2026-01-01 00:00:00", tweet_count=10):
+    cur = db.execute(
+        """INSERT INTO searches (user_id, keyword, tweet_count, positive, neutral, negative, created_at)
+           VALUES (?, ?, ?, 50, 30, 20, ?)""",
+        (user_id, keyword, tweet_count, created_at),
+    )
+    db.commit()
+    return cur.lastrowid
+
+
+@pytest.fixture
+def user(db):
+    return add_user(db)
+
+
+@pytest.fixture
+def client(app, user):
+    """A test client logged in as ``user``."""
+    client = app.test_client()
+    assert client.post("/api/auth/login", json={"username": "alice", "password": "pw"}).status_code == 200
+    return client
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    assert client.post("/api/admin/login", json={"username": "admin", "password": "admin-pw"}).status_code == 200
+    return client
@@ -0,0 +1,92 @@
+import sqlite3
+
+import pytest
+
+from app.db import ACTIVITY_TABLES, create_activity_schema, create_schema, query_all
+from tests.conftest import add_user
+
+LEGACY_ROWS = 12
+ARCHIVED = 2  # rows that retention had already moved out before the split
+
+
+@pytest.fixture(autouse=True)
+def legacy_db(tmp_path):
+    """A main database from before the split, with activity_log and its rollups inside.
+    Built before the ``app`` fixture, whose startup migrates it."""
+    path = str(tmp_path / "app.db")
+    create_schema(path)
+    create_activity_schema(path, journal_mode="delete")
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    alice, bob = add_user(conn, "alice"), add_user(conn, "bob")
+    conn.executemany(
+        "INSERT INTO activity_log (action, actor_type, user_id, created_at) VALUES (?, 'user', ?, ?)",
+        [
+            ("login" if i % 3 else "analyze", (alice, bob)[i % 2], f"2026-01-{1 + i % 4:02d} 0{i % 10}:00:00")
+            for i in range(LEGACY_ROWS)
+        ],
+    )
+    conn.execute("DELETE FROM activity_log WHERE id <= ?", (ARCHIVED,))
+    conn.commit()
+    conn.close()
+    return {"path": path, "alice": alice, "bob": bob}
+
+
+def _tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+
+def test_activity_tables_move_into_the_activity_database(app, legacy_db):
+    assert not _tables(app.config["SQLITE_PATH"]) & set(ACTIVITY_TABLES)
+    assert set(ACTIVITY_TABLES) <= _tables(app.config["ACTIVITY_DB_PATH"])
+
+    conn = sqlite3.connect(app.config["ACTIVITY_DB_PATH"])
+    try:
+        ids = [r[0] for r in conn.execute("SELECT id FROM activity_log ORDER BY id")]
+        assert ids == list(range(ARCHIVED + 1, LEGACY_ROWS + 1))
+        # Rollups keep counting the rows archived before the move.
+        assert conn.execute("SELECT SUM(n) FROM activity_rollups WHERE granularity = 'day'").fetchone()[0] == LEGACY_ROWS
+        assert conn.execute("SELECT COUNT(*) FROM active_users WHERE granularity = 'day'").fetchone()[0] == 4  # one user per day
+        conn.execute("INSERT INTO activity_log (action, actor_type) VALUES ('login', 'user')")
+        assert conn.execute("SELECT MAX(id) FROM activity_log").fetchone()[0] == LEGACY_ROWS + 1
+    finally:
+        conn.close()
+
+
+def test_rerunning_the_migration_changes_nothing(app, legacy_db):
+    def rows():
+        conn = sqlite3.connect(app.config["ACTIVITY_DB_PATH"])
+        try:
+            return conn.execute("SELECT * FROM activity_log ORDER BY id").fetchall()
+        finally:
+            conn.close()
+
+    before = rows()
+    create_activity_schema(app.config["ACTIVITY_DB_PATH"], main_db_path=app.config["SQLITE_PATH"])
+    assert rows() == before
+    assert len(before) == LEGACY_ROWS - ARCHIVED
+
+
+def test_admin_queries_read_across_both_files(app, admin_client, legacy_db):
+    app.extensions["activity_writer"].flush()  # the admin login
+    stats = admin_client.get("/api/admin/statistics").json
+    assert stats["total_users"] == 2
+    assert stats["total_activities"] == LEGACY_ROWS - ARCHIVED + 1
+
+    bob = admin_client.get(f"/api/admin/activity?user_id={legacy_db['bob']}").json["activities"]
+    assert len(bob) == (LEGACY_ROWS - ARCHIVED) // 2
+    assert admin_client.get("/api/admin/rollups/activity?since=2026-01-01&until=2026-01-05").json["series"][0][
+        "active_users"
+    ] == 1
+
+    with app.test_request_context():
+        app.preprocess_request()
+        joined = query_all(
+            """SELECT u.username, COUNT(*) AS n FROM activity_log a JOIN users u ON u.id = a.user_id
+               GROUP BY u.username ORDER BY u.username"""
+        )
+    assert joined == [{"username": "alice", "n": 5}, {"username": "bob", "n": 5}]
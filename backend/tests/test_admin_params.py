@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "url, error",
+    [
+        ("/api/admin/searches?since_id=0&limit=abc", "limit must be an integer"),
+        ("/api/admin/rollups/keywords?limit=abc", "limit must be an integer"),
+        ("/api/admin/activity?limit=1.5", "limit must be an integer"),
+        ("/api/admin/activity?user_id=alice", "user_id must be an integer"),
+        ("/api/admin/activity?since_id=0&user_id=alice", "user_id must be an integer"),
+        ("/api/admin/activity/archive?limit=abc", "limit must be an integer"),
+        ("/api/admin/activity/archive?user_id=alice", "user_id must be an integer"),
+        ("/api/admin/analyses/search?q=apple&user_id=alice", "user_id must be an integer"),
+        ("/api/admin/export?since_id=abc", "since_id must be an integer"),
+    ],
+)
+def test_non_integer_params_are_rejected(admin_client, url, error):
+    response = admin_client.get(url)
+    assert response.status_code == 400
+    assert response.json["error"] == error
+
+
+def test_limits_are_clamped(admin_client):
+    assert admin_client.get("/api/admin/activity?limit=100000").json["limit"] == 500
+    assert admin_client.get("/api/admin/activity?limit=-3").json["limit"] == 1
+    assert admin_client.get("/api/admin/activity/archive?limit=100000").json["limit"] == 10000
@@ -0,0 +1,127 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from app.admission import INITIAL_SERVICE_SECONDS, AdmissionController, Shed, request_deadline
+from app.model_registry import Rescorer
+from loadtest.stub_model import StubSentimentModel
+
+
+def test_background_slots_stay_out_of_the_service_estimate():
+    controller = AdmissionController(max_concurrency=1)
+    with controller.admit("__rescore__", 60.0, observe=False):
+        time.sleep(0.6)
+    assert controller.service_seconds == INITIAL_SERVICE_SECONDS
+
+    # With the queue empty, a request that fits the usual service time is admitted.
+    with controller.admit("alice", 0.3):
+        pass
+
+
+def test_rescore_batches_do_not_shed_requests_on_deadline():
+    controller = AdmissionController(max_concurrency=1)
+    rescorer = Rescorer(registry=None, db_path=":memory:", admission=controller, batch_size=8, pause=0.0)
+    for _ in range(2):
+        with rescorer._slot():
+            time.sleep(0.5)
+
+    with controller.admit("alice", 0.3):
+        pass
+
+
+@contextmanager
+def _held(controller, user="bob"):
+    """Hold one of ``controller``'s slots from another thread for the body of the ``with``."""
+    admitted, release = threading.Event(), threading.Event()
+
+    def hold():
+        with controller.admit(user, 60.0):
+            admitted.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    admitted.wait()
+    try:
+        yield
+    finally:
+        release.set()
+        thread.join()
+
+
+def _shed_reason(controller, user, deadline_s):
+    with pytest.raises(Shed) as shed:
+        with controller.admit(user, deadline_s):
+            pass
+    return shed.value.reason
+
+
+def test_a_user_over_the_per_user_limit_is_shed():
+    controller = AdmissionController(max_concurrency=2, per_user=1)
+    with _held(controller, "alice"):
+        assert _shed_reason(controller, "alice", 10.0) == "user_limit"
+        with controller.admit("carol", 10.0):
+            pass
+
+
+def test_a_full_queue_sheds():
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    with _held(controller):
+        assert _shed_reason(controller, "alice", 10.0) == "queue_full"
+
+
+def test_a_deadline_shorter_than_the_estimated_wait_sheds_up_front():
+    controller = AdmissionController(max_concurrency=1)
+    controller.service_seconds = 1.0
+    with _held(controller):
+        started = time.monotonic()
+        assert _shed_reason(controller, "alice", 1.5) == "deadline"
+        assert time.monotonic() - started < 0.5
+
+
+def test_a_queued_request_past_its_deadline_times_out():
+    controller = AdmissionController(max_concurrency=1)
+    controller.service_seconds = 0.05
+    with _held(controller):
+        assert _shed_reason(controller, "alice", 0.2) == "timeout"
+        assert controller.stats()["queued"] == 0
+
+
+@pytest.mark.parametrize("header", [None, "", "abc", "nan", "NaN", "inf", "-inf", "-5", "0"])
+def test_bad_deadline_headers_fall_back_to_the_default(app, header):
+    with app.app_context():
+        assert request_deadline(header) == app.config["ADMISSION_DEADLINE_MS"] / 1000.0
+
+
+def test_deadline_headers_are_capped(app):
+    with app.app_context():
+        assert request_deadline("500") == 0.5
+        assert request_deadline("1e12") == app.config["ADMISSION_DEADLINE_MS"] / 1000.0
+
+
+@pytest.fixture
+def busy_model(app):
+    """The stub model behind a single slot that another user holds, with no queue."""
+    app.extensions["models"].install("stub", StubSentimentModel(base_ms=0, per_item_ms=0))
+    controller = app.extensions["admission"]
+    controller.max_concurrency, controller.max_queue = 1, 0
+    with _held(controller):
+        yield
+
+
+def test_shed_requests_get_503_with_retry_after(app, client, busy_model):
+    response = client.post("/api/analyze", json={"news_text": "Shares rallied on strong earnings"})
+    assert response.status_code == 503
+    assert response.json["reason"] == "queue_full"
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_degraded_mode_answers_shed_requests_from_the_lexicon(app, client, db, busy_model):
+    app.config["ADMISSION_DEGRADED"] = True
+    response = client.post("/api/analyze", json={"news_text": "Shares rallied on strong earnings"})
+    assert response.status_code == 200
+    assert response.json["approximate"] is True
+    assert response.json["model_version"] == "lexicon"
+    assert db.execute("SELECT COUNT(*) FROM searches").fetchone()[0] == 0
@@ -0,0 +1,72 @@
+import pytest
+
+import app.analyses as analyses
+from loadtest.stub_model import StubSentimentModel
+
+
+@pytest.fixture
+def analyze(app, client):
+    """POST texts to /api/analyze on the stub model and wait until they are stored."""
+    app.extensions["models"].install("stub", StubSentimentModel(base_ms=0, per_item_ms=0))
+
+    def analyze(*texts, topic="markets"):
+        for text in texts:
+            assert client.post("/api/analyze", json={"news_text": text, "topic": topic}).status_code == 200
+        app.extensions["analysis_writer"].flush()
+
+    return analyze
+
+
+def _texts(response):
+    assert response.status_code == 200
+    return [r["text"] for r in response.json["results"]]
+
+
+def test_analyzed_texts_are_indexed_as_they_are_stored(client, analyze):
+    assert _texts(client.get("/api/analyses/search?q=earnings")) == []
+    analyze("Quarterly earnings beat forecasts", "Rain expected over the weekend")
+
+    results = client.get("/api/analyses/search?q=earnings").json["results"]
+    assert [r["text"] for r in results] == ["Quarterly earnings beat forecasts"]
+    assert results[0]["snippet"] == "Quarterly [earnings] beat forecasts"
+    assert results[0]["topic"] == "markets"
+
+
+def test_results_are_ranked_by_bm25(client, analyze):
+    once = "Earnings season opened with a mixed week for retailers and banks alike"
+    thrice = "Earnings, earnings, earnings: the week was all about earnings"
+    analyze(once, thrice)
+
+    response = client.get("/api/analyses/search?q=earnings")
+    assert _texts(response) == [thrice, once]
+    ranks = [r["rank"] for r in response.json["results"]]
+    assert ranks == sorted(ranks)
+
+
+def test_match_all_needs_every_term(client, analyze):
+    analyze("Earnings beat forecasts", "Forecasts call for rain")
+    assert _texts(client.get("/api/analyses/search?q=earnings+forecasts&match=all")) == ["Earnings beat forecasts"]
+    assert _texts(client.get("/api/analyses/search?q=forecasts+earnings")) == []
+
+
+@pytest.mark.parametrize("q", ['"', 'earnings"', "NEAR(", "AND OR NOT", "*", "earn*", "^", "a\x00b", "(earnings"])
+def test_fts_syntax_in_the_query_is_taken_literally(client, analyze, q):
+    analyze("Quarterly earnings beat forecasts")
+    for match in ("phrase", "all"):
+        response = client.get("/api/analyses/search", query_string={"q": q, "match": match})
+        assert response.status_code == 200
+
+
+def test_queries_fts5_cannot_parse_are_a_400(client, analyze, monkeypatch):
+    analyze("Quarterly earnings beat forecasts")
+    monkeypatch.setattr(analyses, "fts_query", lambda q, match="phrase": q)  # unquoted, as typed
+    response = client.get("/api/analyses/search", query_string={"q": '"earnings'})
+    assert response.status_code == 400
+    assert response.json["error"] == "invalid search query"
+
+
+def test_bad_params_are_rejected(client):
+    assert client.get("/api/analyses/search").status_code == 400
+    assert client.get("/api/analyses/search?q=x&limit=abc").status_code == 400
+    assert client.get("/api/analyses/search?q=x&match=any").status_code == 400
+    assert client.get("/api/analyses/search?q=x&sentiment=angry").status_code == 400
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.api import routes
+from app.asgi import AsgiApp
+from loadtest.stub_upstream import StubUpstream
+
+LATENCY_MS = 400
+
+
+@pytest.fixture(scope="module")
+def upstream():
+    server = StubUpstream(latency_ms=LATENCY_MS).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def newsapi(monkeypatch, upstream):
+    """Point the app at the stub before the ``app`` fixture builds it."""
+    monkeypatch.setenv("DATA_SOURCE", "newsapi")
+    monkeypatch.setenv("NEWS_API_KEY", "stub-key")
+    monkeypatch.setenv("NEWS_API_BASE_URL", upstream.newsapi_url)
+    monkeypatch.setenv("NEWS_API_DAILY_LIMIT", "0")
+    monkeypatch.setenv("NEWS_API_RATE_PER_MIN", "0")
+
+
+async def _asgi_fetches(app, keywords):
+    """Log in through the ASGI app and fetch ``keywords`` concurrently; (responses, seconds)."""
+    asgi = AsgiApp(app)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi), base_url="http://test") as http:
+        login = await http.post("/api/auth/login", json={"username": "alice", "password": "pw"})
+        assert login.status_code == 200
+        started = time.monotonic()
+        responses = await asyncio.gather(*(http.post("/api/fetch-news", json={"keyword": k}) for k in keywords))
+        elapsed = time.monotonic() - started
+    await asgi._client().aclose()
+    return responses, elapsed
+
+
+def test_asgi_fetch_matches_the_wsgi_view(client, app, user):
+    wsgi = client.post("/api/fetch-news", json={"keyword": "apple"})
+    assert wsgi.status_code == 200
+
+    (asgi,), _ = asyncio.run(_asgi_fetches(app, ["apple"]))
+    assert asgi.status_code == 200
+    assert asgi.json() == wsgi.json
+    assert asgi.json()["source"] == "NewsAPI"
+
+
+def test_concurrent_asgi_fetches_overlap(app, user):
+    responses, elapsed = asyncio.run(_asgi_fetches(app, ["apple", "banana", "cherry", "durian"]))
+    assert [r.status_code for r in responses] == [200] * 4
+    # One after another they would take four upstream latencies.
+    assert elapsed < 2 * LATENCY_MS / 1000.0
+
+
+def test_asgi_hooks_and_view_steps_run_off_the_event_loop(app, user, monkeypatch):
+    threads = []
+    app.before_request(lambda: threads.append(threading.current_thread()))
+    record_keyword = routes.record_keyword
+    monkeypatch.setattr(routes, "record_keyword", lambda k: (threads.append(threading.current_thread()), record_keyword(k)))
+
+    async def fetch():
+        loop_thread = threading.current_thread()
+        (response,), _ = await _asgi_fetches(app, ["apple"])
+        return loop_thread, response
+
+    loop_thread, response = asyncio.run(fetch())
+    assert response.status_code == 200
+    assert len(threads) == 3  # the login's hook, then the fetch's hook and view
+    assert loop_thread not in threads
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.batch import BatchWriter
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "rows.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (n INTEGER)")
+    conn.close()
+    return path
+
+
+def _writer(db_path, **kwargs):
+    # A short busy timeout, so a held lock surfaces as "database is locked" quickly.
+    return BatchWriter(
+        db_path, "INSERT INTO t (n) VALUES (?)", flush_ms=10,
+        connect=lambda path: sqlite3.connect(path, timeout=0.05, check_same_thread=False), **kwargs,
+    )
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [n for (n,) in conn.execute("SELECT n FROM t ORDER BY n")]
+    finally:
+        conn.close()
+
+
+def _lock(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    conn.execute("BEGIN IMMEDIATE")
+    return conn
+
+
+def test_rows_survive_a_locked_database(db_path):
+    writer = _writer(db_path, retries=8, retry_backoff=0.02)
+    holder = _lock(db_path)
+    for n in range(10):
+        writer.submit((n,))
+    time.sleep(0.2)  # the writer is retrying by now
+    threading.Timer(0.1, lambda: holder.execute("COMMIT")).start()
+
+    assert writer.flush(timeout=10)
+    writer.close()
+    assert _rows(db_path) == list(range(10))
+    assert writer.failed == 0
+    assert writer.retried > 0
+
+
+def test_rows_are_counted_as_failed_once_retries_run_out(db_path, caplog):
+    writer = _writer(db_path, retries=2, retry_backoff=0.01)
+    holder = _lock(db_path)
+    try:
+        writer.submit((1,))
+        assert writer.flush(timeout=10)
+    finally:
+        holder.execute("COMMIT")
+    writer.close()
+    assert writer.failed == 1
+    assert writer.retried == 2
+    assert any(r.levelname == "ERROR" and "rows lost" in r.getMessage() for r in caplog.records)
+
+
+def test_errors_retrying_cannot_fix_fail_at_once(tmp_path):
+    writer = BatchWriter(str(tmp_path / "empty.db"), "INSERT INTO missing VALUES (?)", flush_ms=10)
+    writer.submit((1,))
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert writer.failed == 1
+    assert writer.retried == 0
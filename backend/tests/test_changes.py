@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+import time
+
+from app.changes import ChangeNotifier
+from tests.conftest import add_search
+
+THREADED = {"wsgi.multithread": True}
+
+
+def _ids(body, key="searches"):
+    return [row["id"] for row in body[key]]
+
+
+def test_since_id_returns_newer_rows_oldest_first(client, db, user):
+    ids = [add_search(db, user, created_at=f"2026-01-0{day} 00:00:00") for day in (3, 1, 2, 4)]
+
+    body = client.get(f"/api/history?since_id={ids[0]}").json
+    assert _ids(body) == ids[1:]
+    assert body["next_since_id"] == ids[-1]
+    assert body["has_more"] is False
+
+
+def test_limit_cuts_the_batch_and_next_since_id_resumes_it(client, db, user):
+    ids = [add_search(db, user) for _ in range(5)]
+
+    first = client.get("/api/history?since_id=0&limit=2").json
+    assert _ids(first) == ids[:2]
+    assert first["has_more"] is True
+
+    rest = client.get(f"/api/history?since_id={first['next_since_id']}&limit=10").json
+    assert _ids(rest) == ids[2:]
+
+
+def test_empty_poll_keeps_the_cursor(client, db, user):
+    last = add_search(db, user)
+    body = client.get(f"/api/history?since_id={last}").json
+    assert body["searches"] == []
+    assert body["next_since_id"] == last
+
+
+def test_bad_since_id_is_rejected(client):
+    assert client.get("/api/history?since_id=-1").status_code == 400
+    assert client.get("/api/history?since_id=abc").status_code == 400
+
+
+def test_wait_returns_once_a_row_is_committed(app, client, db, user):
+    last = add_search(db, user)
+
+    def commit_later():
+        time.sleep(0.2)
+        conn = sqlite3.connect(app.config["SQLITE_PATH"])
+        add_search(conn, user)
+        conn.close()
+        app.extensions["changes"].notify("searches")
+
+    threading.Thread(target=commit_later).start()
+    started = time.monotonic()
+    body = client.get(f"/api/history?since_id={last}&wait=10", environ_overrides=THREADED).json
+    assert time.monotonic() - started < 5
+    assert _ids(body) == [last + 1]
+
+
+def test_single_threaded_server_never_waits(client, db, user):
+    last = add_search(db, user)
+    started = time.monotonic()
+    client.get(f"/api/history?since_id={last}&wait=10")
+    assert time.monotonic() - started < 1
+
+
+def test_notifier_caps_concurrent_waiters():
+    notifier = ChangeNotifier(max_waiters=1, recheck=0.05)
+    waiting = threading.Thread(target=notifier.poll, args=("searches", list, 0.5))
+    waiting.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    assert notifier.poll("searches", list, 1.0) == []
+    assert time.monotonic() - started < 0.3
+    waiting.join()
+
+
+def test_admin_activity_feed_is_oldest_first(app, client, admin_client):
+    writer = app.extensions["activity_writer"]
+    writer.flush()
+    top = admin_client.get("/api/admin/activity?since_id=0&limit=500").json
+    client.post("/api/auth/logout")
+    writer.flush()
+
+    body = admin_client.get(f"/api/admin/activity?since_id={top['next_since_id']}").json
+    actions = [row["action"] for row in body["activities"]]
+    assert "user_logout" in actions
+    assert _ids(body, "activities") == sorted(_ids(body, "activities"))
+    assert min(_ids(body, "activities")) > top["next_since_id"]
@@ -0,0 +1,116 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+import app.admin.export as export
+from app.admin.export import EXPORT_COLUMNS, stream_export
+
+N_SEARCHES = 1234
+
+
+@pytest.fixture
+def searches(db, user):
+    db.executemany(
+        """INSERT INTO searches (user_id, keyword, tweet_count, positive, neutral, negative, created_at)
+           VALUES (?, ?, 1, 50, 30, 20, '2026-01-01 00:00:00')""",
+        [(user, f"keyword {i}, \"quoted\"") for i in range(N_SEARCHES)],
+    )
+    db.commit()
+    columns = ", ".join(EXPORT_COLUMNS["searches"])
+    return [dict(r) for r in db.execute(f"SELECT {columns} FROM searches ORDER BY id")]
+
+
+def _export(admin_client, fmt, **params):
+    """(chunks, body) of a streamed export of the searches table."""
+    response = admin_client.get(
+        "/api/admin/export", query_string={"format": fmt, "table": "searches", **params}, buffered=False
+    )
+    assert response.status_code == 200
+    assert response.is_streamed
+    chunks = list(response.response)
+    response.close()
+    return chunks, b"".join(chunks)
+
+
+def _parse(fmt, body):
+    text = body.decode("utf-8")
+    if fmt == "json":
+        return json.loads(text)["searches"]
+    if fmt == "ndjson":
+        rows = [json.loads(line) for line in text.splitlines()]
+        assert {r.pop("table") for r in rows} == {"searches"}
+        return rows
+    header, *rows = csv.reader(io.StringIO(text))
+    assert header == ["table", *EXPORT_COLUMNS["searches"]]
+    return [dict(zip(header[1:], row[1:])) for row in rows]
+
+
+def _as_text(rows):
+    return [{k: "" if v is None else str(v) for k, v in row.items()} for row in rows]
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson", "csv"])
+def test_each_format_streams_every_row(admin_client, searches, fmt):
+    chunks, body = _export(admin_client, fmt)
+    assert len(chunks) > N_SEARCHES // export.FETCH_SIZE
+    rows = _parse(fmt, body)
+    assert (_as_text(rows) if fmt == "csv" else rows) == (_as_text(searches) if fmt == "csv" else searches)
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson", "csv"])
+def test_gzip_decompresses_to_the_same_rows(admin_client, searches, fmt):
+    _, plain = _export(admin_client, fmt)
+    _, compressed = _export(admin_client, fmt, gzip="1")
+    assert gzip.decompress(compressed) == plain
+
+
+def test_since_id_exports_only_newer_rows(admin_client, searches):
+    _, body = _export(admin_client, "ndjson", since_id=searches[-3]["id"])
+    assert [r["id"] for r in _parse("ndjson", body)] == [r["id"] for r in searches[-2:]]
+
+
+class _CountingConnection:
+    """Wraps a sqlite3 connection and records how many rows each fetch asks for."""
+
+    def __init__(self, conn, fetches):
+        self.conn, self.fetches = conn, fetches
+
+    def execute(self, *args):
+        return _CountingCursor(self.conn.execute(*args), self.fetches)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class _CountingCursor:
+    def __init__(self, cur, fetches):
+        self.cur, self.fetches = cur, fetches
+
+    def fetchmany(self, size):
+        rows = self.cur.fetchmany(size)
+        self.fetches.append(len(rows))
+        return rows
+
+    def __getattr__(self, name):
+        if name in ("fetchall", "__iter__"):
+            raise AssertionError(f"export called {name}")
+        return getattr(self.cur, name)
+
+
+def test_rows_are_fetched_in_chunks_as_the_body_is_consumed(app, searches, monkeypatch):
+    fetches = []
+    connect = export._connect
+    monkeypatch.setattr(export, "_connect", lambda path: _CountingConnection(connect(path), fetches))
+
+    body = stream_export(app.config["SQLITE_PATH"], ["searches"], "ndjson")
+    first = next(body)
+    assert fetches == [export.FETCH_SIZE]
+    assert first.count(b"\n") == export.FETCH_SIZE
+
+    rest = b"".join(body)
+    assert max(fetches) == export.FETCH_SIZE
+    assert sum(fetches) == N_SEARCHES
+    assert (first + rest).count(b"\n") == N_SEARCHES
@@ -0,0 +1,54 @@
+from tests.conftest import add_search, add_user
+
+
+def _ids(page):
+    return [s["id"] for s in page["searches"]]
+
+
+def test_cursor_pages_cover_history_newest_first_without_overlap(client, db, user):
+    # Two rows share a timestamp, so the id tiebreak in the cursor matters.
+    ids = [add_search(db, user, created_at=f"2026-01-0{day} 00:00:00") for day in (1, 2, 2, 3, 4)]
+
+    first = client.get("/api/history?limit=2").json
+    assert _ids(first) == [ids[4], ids[3]]
+    assert first["has_more"] is True
+
+    second = client.get(f"/api/history?limit=2&cursor={first['next_cursor']}").json
+    assert _ids(second) == [ids[2], ids[1]]
+
+    last = client.get(f"/api/history?limit=2&cursor={second['next_cursor']}").json
+    assert _ids(last) == [ids[0]]
+    assert last["has_more"] is False
+    assert last["next_cursor"] is None
+
+
+def test_statistics_cover_all_rows_not_just_the_page(client, db, user):
+    for day in range(1, 6):
+        add_search(db, user, created_at=f"2026-01-0{day} 00:00:00", tweet_count=4)
+
+    page = client.get("/api/history?limit=1").json
+    assert len(page["searches"]) == 1
+    assert page["statistics"]["total_searches"] == 5
+    assert page["statistics"]["total_tweets_analyzed"] == 20
+
+
+def test_pages_only_show_the_users_own_rows(client, db, user):
+    mine = add_search(db, user)
+    add_search(db, add_user(db, "bob"))
+
+    assert _ids(client.get("/api/history").json) == [mine]
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/api/history?cursor=not-a-cursor").status_code == 400
+
+
+def test_bad_limit_is_rejected_and_large_ones_are_clamped(client, db, user):
+    response = client.get("/api/history?limit=abc")
+    assert response.status_code == 400
+    assert response.json["error"] == "limit must be an integer"
+
+    for day in range(1, 4):
+        add_search(db, user, created_at=f"2026-01-0{day} 00:00:00")
+    assert len(client.get("/api/history?limit=0").json["searches"]) == 1
+    assert client.get("/api/history?limit=100000").json["has_more"] is False
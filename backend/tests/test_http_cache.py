@@ -0,0 +1,111 @@
+import sqlite3
+
+import pytest
+
+from app.activity import log_activity
+from tests.conftest import add_search, add_user
+
+
+@pytest.fixture
+def writer(app):
+    """The activity writer, flushed only when a test asks."""
+    writer = app.extensions["activity_writer"]
+    writer.flush_interval = 60.0
+    return writer
+
+
+def _revalidate(client, url, response):
+    return client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+
+
+def _actions(app, action):
+    conn = sqlite3.connect(app.config["ACTIVITY_DB_PATH"])
+    try:
+        return conn.execute("SELECT COUNT(*) FROM activity_log WHERE action = ?", (action,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_history_is_304_until_a_search_is_added(client, db, user):
+    add_search(db, user)
+    first = client.get("/api/history")
+    assert first.headers["ETag"].startswith('W/"')
+
+    unchanged = _revalidate(client, "/api/history", first)
+    assert unchanged.status_code == 304
+    assert unchanged.data == b""
+
+    add_search(db, user, created_at="2026-01-02 00:00:00")
+    changed = _revalidate(client, "/api/history", first)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+    assert len(changed.json["searches"]) == 2
+
+
+def test_history_etag_is_per_user(app, client, db, user):
+    add_search(db, user)
+    first = client.get("/api/history")
+
+    add_user(db, "bob")
+    bob = app.test_client()
+    bob.post("/api/auth/login", json={"username": "bob", "password": "pw"})
+    assert _revalidate(bob, "/api/history", first).status_code == 200
+
+
+def test_change_feed_polls_are_never_304(client, db, user):
+    add_search(db, user)
+    first = client.get("/api/history")
+    feed = client.get("/api/history?since_id=0", headers={"If-None-Match": first.headers["ETag"]})
+    assert feed.status_code == 200
+    assert "ETag" not in feed.headers
+
+
+def test_admin_view_is_logged_even_when_answered_304(app, admin_client, writer):
+    first = admin_client.get("/api/admin/users")
+    assert _revalidate(admin_client, "/api/admin/users", first).status_code == 304
+    writer.flush()
+    assert _actions(app, "admin_view_users") == 2
+
+
+def test_statistics_polls_are_304_despite_their_own_log_rows(admin_client, writer):
+    first = admin_client.get("/api/admin/statistics")
+    assert first.status_code == 200
+
+    writer.flush()  # the login row and the first poll's own row
+    assert _revalidate(admin_client, "/api/admin/statistics", first).status_code == 304
+    writer.flush()
+    assert _revalidate(admin_client, "/api/admin/statistics", first).status_code == 304
+
+
+def test_statistics_etag_follows_users_searches_and_user_activity(app, admin_client, db, writer):
+    first = admin_client.get("/api/admin/statistics")
+
+    user_id = add_user(db, "bob")
+    after = _revalidate(admin_client, "/api/admin/statistics", first)
+    assert after.status_code == 200
+    assert after.json["total_users"] == first.json["total_users"] + 1
+
+    add_search(db, user_id)
+    assert _revalidate(admin_client, "/api/admin/statistics", after).status_code == 200
+
+    latest = admin_client.get("/api/admin/statistics")
+    with app.test_request_context():
+        log_activity("login", user_id=user_id)
+    writer.flush()
+    assert _revalidate(admin_client, "/api/admin/statistics", latest).status_code == 200
+
+
+def test_trending_etag_changes_with_traffic(app, client):
+    first = client.get("/api/trending")
+    assert _revalidate(client, "/api/trending", first).status_code == 304
+
+    app.extensions["trending"].record("apple")
+    assert _revalidate(client, "/api/trending", first).status_code == 200
+
+
+def test_trending_validator_moves_as_scores_decay(app):
+    tracker = app.extensions["trending"]
+    epoch = tracker.sketch.half_life / 100.0
+    now = 1000 * epoch
+    assert tracker.validator(now) == tracker.validator(now + epoch / 2)
+    assert tracker.validator(now) != tracker.validator(now + epoch)
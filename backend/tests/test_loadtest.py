@@ -0,0 +1,19 @@
+import json
+import os
+
+from loadtest.__main__ import main
+
+
+def test_a_short_run_reports_every_endpoint_as_json(capsys, monkeypatch):
+    # boot_app points the app at the stub through os.environ; keep that out of later tests.
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+
+    assert main(["--rps", "5", "--duration", "1", "--json"]) == 0
+
+    report = json.loads(capsys.readouterr().out)
+    rows = {row["endpoint"]: row for row in report["endpoints"]}
+    assert sum(row["requests"] for row in rows.values()) == 5
+    assert set(rows) <= {"login", "fetch_news", "analyze", "history", "admin"}
+    assert all(row["errors"] == 0 for row in rows.values()), rows
+    assert all(row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"] for row in rows.values())
+    assert report["elapsed_s"] >= 0.8
@@ -0,0 +1,15 @@
+def test_metrics_are_hidden_without_a_token(app):
+    assert app.test_client().get("/api/metrics").status_code == 404
+
+
+def test_metrics_need_the_configured_token(app):
+    app.config["METRICS_TOKEN"] = "scrape-me"
+    client = app.test_client()
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/api/metrics", headers={"Authorization": "Bearer scrape-me"})
+    assert response.status_code == 200
+    assert b"app_stage_seconds" in response.data
+
+
+def test_admins_can_read_metrics(admin_client):
+    assert admin_client.get("/api/metrics").status_code == 200
@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.ml.batch import SentimentBatch
+from app.ml.pipeline import pipelined
+from app.ml.sentiment import TokenCache, TwitterRobertaSentiment, _softmax
+
+TEXTS = [f"headline {i} " + "word " * (i % 5) for i in range(23)]
+
+
+class _Tokenizer:
+    """Token ids from the characters, like a real tokenizer's batch call."""
+
+    pad_token_id = 1
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def __call__(self, texts, truncation=True, max_length=128):
+        if self.fail_on in texts:
+            raise RuntimeError("tokenizer exploded")
+        time.sleep(random.uniform(0, 0.002))
+        return {"input_ids": [[0, *(ord(c) for c in t[: max_length - 2]), 2] for t in texts]}
+
+
+def _model(tokenizer=None):
+    """A TwitterRobertaSentiment with the real batching code and a NumPy stand-in for
+    the network (torch and the weights aren't needed to test the pipeline)."""
+    model = object.__new__(TwitterRobertaSentiment)
+    model.tokenizer = tokenizer or _Tokenizer()
+    model.token_cache = TokenCache(0)
+    model.semantic_cache = None
+    model._pad = lambda ids: [np.asarray(row, dtype=np.int64) for row in ids]
+
+    def forward(encoded):
+        time.sleep(random.uniform(0, 0.002))
+        return _softmax(np.array([[row.sum() % 7, len(row) % 5, row.max() % 3] for row in encoded], dtype=np.float64))
+
+    model._forward = forward
+    return model
+
+
+def test_pipelined_batches_equal_one_unpipelined_batch_in_input_order():
+    model = _model()
+    expected = SentimentBatch.from_probs(model._forward(model._prepare(TEXTS)))
+
+    for batch_size in (1, 4, 32):
+        got = model.predict_batch(TEXTS, batch_size=batch_size)
+        assert len(got) == len(TEXTS)
+        np.testing.assert_array_equal(got.probs, expected.probs)
+        assert got.label_names() == expected.label_names()
+
+
+def test_a_tokenizer_error_reaches_the_caller():
+    model = _model(_Tokenizer(fail_on=TEXTS[9]))
+    result = {}
+
+    def run():
+        try:
+            model.predict_batch(TEXTS, batch_size=4)
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive(), "predict_batch hung on the hand-off queue"
+    assert str(result["error"]) == "tokenizer exploded"
+
+
+def test_results_before_a_prepare_error_are_still_yielded():
+    def prepare(chunk):
+        if chunk == 3:
+            raise ValueError("bad chunk")
+        return chunk
+
+    out = []
+    with pytest.raises(ValueError, match="bad chunk"):
+        for r in pipelined(range(6), prepare, lambda x: x * 10):
+            out.append(r)
+    assert out == [0, 10, 20]
+
+
+def test_abandoning_the_results_stops_the_preparing_thread():
+    prepared = []
+
+    def prepare(chunk):
+        prepared.append(chunk)
+        return chunk
+
+    results = pipelined(range(1000), prepare, lambda x: x, depth=2)
+    assert next(results) == 0
+    results.close()
+    time.sleep(0.3)
+    assert len(prepared) <= 5
+    assert not any(t.name == "pipeline-prepare" for t in threading.enumerate())
@@ -0,0 +1,19 @@
+import pytest
+
+from app.profiling import MAX_SECONDS
+
+
+@pytest.mark.parametrize("query", [
+    "seconds=abc", "seconds=nan", "seconds=inf", "seconds=0", "seconds=-1",
+    "interval_ms=abc", "interval_ms=0", "interval_ms=nan",
+])
+def test_profile_rejects_bad_params(admin_client, query):
+    assert admin_client.post(f"/api/admin/profile?{query}").status_code == 400
+
+
+def test_profile_clamps_long_runs(admin_client):
+    # The sampler thread is a daemon that sleeps out its one interval; it never blocks exit.
+    response = admin_client.post("/api/admin/profile?seconds=9999&interval_ms=999999")
+    assert response.status_code == 202
+    assert response.json["seconds"] == MAX_SECONDS
+    assert response.json["interval_ms"] == MAX_SECONDS * 1000
@@ -0,0 +1,88 @@
+import types
+
+import pytest
+
+from app import quota
+from app.db import create_quota_schema
+from app.quota import QuotaExceeded, QuotaManager, SourceLimits
+
+START = 1_767_268_800.0  # 2026-01-01 12:00:00 UTC
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=START)
+    monkeypatch.setattr(quota, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def quota_db(tmp_path):
+    path = str(tmp_path / "quota.db")
+    create_quota_schema(path)
+    return path
+
+
+def _manager(path, daily_limit=0, rate_per_min=6.0, burst=2.0, reserve_fraction=0.2):
+    return QuotaManager(path, {"newsapi": SourceLimits(daily_limit, rate_per_min, burst)}, reserve_fraction)
+
+
+def _denied(manager, priority="user"):
+    with pytest.raises(QuotaExceeded) as excinfo:
+        manager.acquire("newsapi", priority)
+    return excinfo.value
+
+
+def test_bucket_refills_at_the_configured_rate(clock, quota_db):
+    manager = _manager(quota_db, rate_per_min=6.0, burst=2.0)
+    manager.acquire("newsapi")
+    manager.acquire("newsapi")
+    denied = _denied(manager)
+    assert denied.reason == "rate"
+    assert denied.retry_after == pytest.approx(10.0)
+
+    clock.now += 5.0  # half a token
+    assert _denied(manager).retry_after == pytest.approx(5.0)
+
+    clock.now += 5.0
+    manager.acquire("newsapi")
+    assert _denied(manager).reason == "rate"
+
+
+def test_bucket_never_holds_more_than_burst(clock, quota_db):
+    manager = _manager(quota_db, rate_per_min=6.0, burst=2.0)
+    clock.now += 3600.0
+    manager.acquire("newsapi")
+    manager.acquire("newsapi")
+    assert _denied(manager).reason == "rate"
+
+
+def test_workers_share_one_bucket(clock, quota_db):
+    first, second = _manager(quota_db, burst=2.0), _manager(quota_db, burst=2.0)
+    first.acquire("newsapi")
+    second.acquire("newsapi")
+    assert _denied(first).reason == "rate"
+
+
+def test_daily_reserve_is_kept_for_trending_and_resets_at_midnight(clock, quota_db):
+    manager = _manager(quota_db, daily_limit=5, rate_per_min=0, reserve_fraction=0.2)
+    for _ in range(4):
+        manager.acquire("newsapi")
+    assert _denied(manager).reason == "daily_reserved"
+
+    manager.acquire("newsapi", "trending")
+    assert _denied(manager, "trending").reason == "daily_limit"
+
+    clock.now += 12 * 3600.0
+    manager.acquire("newsapi")
+
+
+def test_429_blocks_for_retry_after(clock, quota_db):
+    manager = _manager(quota_db, burst=10.0)
+    manager.report("newsapi", 429, {"Retry-After": "30"})
+    denied = _denied(manager)
+    assert denied.reason == "retry_after"
+    assert denied.retry_after == pytest.approx(30.0)
+
+    clock.now += 30.0
+    manager.acquire("newsapi")
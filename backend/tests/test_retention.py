@@ -0,0 +1,61 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from app.retention import load_index, read_archive, roll_over
+
+DAYS = {"2026-01-01": 3, "2026-01-02": 2}
+
+
+@pytest.fixture
+def activity_db(app):
+    path = app.config["ACTIVITY_DB_PATH"]
+    conn = sqlite3.connect(path)
+    for day, n in DAYS.items():
+        for i in range(n):
+            conn.execute(
+                "INSERT INTO activity_log (action, actor_type, user_id, created_at) VALUES ('login', 'user', ?, ?)",
+                (i, f"{day} 0{i}:00:00"),
+            )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _remaining(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM activity_log WHERE created_at < '2026-02-01'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_rollover_moves_old_rows_into_readable_segments(app, activity_db, tmp_path):
+    archive = str(tmp_path / "archive")
+    assert roll_over(activity_db, archive, 1) == DAYS
+    assert _remaining(activity_db) == 0
+
+    index = load_index(archive)
+    assert {day: entry["rows"] for day, entry in index.items()} == DAYS
+    rows = list(read_archive(archive))
+    assert [r["created_at"][:10] for r in rows] == [d for d, n in DAYS.items() for _ in range(n)]
+    assert index["2026-01-01"]["min_id"] == rows[0]["id"]
+    assert index["2026-01-02"]["max_id"] == rows[-1]["id"]
+
+    assert [r["user_id"] for r in read_archive(archive, since="2026-01-02")] == [0, 1]
+    assert roll_over(activity_db, archive, 1) == {}
+
+
+def test_rerun_after_a_lost_delete_does_not_double_count(app, activity_db, tmp_path):
+    archive = str(tmp_path / "archive")
+    before = str(tmp_path / "before.db")
+    shutil.copy(activity_db, before)
+    roll_over(activity_db, archive, 1)
+    # As if the DELETE had never committed: the rows are back and get archived again.
+    shutil.copy(before, activity_db)
+    roll_over(activity_db, archive, 1)
+
+    assert _remaining(activity_db) == 0
+    assert {day: entry["rows"] for day, entry in load_index(archive).items()} == DAYS
+    assert len(list(read_archive(archive))) == sum(DAYS.values())
@@ -0,0 +1,109 @@
+import sqlite3
+
+import pytest
+
+from app.db import ALL_KEYWORDS, ROLLUP_GRANULARITIES
+from app.rollups import _label_stats
+from tests.conftest import add_search, add_user
+
+
+def test_single_sample_has_no_band():
+    stats = _label_stats(1, 40.0, 1600.0)
+    assert stats["mean"] == 40.0
+    assert stats["stddev"] is None and stats["low"] is None and stats["high"] is None
+
+
+def test_band_brackets_the_mean():
+    stats = _label_stats(3, 120.0, 40.0 ** 2 + 30.0 ** 2 + 50.0 ** 2)
+    assert stats["mean"] == 40.0
+    assert stats["stddev"] == 10.0
+    assert stats["low"] < 40.0 < stats["high"]
+
+
+def test_series_leaves_single_analysis_buckets_without_band(client, db, user):
+    search_id = add_search(db, user, created_at="2026-01-01 10:00:00")
+    db.execute(
+        """INSERT INTO analyses (search_id, user_id, topic, text, sentiment, confidence,
+                                 positive, neutral, negative, created_at)
+           VALUES (?, ?, 'apple', 'text', 'positive', 80, 80, 10, 10, '2026-01-01 10:00:00')""",
+        (search_id, user),
+    )
+    db.commit()
+    series = client.get("/api/topics/apple/series?since=2026-01-01&until=2026-01-02").json["series"]
+    assert [(p["analyses"], p["band"], p["stddev"]) for p in series] == [(1, None, None)]
+
+
+def _recount_search_rollups(db):
+    rows = {}
+    for gran, expr in ROLLUP_GRANULARITIES.items():
+        bucket = expr.format(col="created_at")
+        for keyword in ("keyword", f"'{ALL_KEYWORDS}'"):
+            for r in db.execute(f"""
+                SELECT {bucket}, {keyword}, COUNT(*), SUM(positive), SUM(neutral), SUM(negative),
+                       SUM(positive * positive), SUM(neutral * neutral), SUM(negative * negative)
+                FROM searches GROUP BY 1, 2
+            """):
+                rows[(gran, r[0], r[1])] = tuple(r[2:])
+    return rows
+
+
+def _stored_search_rollups(db):
+    return {
+        (r[0], r[1], r[2]): tuple(r[3:])
+        for r in db.execute("""SELECT granularity, bucket, keyword, analyses, sum_positive, sum_neutral, sum_negative,
+                                      sq_positive, sq_neutral, sq_negative FROM search_rollups""")
+    }
+
+
+def _assert_rollups_match_a_recount(db):
+    stored, recount = _stored_search_rollups(db), _recount_search_rollups(db)
+    assert stored.keys() == recount.keys()
+    for key, values in recount.items():
+        assert stored[key] == pytest.approx(values), key
+
+
+def test_rollups_and_statistics_match_a_recount_after_inserts_and_deletes(app, admin_client, db, user):
+    bob = add_user(db, "bob")
+    ids = []
+    for i in range(30):
+        db.execute(
+            """INSERT INTO searches (user_id, keyword, tweet_count, positive, neutral, negative, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (
+                (user, bob)[i % 2], ("apple", "banana", "cherry")[i % 3], i,
+                10.0 + i * 1.7, 30.0 - i * 0.3, 60.0 - i * 1.4, f"2026-01-0{1 + i % 3} {i % 24:02d}:15:00",
+            ),
+        )
+        ids.append(db.execute("SELECT last_insert_rowid()").fetchone()[0])
+    db.commit()
+    _assert_rollups_match_a_recount(db)
+
+    # Empty a whole bucket (cherry on Jan 3) and thin out others.
+    db.execute("DELETE FROM searches WHERE keyword = 'cherry' AND created_at >= '2026-01-03'")
+    db.executemany("DELETE FROM searches WHERE id = ?", [(i,) for i in ids[::4]])
+    db.execute("UPDATE searches SET positive = 90, neutral = 5, negative = 5 WHERE id = ?", (ids[1],))
+    db.execute("DELETE FROM users WHERE id = ?", (bob,))
+    db.commit()
+    _assert_rollups_match_a_recount(db)
+    assert db.execute("SELECT COUNT(*) FROM search_rollups WHERE analyses <= 0").fetchone()[0] == 0
+
+    series = admin_client.get("/api/admin/rollups/searches?keyword=apple&since=2026-01-01&until=2026-01-04").json
+    recount = db.execute(
+        "SELECT substr(created_at, 1, 10), COUNT(*), AVG(positive) FROM searches WHERE keyword = 'apple' GROUP BY 1"
+    ).fetchall()
+    assert [(p["bucket"], p["analyses"]) for p in series["series"]] == [(r[0], r[1]) for r in recount]
+    assert [p["mean"]["positive"] for p in series["series"]] == [round(r[2], 2) for r in recount]
+
+    app.extensions["activity_writer"].flush()
+    stats = admin_client.get("/api/admin/statistics").json
+    app.extensions["activity_writer"].flush()
+    activity = sqlite3.connect(app.config["ACTIVITY_DB_PATH"])
+    try:
+        activity.execute("DELETE FROM activity_log WHERE id IN (SELECT id FROM activity_log LIMIT 1)")
+        activity.commit()
+        total_activities = activity.execute("SELECT COUNT(*) FROM activity_log").fetchone()[0]
+    finally:
+        activity.close()
+    assert stats["total_users"] == db.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    assert stats["total_searches"] == db.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+    assert admin_client.get("/api/admin/statistics").json["total_activities"] == total_activities
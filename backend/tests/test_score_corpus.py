@@ -0,0 +1,95 @@
+import json
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from loadtest.stub_model import StubSentimentModel
+
+BACKEND = Path(__file__).resolve().parents[1]
+N_RECORDS = 400
+EMPTY = {"17", "250"}  # records without text get no output row
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(1, N_RECORDS + 1):
+            text = "" if str(i) in EMPTY else f"Record {i}: markets {'rise' if i % 3 else 'fall'} on day {i % 7}"
+            f.write(json.dumps({"id": str(i), "text": text}) + "\n")
+    return path
+
+
+def _expected(corpus):
+    records = [json.loads(line) for line in corpus.read_text(encoding="utf-8").splitlines()]
+    records = [r for r in records if r["text"]]
+    batch = StubSentimentModel(base_ms=0, per_item_ms=0).predict_batch([r["text"] for r in records])
+    return [json.loads(line) for line in batch.to_jsonl([r["id"] for r in records]).splitlines()]
+
+
+def _command(corpus, output):
+    return [
+        sys.executable, "score_corpus.py", str(corpus), "-o", str(output),
+        "--stub-model", "5", "--workers", "2", "--batch-size", "10", "--checkpoint-every", "0",
+    ]
+
+
+def _checkpointed(output):
+    if output.suffix == ".db":
+        if not output.exists():
+            return 0
+        conn = sqlite3.connect(output)
+        try:
+            row = conn.execute("SELECT records FROM score_checkpoint").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        finally:
+            conn.close()
+        return row[0] if row else 0
+    try:
+        return json.loads(Path(f"{output}.checkpoint").read_text())["records"]
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _records(output):
+    if output.suffix == ".db":
+        conn = sqlite3.connect(output)
+        try:
+            columns = ("id", "sentiment", "confidence", "positive", "neutral", "negative")
+            return [dict(zip(columns, row)) for row in conn.execute(f"SELECT {', '.join(columns)} FROM scores")]
+        finally:
+            conn.close()
+    return [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("sink", ["scores.jsonl", "scores.db"])
+@pytest.mark.parametrize("sig", [signal.SIGKILL, signal.SIGINT], ids=["killed", "interrupted"])
+def test_a_run_stopped_partway_resumes_without_duplicates_or_gaps(tmp_path, corpus, sink, sig):
+    output = tmp_path / sink
+    run = subprocess.Popen(_command(corpus, output), cwd=BACKEND, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + 60
+    while not 0 < _checkpointed(output) and time.monotonic() < deadline and run.poll() is None:
+        time.sleep(0.01)
+    run.send_signal(sig)
+    run.communicate(timeout=30)
+    stopped_at = _checkpointed(output)
+    assert 0 < stopped_at < N_RECORDS, "the run wasn't stopped partway"
+
+    resumed = subprocess.run(_command(corpus, output), cwd=BACKEND, capture_output=True, text=True, timeout=120)
+    assert resumed.returncode == 0, resumed.stderr
+    assert f"Resuming after {stopped_at} records" in resumed.stderr
+    assert _checkpointed(output) == N_RECORDS
+
+    records = _records(output)
+    ids = [r["id"] for r in records]
+    assert len(ids) == len(set(ids)), "duplicate output rows"
+    expected = _expected(corpus)
+    assert sorted(records, key=lambda r: int(r["id"])) == expected
+    if output.suffix == ".jsonl":
+        assert records == expected  # appended in input order
@@ -0,0 +1,66 @@
+import numpy as np
+
+from app.ml.semantic_cache import SemanticCache
+from app.model_registry import build_semantic_cache
+
+HEADLINE = "Apple shares jump after record iPhone sales in China"
+REWRITE = "Apple shares jump after record iPhone sales in china today"  # cosine distance ~0.054
+UNRELATED = "Rain expected across the north this weekend"
+
+
+def _model(calls):
+    def infer(text):
+        calls.append(text)
+        return np.array([0.1, 0.2, 0.7], dtype=np.float32) if text == HEADLINE else np.array([0.6, 0.3, 0.1], dtype=np.float32)
+    return infer
+
+
+def test_a_near_duplicate_within_the_distance_is_reused():
+    cache, calls = SemanticCache(max_distance=0.08, audit_rate=0), []
+    cache.predict(HEADLINE, _model(calls))
+
+    probs, info = cache.predict(REWRITE, _model(calls))
+    assert calls == [HEADLINE]
+    assert info["reused"] is True and info["similarity"] > 0.92
+    assert np.allclose(probs, [0.1, 0.2, 0.7])
+
+    cache.predict(UNRELATED, _model(calls))
+    assert calls == [HEADLINE, UNRELATED]
+    assert cache.stats()["hits"] == 1
+
+
+def test_a_near_duplicate_beyond_the_distance_is_scored_afresh():
+    cache, calls = SemanticCache(max_distance=0.03, audit_rate=0), []
+    cache.predict(HEADLINE, _model(calls))
+
+    probs, info = cache.predict(REWRITE, _model(calls))
+    assert calls == [HEADLINE, REWRITE]
+    assert info == {"reused": False}
+    assert np.allclose(probs, [0.6, 0.3, 0.1])
+
+
+def test_the_oldest_entry_is_evicted_at_max_items():
+    cache, calls = SemanticCache(max_items=2, audit_rate=0), []
+    for text in (HEADLINE, UNRELATED, "Central bank holds interest rates steady"):
+        cache.predict(text, _model(calls))
+    assert cache.stats()["size"] == 2
+
+    cache.predict(HEADLINE, _model(calls))  # evicted, so scored again
+    assert calls.count(HEADLINE) == 2
+    # Evicted slots leave no stale bucket entries behind.
+    assert all(slot < 2 for table in cache._buckets for bucket in table.values() for slot in bucket)
+    assert sum(len(bucket) for bucket in cache._buckets[0].values()) == 2
+
+
+def test_semantic_cache_settings_come_from_config(app):
+    assert build_semantic_cache(app.config) is None
+
+    app.config.update(
+        SEMANTIC_CACHE_ENABLED=True,
+        SEMANTIC_CACHE_MAX_ITEMS=3,
+        SEMANTIC_CACHE_MAX_DISTANCE=0.03,
+        SEMANTIC_CACHE_AUDIT_RATE=0.0,
+    )
+    cache = build_semantic_cache(app.config)
+    assert (cache.max_items, cache.max_distance, cache.audit_rate) == (3, 0.03, 0.0)
+    assert cache.stats()["memory_bytes"] == 3 * (cache.dim * 2 + 3 * 4)
@@ -0,0 +1,83 @@
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from app.ml.batch import LABELS, SentimentBatch
+
+RECORD_KEYS = ("positive", "neutral", "negative")
+
+
+def _probs(n, seed=7):
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(size=(n, 3)).astype(np.float32)
+    e = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return (e / e.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def _old_dicts(probs):
+    """predict_batch's output before SentimentBatch: one dict per text."""
+    return [{LABELS[j]: float(row[j]) for j in range(3)} for row in probs]
+
+
+def _old_record(record_id, probs):
+    """score_corpus's record for one text before SentimentBatch."""
+    label = max(probs, key=probs.get)
+    return {
+        "id": record_id,
+        "sentiment": label,
+        "confidence": round(probs[label] * 100, 1),
+        **{k: round(probs[k] * 100, 2) for k in RECORD_KEYS},
+    }
+
+
+@pytest.fixture
+def probs():
+    p = _probs(2000)
+    p[0] = [0.25, 0.5, 0.25]
+    p[1] = [0.4, 0.2, 0.4]  # a tie: the first label wins, as max() over the dict did
+    return p
+
+
+def test_to_dicts_matches_the_old_output(probs):
+    assert SentimentBatch.from_probs(probs).to_dicts() == _old_dicts(probs)
+
+
+def test_rows_and_jsonl_match_the_old_records(probs):
+    batch = SentimentBatch.from_probs(probs)
+    ids = [f"doc-{i}" if i % 2 else i for i in range(len(probs))]
+    records = [_old_record(i, d) for i, d in zip(ids, _old_dicts(probs))]
+
+    assert [tuple(r.values()) for r in records] == list(batch.rows(ids))
+    assert batch.to_jsonl(ids) == "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    assert [json.loads(line) for line in batch.to_jsonl(ids).splitlines()] == records
+
+
+def test_jsonl_ids_are_escaped_like_json_dumps():
+    batch = SentimentBatch.from_probs(_probs(3))
+    ids = ['quote " and \\ backslash', "naïve café", "line\nbreak"]
+    assert [json.loads(line)["id"] for line in batch.to_jsonl(ids).splitlines()] == ids
+
+
+def test_concat_of_parts_equals_the_whole(probs):
+    whole = SentimentBatch.from_probs(probs)
+    parts = [SentimentBatch.from_probs(probs[i : i + 300]) for i in range(0, len(probs), 300)]
+    joined = SentimentBatch.concat(parts)
+    for field in ("probs", "labels", "confidence"):
+        np.testing.assert_array_equal(getattr(joined, field), getattr(whole, field))
+    assert len(SentimentBatch.concat([])) == 0
+
+
+def test_mean_matches_the_old_aggregate(probs):
+    mean = SentimentBatch.from_probs(probs).mean()
+    dicts = _old_dicts(probs)
+    for label in LABELS:
+        assert getattr(mean, label) == pytest.approx(sum(d[label] for d in dicts) / len(dicts), abs=1e-12)
+    assert SentimentBatch.empty().mean().as_percentages() == {"positive": 0.0, "neutral": 0.0, "negative": 0.0}
+
+
+def test_a_batch_survives_pickling(probs):
+    batch = SentimentBatch.from_probs(probs)
+    copy = pickle.loads(pickle.dumps(batch))
+    assert copy.to_jsonl(range(len(probs))) == batch.to_jsonl(range(len(probs)))
@@ -0,0 +1,19 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_startup_stays_light_and_within_budget():
+    proc = subprocess.run(
+        [sys.executable, "startup_bench.py", "--runs", "3", "--json"],
+        cwd=BACKEND_ROOT, capture_output=True, text=True, timeout=300,
+    )
+    report = json.loads(proc.stdout)
+    assert report["heavy_modules"] == []
+    assert not report["import_touched_db"]
+    assert not report["init_off_touched_db"]
+    assert report["failures"] == [], report
+    assert proc.returncode == 0
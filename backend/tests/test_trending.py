@@ -0,0 +1,74 @@
+import sqlite3
+
+from app.db import create_schema
+from app.trending import SpaceSaving, TrendingTracker
+
+DAY = 24 * 3600.0
+
+
+def _top(sketch, k, now=0.0):
+    return [(item["keyword"], round(item["score"], 6)) for item in sketch.top(k, now=now)]
+
+
+def _sketch(capacity):
+    sketch = SpaceSaving(capacity, half_life=1e12)
+    sketch._origin = 0.0
+    return sketch
+
+
+def test_new_keyword_evicts_the_smallest_counter():
+    sketch = _sketch(3)
+    for keyword, hits in (("a", 5), ("b", 1), ("c", 3)):
+        for _ in range(hits):
+            sketch.record(keyword, now=0.0)
+    sketch.record("d", now=0.0)
+
+    counters = {key: entry[:2] for key, entry in sketch._counters.items()}
+    assert set(counters) == {"a", "c", "d"}
+    assert counters["d"] == [2.0, 1.0]  # inherits b's count as its error
+
+
+def test_eviction_sees_counts_grown_since_they_were_pushed():
+    sketch = _sketch(2)
+    sketch.record("a", now=0.0)
+    sketch.record("b", now=0.0)
+    for _ in range(3):
+        sketch.record("a", now=0.0)  # a outgrows b without a new heap entry
+    sketch.record("c", now=0.0)
+    assert set(sketch._counters) == {"a", "c"}
+
+
+def test_heavy_hitters_survive_a_long_tail():
+    sketch = _sketch(16)
+    for i in range(2000):
+        sketch.record("hot", now=0.0)
+        sketch.record(f"tail-{i}", now=0.0)
+    assert _top(sketch, 1) == [("hot", 2000.0)]
+    assert len(sketch._heap) == len(sketch._counters) == 16
+
+
+def test_workers_snapshot_side_by_side_and_restore_merged(tmp_path):
+    path = str(tmp_path / "app.db")
+    create_schema(path)
+    first, second = (TrendingTracker(path, 16, DAY, 0) for _ in range(2))
+    for _ in range(3):
+        first.record("Apple")
+    second.record("apple")
+    second.record("Pear")
+    first.snapshot()
+    second.snapshot()
+    first.snapshot()  # replaces only its own rows
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(DISTINCT worker) FROM trending_snapshot").fetchone()[0] == 2
+    conn.close()
+
+    restarted = TrendingTracker(path, 16, DAY, 0)
+    scores = {item["keyword"]: round(item["score"], 3) for item in restarted.top(2)}
+    assert scores == {"apple": 4.0, "pear": 1.0}
+
+    # Writing back only its own traffic, a restored worker doesn't double count.
+    restarted.record("pear")
+    restarted.snapshot()
+    again = TrendingTracker(path, 16, DAY, 0)
+    assert {item["keyword"]: round(item["score"], 3) for item in again.top(2)} == {"apple": 4.0, "pear": 2.0}
@@ -8,6 +8,9 @@ function getApiBase() {
 }
 const API_BASE = getApiBase();
 
+// Seconds a change-feed poll may wait on the server for new rows.
+const FEED_WAIT_S = 20;
+
 async function request(path, options = {}) {
   const res = await fetch(`${API_BASE}${path}`, {
     credentials: "include",
@@ -49,7 +52,15 @@ export const api = {
       method: "POST",
       body: JSON.stringify({ news_text: newsText, topic })
     }),
-  getHistory: () => request("/history"),
+  getHistory: (cursor = null, limit = 50) =>
+    request(`/history?limit=${limit}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`),
+  // Searches newer than sinceId, oldest first; waits up to FEED_WAIT_S for one to arrive.
+  getHistoryChanges: (sinceId, signal) =>
+    request(`/history?since_id=${sinceId}&wait=${FEED_WAIT_S}`, { signal }),
+  searchAnalyses: (q, filters = {}) =>
+    request(`/analyses/search?${new URLSearchParams({ q, ...filters }).toString()}`),
+  getTopicSeries: (keyword, granularity = "day") =>
+    request(`/topics/${encodeURIComponent(keyword)}/series?granularity=${granularity}`),
   admin: {
     login: (username, password) =>
       request("/admin/login", {
@@ -60,10 +71,30 @@ export const api = {
     me: () => request("/admin/me"),
     getUsers: () => request("/admin/users"),
     getSearches: () => request("/admin/searches"),
+    getSearchChanges: (sinceId, signal) =>
+      request(`/admin/searches?since_id=${sinceId}&wait=${FEED_WAIT_S}`, { signal }),
     getStatistics: () => request("/admin/statistics"),
-    getActivity: (limit = 100, offset = 0) =>
-      request(`/admin/activity?limit=${limit}&offset=${offset}`),
-    exportAll: () => request("/admin/export")
+    getSearchRollups: (granularity = "day", keyword = "") =>
+      request(`/admin/rollups/searches?granularity=${granularity}${keyword ? `&keyword=${encodeURIComponent(keyword)}` : ""}`),
+    getActivityRollups: (granularity = "day") => request(`/admin/rollups/activity?granularity=${granularity}`),
+    getActivity: (limit = 100, cursor = null, filters = {}) => {
+      const params = new URLSearchParams({ limit: String(limit) });
+      if (cursor) params.set("cursor", cursor);
+      for (const [key, value] of Object.entries(filters)) {
+        if (value) params.set(key, value);
+      }
+      return request(`/admin/activity?${params.toString()}`);
+    },
+    getActivityChanges: (sinceId, signal, filters = {}) => {
+      const params = new URLSearchParams({ since_id: String(sinceId), wait: String(FEED_WAIT_S) });
+      for (const [key, value] of Object.entries(filters)) {
+        if (value) params.set(key, value);
+      }
+      return request(`/admin/activity?${params.toString()}`, { signal });
+    },
+    exportAll: () => request("/admin/export"),
+    // Streaming export is downloaded directly by the browser rather than parsed in JS.
+    exportUrl: (params = {}) => `${API_BASE}/admin/export?${new URLSearchParams(params).toString()}`
   }
 };
 
@@ -0,0 +1,34 @@
+// Follow a since_id change feed: long-poll for rows newer than sinceId and hand each
+// non-empty batch (oldest first) to onRows. Empty answers (the server's wait ran out,
+// or it had no thread to spare for waiting) are spaced at least MIN_POLL_MS apart.
+// Returns a function that stops following.
+const MIN_POLL_MS = 2000;
+
+export function followChanges(fetchChanges, sinceId, onRows) {
+  const controller = new AbortController();
+  let stopped = false;
+  (async () => {
+    let cursor = sinceId;
+    while (!stopped) {
+      const started = Date.now();
+      try {
+        const data = await fetchChanges(cursor, controller.signal);
+        if (stopped) break;
+        cursor = data.next_since_id;
+        onRows(data);
+        if (data.has_more) continue;
+      } catch {
+        if (stopped) break;
+      }
+      await new Promise((resolve) => setTimeout(resolve, Math.max(0, MIN_POLL_MS - (Date.now() - started))));
+    }
+  })();
+  return () => {
+    stopped = true;
+    controller.abort();
+  };
+}
+
+export function maxId(rows) {
+  return rows.reduce((max, row) => Math.max(max, row.id), 0);
+}
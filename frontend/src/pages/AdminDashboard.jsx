@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { api } from "../lib/api.js";
+import { followChanges, maxId } from "../lib/follow.js";
 
 const TABS = ["Overview", "Users", "Searches", "Activity Log", "Export"];
 
@@ -20,14 +21,21 @@ function formatDate(dateString) {
 export default function AdminDashboard({ onLogout }) {
   const [tab, setTab] = useState("Overview");
   const [stats, setStats] = useState(null);
+  const [searchSeries, setSearchSeries] = useState([]);
+  const [activitySeries, setActivitySeries] = useState([]);
   const [users, setUsers] = useState([]);
   const [searches, setSearches] = useState([]);
   const [activities, setActivities] = useState([]);
   const [totalActivities, setTotalActivities] = useState(0);
-  const [activityOffset, setActivityOffset] = useState(0);
+  // Cursors of the pages before the current one (for Prev); current page cursor; next page cursor.
+  const [activityCursors, setActivityCursors] = useState([]);
+  const [activityCursor, setActivityCursor] = useState(null);
+  const [activityNext, setActivityNext] = useState(null);
+  const [activityAction, setActivityAction] = useState("");
+  // Change feed for the list on screen, set once it has loaded: {tab, sinceId, action}.
+  const [feed, setFeed] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
-  const [exportData, setExportData] = useState(null);
 
   const loadStats = async () => {
     try {
@@ -38,6 +46,19 @@ export default function AdminDashboard({ onLogout }) {
     }
   };
 
+  const loadRollups = async () => {
+    try {
+      const [searchData, activityData] = await Promise.all([
+        api.admin.getSearchRollups("day"),
+        api.admin.getActivityRollups("day"),
+      ]);
+      setSearchSeries(searchData.series || []);
+      setActivitySeries(activityData.series || []);
+    } catch (e) {
+      setError(e.message);
+    }
+  };
+
   const loadUsers = async () => {
     setLoading(true);
     setError("");
@@ -57,6 +78,7 @@ export default function AdminDashboard({ onLogout }) {
     try {
       const data = await api.admin.getSearches();
       setSearches(data.searches || []);
+      setFeed({ tab: "Searches", sinceId: maxId(data.searches || []) });
     } catch (e) {
       setError(e.message);
     } finally {
@@ -64,27 +86,18 @@ export default function AdminDashboard({ onLogout }) {
     }
   };
 
-  const loadActivity = async (offset = 0) => {
+  const loadActivity = async (cursor = null, previous = []) => {
     setLoading(true);
     setError("");
     try {
-      const data = await api.admin.getActivity(100, offset);
+      const data = await api.admin.getActivity(100, cursor, { action: activityAction.trim() });
       setActivities(data.activities || []);
+      // Only the first page follows new rows; later pages stay as loaded.
+      setFeed(cursor ? null : { tab: "Activity Log", sinceId: maxId(data.activities || []), action: activityAction.trim() });
       setTotalActivities(data.total || 0);
-      setActivityOffset(offset);
-    } catch (e) {
-      setError(e.message);
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  const loadExport = async () => {
-    setLoading(true);
-    setError("");
-    try {
-      const data = await api.admin.exportAll();
-      setExportData(data);
+      setActivityCursor(cursor);
+      setActivityCursors(previous);
+      setActivityNext(data.next_cursor || null);
     } catch (e) {
       setError(e.message);
     } finally {
@@ -94,25 +107,36 @@ export default function AdminDashboard({ onLogout }) {
 
   useEffect(() => {
     loadStats();
+    loadRollups();
   }, []);
 
+  // Prepend rows from the change feed while the list they belong to is on screen.
+  useEffect(() => {
+    if (!feed || feed.tab !== tab) return;
+    if (feed.tab === "Searches") {
+      return followChanges(api.admin.getSearchChanges, feed.sinceId, (data) => {
+        if (!data.searches?.length) return;
+        setSearches((prev) => [...[...data.searches].reverse(), ...prev].slice(0, 500));
+      });
+    }
+    return followChanges(
+      (sinceId, signal) => api.admin.getActivityChanges(sinceId, signal, { action: feed.action }),
+      feed.sinceId,
+      (data) => {
+        setTotalActivities(data.total || 0);
+        if (!data.activities?.length) return;
+        setActivities((prev) => [...[...data.activities].reverse(), ...prev]);
+      }
+    );
+  }, [tab, feed]);
+
   useEffect(() => {
     if (tab === "Users") loadUsers();
     if (tab === "Searches") loadSearches();
-    if (tab === "Activity Log") loadActivity(0);
-    if (tab === "Export") loadExport();
+    if (tab === "Activity Log") loadActivity();
+    if (tab === "Export") loadStats();
   }, [tab]);
 
-  const downloadExport = () => {
-    if (!exportData) return;
-    const blob = new Blob([JSON.stringify(exportData, null, 2)], { type: "application/json" });
-    const a = document.createElement("a");
-    a.href = URL.createObjectURL(blob);
-    a.download = `admin-export-${new Date().toISOString().slice(0, 10)}.json`;
-    a.click();
-    URL.revokeObjectURL(a.href);
-  };
-
   return (
     <div className="space-y-6">
       <div className="flex flex-col gap-4 sm:flex-row sm:items-center sm:justify-between">
@@ -129,7 +153,10 @@ export default function AdminDashboard({ onLogout }) {
         {TABS.map((t) => (
           <button
             key={t}
-            onClick={() => setTab(t)}
+            onClick={() => {
+              setFeed(null);
+              setTab(t);
+            }}
             className={`rounded-lg px-3 py-1.5 text-sm font-medium transition-colors ${
               tab === t ? "bg-slate-700 text-white" : "text-slate-400 hover:bg-slate-800 hover:text-white"
             }`}
@@ -166,6 +193,31 @@ export default function AdminDashboard({ onLogout }) {
           ) : (
             <div className="text-slate-400">Loading…</div>
           )}
+
+          <h3 className="text-sm font-semibold mt-6 mb-2 text-slate-300">Analyses per day (last 30 days)</h3>
+          {searchSeries.length === 0 ? (
+            <div className="text-sm text-slate-500">No analyses yet.</div>
+          ) : (
+            <div className="space-y-1">
+              {(() => {
+                const max = Math.max(...searchSeries.map((b) => b.analyses), 1);
+                const activeByDay = Object.fromEntries(activitySeries.map((b) => [b.bucket, b.active_users]));
+                return searchSeries.map((b) => (
+                  <div key={b.bucket} className="flex items-center gap-2 text-xs">
+                    <span className="w-20 shrink-0 text-slate-500">{b.bucket}</span>
+                    <div className="h-3 rounded bg-slate-800 flex-1">
+                      <div className="h-3 rounded bg-purple-600" style={{ width: `${(b.analyses / max) * 100}%` }} />
+                    </div>
+                    <span className="w-40 shrink-0 text-slate-400">
+                      {b.analyses} · <span className="text-green-400">{b.mean.positive.toFixed(0)}%</span>
+                      {" / "}<span className="text-red-400">{b.mean.negative.toFixed(0)}%</span>
+                      {" · "}{activeByDay[b.bucket] ?? 0} users
+                    </span>
+                  </div>
+                ));
+              })()}
+            </div>
+          )}
         </div>
       )}
 
@@ -251,17 +303,26 @@ export default function AdminDashboard({ onLogout }) {
               <p className="text-sm text-slate-400">Every action is stored (signup, login, fetch news, analyze, admin).</p>
             </div>
             <div className="flex items-center gap-2">
-              <span className="text-xs text-slate-500">{activityOffset + 1}–{activityOffset + activities.length} of {totalActivities}</span>
+              <input
+                value={activityAction}
+                onChange={(e) => setActivityAction(e.target.value)}
+                onKeyDown={(e) => e.key === "Enter" && loadActivity()}
+                placeholder="Filter action"
+                className="rounded bg-slate-900 border border-slate-700 px-2 py-1 text-xs"
+              />
+              <span className="text-xs text-slate-500">
+                Page {activityCursors.length + 1} · {totalActivities} total
+              </span>
               <button
-                onClick={() => loadActivity(Math.max(0, activityOffset - 100))}
-                disabled={activityOffset === 0}
+                onClick={() => loadActivity(activityCursors[activityCursors.length - 1] ?? null, activityCursors.slice(0, -1))}
+                disabled={activityCursors.length === 0}
                 className="rounded bg-slate-700 px-2 py-1 text-xs disabled:opacity-50"
               >
                 Prev
               </button>
               <button
-                onClick={() => loadActivity(activityOffset + 100)}
-                disabled={activityOffset + activities.length >= totalActivities}
+                onClick={() => loadActivity(activityNext, [...activityCursors, activityCursor])}
+                disabled={!activityNext}
                 className="rounded bg-slate-700 px-2 py-1 text-xs disabled:opacity-50"
               >
                 Next
@@ -307,25 +368,34 @@ export default function AdminDashboard({ onLogout }) {
         <div className="rounded-2xl border border-slate-900 bg-slate-950/40 p-6">
           <h2 className="text-lg font-semibold mb-2">Export all data</h2>
           <p className="text-sm text-slate-400 mb-4">
-            Download a JSON file containing users, searches, and the full activity log.
+            Download users, searches, and the full activity log. The file is streamed by the server,
+            so large exports don&apos;t have to fit in the browser.
           </p>
-          {loading ? (
-            <div className="text-slate-400">Loading…</div>
-          ) : exportData ? (
-            <div className="space-y-2">
-              <p className="text-sm text-slate-300">
-                Users: {exportData.users?.length ?? 0} · Searches: {exportData.searches?.length ?? 0} · Activities: {exportData.activity_log?.length ?? 0}
-              </p>
-              <button
-                onClick={downloadExport}
-                className="rounded-lg bg-emerald-600 px-4 py-2 text-sm font-medium text-white hover:bg-emerald-700"
-              >
-                Download JSON
-              </button>
-            </div>
-          ) : (
-            <p className="text-slate-500">No data loaded.</p>
+          {stats && (
+            <p className="text-sm text-slate-300 mb-4">
+              Users: {stats.total_users ?? 0} · Searches: {stats.total_searches ?? 0} · Activities: {stats.total_activities ?? 0}
+            </p>
           )}
+          <div className="flex flex-wrap gap-2">
+            <a
+              href={api.admin.exportUrl({ format: "json" })}
+              className="rounded-lg bg-emerald-600 px-4 py-2 text-sm font-medium text-white hover:bg-emerald-700"
+            >
+              Download JSON
+            </a>
+            <a
+              href={api.admin.exportUrl({ format: "ndjson", gzip: "1" })}
+              className="rounded-lg bg-slate-700 px-4 py-2 text-sm font-medium text-white hover:bg-slate-600"
+            >
+              NDJSON (gzip)
+            </a>
+            <a
+              href={api.admin.exportUrl({ format: "csv", gzip: "1" })}
+              className="rounded-lg bg-slate-700 px-4 py-2 text-sm font-medium text-white hover:bg-slate-600"
+            >
+              CSV (gzip)
+            </a>
+          </div>
         </div>
       )}
     </div>
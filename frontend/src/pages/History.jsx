@@ -1,20 +1,37 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { api } from "../lib/api.js";
+import { followChanges, maxId } from "../lib/follow.js";
 
 export default function History() {
   const [history, setHistory] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
+  const [loadingMore, setLoadingMore] = useState(false);
+  const sinceId = useRef(0);
 
   useEffect(() => {
     loadHistory();
   }, []);
 
+  // Once the first page is in, prepend new searches from the change feed.
+  useEffect(() => {
+    if (loading || error) return;
+    return followChanges(api.getHistoryChanges, sinceId.current, (data) => {
+      if (!data.searches?.length) return;
+      setHistory((prev) => ({
+        ...prev,
+        statistics: data.statistics,
+        searches: [...[...data.searches].reverse(), ...(prev?.searches || [])]
+      }));
+    });
+  }, [loading, error]);
+
   const loadHistory = async () => {
     setLoading(true);
     setError("");
     try {
       const data = await api.getHistory();
+      sinceId.current = maxId(data.searches || []);
       setHistory(data);
     } catch (err) {
       setError(err.message || "Failed to load history");
@@ -23,6 +40,25 @@ export default function History() {
     }
   };
 
+  const loadMore = async () => {
+    if (!history?.next_cursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await api.getHistory(history.next_cursor);
+      // Keep the live statistics and feed state; only the page cursor moves.
+      setHistory((prev) => ({
+        ...prev,
+        searches: [...(prev?.searches || []), ...(data.searches || [])],
+        next_cursor: data.next_cursor,
+        has_more: data.has_more
+      }));
+    } catch (err) {
+      setError(err.message || "Failed to load history");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const formatDate = (dateString) => {
     try {
       const date = new Date(dateString);
@@ -196,6 +232,17 @@ export default function History() {
                 </div>
               );
             })}
+            {history?.has_more && (
+              <div className="pt-2 text-center">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="rounded-lg border border-slate-700 bg-slate-900/40 px-4 py-2 text-xs sm:text-sm font-semibold text-slate-300 hover:bg-slate-800 disabled:opacity-50"
+                >
+                  {loadingMore ? "Loading..." : "Load more"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>